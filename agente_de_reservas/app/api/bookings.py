@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.booking import Booking
+from app.services.availability_invalidation import publish_availability_change
 
 router = APIRouter()
 print("🔥 bookings.py CARGADO CORRECTAMENTE 🔥")
@@ -14,6 +15,9 @@ def delete_booking(booking_id: int, db: Session = Depends(get_db)):
     if not booking:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
     
+    business_id, day = booking.business_id, booking.date
     db.delete(booking)
     db.commit()
+    # El hueco vuelve a estar libre: avisar a la caché de disponibilidad del backend
+    publish_availability_change(business_id, day)
     return {"message": "Cita eliminada correctamente"}
\ No newline at end of file
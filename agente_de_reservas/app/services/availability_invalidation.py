@@ -0,0 +1,37 @@
+import os
+import json
+import uuid
+
+# Mismo canal que la caché de disponibilidad del backend (backend/app/services/availability_cache.py):
+# al borrar una reserva aquí se avisa a sus workers para que no sirvan el hueco como ocupado
+AVAILABILITY_CACHE_REDIS_URL = os.getenv("AVAILABILITY_CACHE_REDIS_URL")
+AVAILABILITY_CACHE_CHANNEL = os.getenv("AVAILABILITY_CACHE_CHANNEL", "availability:invalidate")
+
+_ORIGIN = uuid.uuid4().hex
+_redis = None
+
+
+def _client():
+    global _redis
+    if _redis is None:
+        import redis  # dependencia opcional
+        _redis = redis.Redis.from_url(AVAILABILITY_CACHE_REDIS_URL)
+    return _redis
+
+
+def publish_availability_change(business_id, day):
+    """
+    Publica la invalidación de (negocio, día). Sin AVAILABILITY_CACHE_REDIS_URL
+    (o sin el paquete redis) no se hace nada y el backend se pone al día por TTL.
+    """
+    if not AVAILABILITY_CACHE_REDIS_URL:
+        return False
+    message = {"origin": _ORIGIN, "business_id": business_id, "date": None if day is None else str(day)}
+    try:
+        _client().publish(AVAILABILITY_CACHE_CHANNEL, json.dumps(message))
+        return True
+    except ImportError:
+        print("⚠️ AVAILABILITY_CACHE_REDIS_URL definido pero falta el paquete redis")
+    except Exception as e:
+        print(f"⚠️ No se pudo publicar la invalidación de disponibilidad: {e}")
+    return False
@@ -0,0 +1,29 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from app.services import profiler
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    # Sin token configurado no hay endpoints de administración
+    if not profiler.PROFILING_ENABLED or not profiler.PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="No encontrado")
+    if not profiler.is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Token de administración no válido")
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def get_profiles():
+    """Perfiles capturados (más recientes primero) con sus ficheros descargables."""
+    return {"profiles": profiler.list_profiles()}
+
+
+@router.get("/admin/profiles/{session_dir}/{filename}", dependencies=[Depends(require_admin)])
+def download_profile(session_dir: str, filename: str):
+    """Descarga un .pstats (pstats / snakeviz) o un .collapsed (flamegraph.pl / speedscope)."""
+    path = profiler.profile_file(session_dir, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(path, filename=filename, media_type="application/octet-stream")
@@ -1,22 +1,68 @@
-from fastapi import APIRouter
-from app.services.llm_agent import handle_chat
+import json
+from time import perf_counter
+from typing import Optional
+from fastapi import APIRouter, Header, Response
+from fastapi.responses import StreamingResponse
+from app.services.llm_agent import handle_chat, handle_chat_stream
+from app.services.metrics import server_timing
+from app.services.timing import request_timings
+from app.services.profiler import should_profile, profile_request
 from app.schemas.chat import ChatRequest, ChatResponse
 
 router = APIRouter()
-print("🔥 agent.py CARGADO CORRECTAMENTE 🔥")
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(
+    request: ChatRequest,
+    response: Response,
+    profile: bool = False,
+    x_profile: bool = Header(default=False),
+    x_admin_token: Optional[str] = Header(default=None),
+):
     """
     Endpoint para recibir mensajes del frontend y responder usando LLM.
+    La cabecera Server-Timing desglosa el tiempo del turno por etapa.
+
+    Perfilado (PROFILING_ENABLED): ?profile=true o X-Profile: true con
+    X-Admin-Token, o por muestreo. El id del perfil va en X-Profile-Id.
     """
-    result = handle_chat(
-        business_id=request.business_id,
-        session_id=request.session_id,
-        message=request.message
-    )
+    started = perf_counter()
+    enabled = should_profile(profile or x_profile, x_admin_token)
+    with request_timings() as timings, profile_request(request.session_id, enabled) as capture:
+        result = await handle_chat(
+            business_id=request.business_id,
+            session_id=request.session_id,
+            message=request.message
+        )
+        if capture is not None:
+            # Se guarda con el perfil al salir del bloque
+            capture.meta["timings"] = timings
+    response.headers["Server-Timing"] = server_timing(timings, perf_counter() - started)
+    if capture is not None:
+        response.headers["X-Profile-Id"] = capture.id
 
     return {
         "reply": result["reply"],
         "status": result["status"]
     }
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Igual que /chat pero devuelve la respuesta token a token (Server-Sent Events).
+    Eventos: "token" con {"text"} y un "done" final con {"reply", "status", "replace"}.
+    """
+    async def event_source():
+        async for event in handle_chat_stream(
+            business_id=request.business_id,
+            session_id=request.session_id,
+            message=request.message
+        ):
+            kind = event.pop("type")
+            yield f"event: {kind}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
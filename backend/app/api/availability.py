@@ -1,7 +1,16 @@
-@router.get("/availability")
-def availability(business_id: str, date: str, db=Depends(SessionLocal)):
-    from datetime import datetime
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.services.availability import get_available_slots, get_available_slots_range
+
+router = APIRouter()
 
+# Máximo de días que se pueden pedir de una vez (un año)
+MAX_RANGE_DAYS = 366
+
+@router.get("/availability")
+def availability(business_id: str, date: str, db: Session = Depends(get_db)):
     try:
         target_date = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
@@ -13,3 +22,48 @@ def availability(business_id: str, date: str, db=Depends(SessionLocal)):
         "date": date,
         "available_slots": [s.strftime("%H:%M") for s in slots]
     }
+
+@router.get("/availability/range")
+def availability_range(
+    business_id: str,
+    start: str = Query(..., alias="from"),
+    end: str = Query(..., alias="to"),
+    db: Session = Depends(get_db)
+):
+    """
+    Huecos libres de varios días (p. ej. un mes del calendario) con una sola
+    consulta de horarios y una de reservas.
+
+    Formato compacto: por cada día abierto, la hora del primer hueco ("open")
+    y una cadena de bits ("free") donde el carácter i es el hueco
+    open + i * slot_minutes ("1" libre, "0" ocupado). Los días cerrados no aparecen.
+    """
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Usa YYYY-MM-DD")
+
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="'to' no puede ser anterior a 'from'")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"El rango máximo es de {MAX_RANGE_DAYS} días")
+
+    engine, free = get_available_slots_range(business_id, start_date, end_date, db)
+
+    days = {}
+    for day, mask in free.items():
+        template = engine.template_for(day)
+        if template is None:
+            continue
+        # Bit i -> carácter i (de la primera hora a la última)
+        bits = format(mask, f"0{template.n_slots}b")[::-1] if template.n_slots else ""
+        days[day.isoformat()] = {"open": template.slot_time(0).strftime("%H:%M"), "free": bits}
+
+    return {
+        "business_id": business_id,
+        "from": start_date.isoformat(),
+        "to": end_date.isoformat(),
+        "slot_minutes": engine.slot_minutes,
+        "days": days
+    }
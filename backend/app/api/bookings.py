@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
 from app.schemas.booking import BookingCreate
-from app.services.booking_service import create_booking
+from app.services.booking_service import create_booking, SlotTakenError
+from app.services.timing import stage
+from app.services.metrics import BOOKING_CONFLICTS
 
 router = APIRouter()
 
 @router.post("/book")
-def book(booking: BookingCreate, db=Depends(SessionLocal)):
-    new_booking = create_booking(db, booking)
+def book(booking: BookingCreate, db: Session = Depends(get_db)):
+    try:
+        with stage("db"):
+            new_booking = create_booking(db, booking)
+    except SlotTakenError:
+        BOOKING_CONFLICTS.inc(source="api")
+        raise HTTPException(status_code=409, detail="Ese horario ya está reservado")
     return {
         "message": "Reserva creada",
         "booking": {
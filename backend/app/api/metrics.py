@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.services.metrics import METRICS_ENABLED, register_collector, render
+from app.services.llm_output import parse_stats
+from app.services.session_service import session_stats
+from app.services.availability_cache import availability_cache_stats
+from app.services.response_cache import get_response_cache
+from app.services.bookings_client import get_bookings_client
+from app.services.email_outbox import outbox_stats
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@register_collector
+def service_metrics():
+    """Contadores que ya llevan los servicios (*_stats), leídos en cada scrape."""
+    parse = parse_stats()
+    sessions = session_stats()
+    availability = availability_cache_stats()
+    responses = get_response_cache().stats()
+    bookings = get_bookings_client().stats()
+    families = [
+        ("chatbot_llm_replies_parsed_total", "counter", "Respuestas del LLM analizadas por resultado",
+         [({"result": kind}, parse[kind]) for kind in ("clean", "repaired", "prose", "failed")]),
+        ("chatbot_llm_parse_failures_total", "counter", "Respuestas del LLM inservibles (llamada desperdiciada)",
+         [({}, parse["failed"])]),
+        ("chatbot_active_sessions", "gauge", "Sesiones de chat en memoria",
+         [({"backend": sessions["backend"]}, sessions["entries"])]),
+        ("chatbot_cache_lookups_total", "counter", "Consultas a las cachés por resultado",
+         [({"cache": "availability", "result": "hit"}, availability["hits"]),
+          ({"cache": "availability", "result": "miss"}, availability["misses"]),
+          ({"cache": "response", "result": "hit"}, responses["hits"]),
+          ({"cache": "response", "result": "miss"}, responses["misses"]),
+          ({"cache": "bookings", "result": "hit"},
+           bookings["cache_hits"] + bookings["turn_hits"] + bookings["flight_shared"]),
+          ({"cache": "bookings", "result": "miss"}, bookings["requests"])]),
+    ]
+    outbox = outbox_stats()
+    if outbox is not None:
+        families.append(("chatbot_emails_total", "counter", "Correos procesados por el worker de la bandeja de salida",
+                         [({"result": result}, outbox[result]) for result in ("sent", "retried", "failed")]))
+    return families
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desactivadas")
+    return PlainTextResponse(render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,46 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas.schedule import WeeklyHours, OverrideCreate, HolidayCreate
+from app.services import schedule_service
+
+router = APIRouter(prefix="/schedule")
+
+# Cada cambio invalida la disponibilidad cacheada y actualiza el calendario del negocio
+
+@router.put("/weekly")
+def set_weekly_hours(hours: WeeklyHours, db: Session = Depends(get_db)):
+    if (hours.open_time is None) != (hours.close_time is None):
+        raise HTTPException(status_code=400, detail="Indica apertura y cierre, o ninguno para cerrar el día")
+    if hours.open_time and hours.open_time >= hours.close_time:
+        raise HTTPException(status_code=400, detail="La apertura debe ser anterior al cierre")
+    schedule_service.set_weekly_hours(db, hours.business_id, hours.weekday, hours.open_time, hours.close_time)
+    return {"message": "Horario actualizado"}
+
+@router.put("/overrides")
+def set_override(override: OverrideCreate, db: Session = Depends(get_db)):
+    if not override.closed and not (override.open_time and override.close_time):
+        raise HTTPException(status_code=400, detail="Indica closed o el horario del día")
+    schedule_service.set_override(
+        db, override.business_id, override.date, override.closed, override.open_time, override.close_time
+    )
+    return {"message": "Excepción de horario guardada"}
+
+@router.delete("/overrides")
+def delete_override(business_id: str, date: date, db: Session = Depends(get_db)):
+    if not schedule_service.delete_override(db, business_id, date):
+        raise HTTPException(status_code=404, detail="No hay excepción de horario para esa fecha")
+    return {"message": "Excepción de horario eliminada"}
+
+@router.post("/holidays")
+def add_holiday(holiday: HolidayCreate, db: Session = Depends(get_db)):
+    schedule_service.add_holiday(db, holiday.date, holiday.business_id, holiday.name)
+    return {"message": "Festivo guardado"}
+
+@router.delete("/holidays")
+def delete_holiday(date: date, business_id: Optional[str] = None, db: Session = Depends(get_db)):
+    if not schedule_service.delete_holiday(db, date, business_id):
+        raise HTTPException(status_code=404, detail="No hay festivo para esa fecha")
+    return {"message": "Festivo eliminado"}
@@ -1,9 +1,54 @@
-from fastapi import FastAPI, Request, Response
+import asyncio
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Antes de importar los servicios: leen su configuración del entorno al cargarse
+load_dotenv(dotenv_path=".env.local")
+from app.services.structured_log import setup_logging
+setup_logging()
+
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.agent import router as agent_router
+from app.api.availability import router as availability_router
+from app.api.bookings import router as bookings_router
+from app.api.schedule import router as schedule_router
+from app.api.metrics import router as metrics_router
+from app.api.admin import router as admin_router
+from app.database import engine, Base
+from app.migrations import run_migrations
+from app.services.email_outbox import start_outbox_worker, stop_outbox_worker
+from app.services.http_client import close_http_client
+from app.services.availability_cache import close_availability_cache
+from app.services.business_calendar import warm_calendars
+from app.services.session_service import close_session_store
+# Importar modelos para que SQLAlchemy los registre antes de crear las tablas
+import app.models.booking
+import app.models.schedule
+import app.models.holiday
+import app.models.chat_session
+import app.models.email_outbox
+
 
-print("🔥 main.py CARGADO CORRECTAMENTE 🔥")
-app = FastAPI(title="Chatbot API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Crear las tablas que falten (incluida la de sesiones de chat)
+    Base.metadata.create_all(bind=engine)
+    # Índices nuevos sobre tablas existentes (p. ej. hueco único en bookings)
+    run_migrations(engine)
+    # Índices de apertura de los negocios: fuera del event loop y antes del primer turno
+    await asyncio.to_thread(warm_calendars)
+    # Envío de correos en segundo plano (bandeja de salida)
+    start_outbox_worker()
+    yield
+    # Volcar las sesiones pendientes y cerrar el pool HTTP (Ollama / Backend Node) al apagar
+    stop_outbox_worker()
+    close_session_store()
+    close_availability_cache()
+    await close_http_client()
+
+
+app = FastAPI(title="Chatbot API", lifespan=lifespan)
 
 # 🔥 CORS para que el frontend pueda comunicarse con el backend
 app.add_middleware(
@@ -23,13 +68,13 @@ app.add_middleware(
 
 # Registrar el router con prefijo "/agent"
 app.include_router(agent_router, prefix="/agent")
+app.include_router(availability_router, tags=["availability"])
+app.include_router(bookings_router, tags=["bookings"])
+app.include_router(schedule_router, tags=["schedule"])
+app.include_router(metrics_router, tags=["metrics"])
+app.include_router(admin_router, tags=["admin"])
 
 # Endpoint raíz de prueba
 @app.get("/")
 async def root():
     return {"message": "API corriendo correctamente"}
-
-'''# Opcional: endpoint para preflight OPTIONS
-@app.options("/agent/chat")
-async def preflight(request: Request):
-    return Response(status_code=200)'''
\ No newline at end of file
@@ -0,0 +1,48 @@
+# backend/app/migrations.py
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Migraciones en orden: (nombre, sentencias). create_all solo crea tablas nuevas,
+# los índices de tablas que ya existían hay que añadirlos aquí.
+MIGRATIONS = [
+    ("001_bookings_unique_slot", [
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_bookings_slot ON bookings (business_id, date, start_time)",
+    ]),
+]
+
+
+def run_migrations(engine):
+    """
+    Aplica las migraciones pendientes (se registran en schema_migrations).
+    Devuelve la lista de migraciones aplicadas.
+    """
+    applied = []
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR PRIMARY KEY, applied_at TIMESTAMP)"
+        ))
+        done = {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+
+    for name, statements in MIGRATIONS:
+        if name in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                for statement in statements:
+                    conn.execute(text(statement))
+                conn.execute(
+                    text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)"),
+                    {"name": name, "applied_at": datetime.now()}
+                )
+        except Exception as e:
+            # P. ej. reservas duplicadas previas que impiden crear el índice único
+            logger.error("Error aplicando la migración %s: %s", name, e)
+            break
+        logger.info("Migración aplicada: %s", name)
+        applied.append(name)
+    return applied
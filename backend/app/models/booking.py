@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, String, Date, Time
+from sqlalchemy import Column, Integer, String, Date, Time, Index
 from app.database import Base
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Un hueco solo puede reservarse una vez. El índice también cubre las
+        # búsquedas por (business_id, date) que solo leen start_time.
+        Index("ux_bookings_slot", "business_id", "date", "start_time", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     business_id = Column(String, index=True)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.database import Base
+
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+
+    session_id = Column(String, primary_key=True)
+    data = Column(Text, nullable=False)  # estado de la conversación en JSON
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, index=True)
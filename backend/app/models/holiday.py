@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, Date
+from app.database import Base
+
+class Holiday(Base):
+    __tablename__ = "holidays"
+
+    id = Column(Integer, primary_key=True)
+    business_id = Column(String, nullable=True, index=True)  # None = festivo para todos los negocios
+    date = Column(Date)
+    name = Column(String, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Time
+from sqlalchemy import Column, Integer, String, Time, Date, Boolean
 from app.database import Base
 
 class WeeklySchedule(Base):
@@ -9,3 +9,17 @@ class WeeklySchedule(Base):
     weekday = Column(Integer)  # 0=Monday
     open_time = Column(Time)
     close_time = Column(Time)
+
+class ScheduleOverride(Base):
+    """
+    Excepción al horario semanal para un día concreto: cierre puntual
+    (closed=1) u horario distinto (open_time/close_time).
+    """
+    __tablename__ = "schedule_overrides"
+
+    id = Column(Integer, primary_key=True)
+    business_id = Column(String, index=True)
+    date = Column(Date)
+    closed = Column(Boolean, default=False)
+    open_time = Column(Time, nullable=True)
+    close_time = Column(Time, nullable=True)
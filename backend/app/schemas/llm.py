@@ -0,0 +1,55 @@
+# backend/app/schemas/llm.py
+from datetime import datetime
+from typing import Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+class LLMReply(BaseModel):
+    """
+    Sobre JSON que devuelve el LLM en cada turno (el formato de SYSTEM_PROMPT).
+    El orden de los campos es el del esquema: "message" primero para el streaming.
+    """
+    model_config = ConfigDict(extra="ignore")
+
+    message: Optional[str] = None
+    intent: Optional[Literal["smalltalk", "check_availability", "book", "unknown"]] = None
+    date: Optional[str] = Field(None, pattern=r"^(\d{4}-\d{2}-\d{2}|RESET)$")
+    time: Optional[str] = Field(None, pattern=r"^(\d{1,2}:\d{2}|RESET)$")
+    event_details: Optional[str] = None
+    customer_name: Optional[str] = None
+    customer_email: Optional[str] = None
+    customer_phone: Optional[str] = None
+    event_date: Optional[str] = None
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def null_strings(cls, value):
+        # El modelo a veces escribe "null" o "" en vez de null, o el teléfono como número
+        if isinstance(value, str) and value.strip().lower() in ("", "null", "none"):
+            return None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+    @field_validator("date", "time")
+    @classmethod
+    def real_date_time(cls, value, info):
+        # El patrón deja pasar "2025-13-45" o "29:99": se comprueba que existan
+        if value is None or value == "RESET":
+            return value
+        try:
+            datetime.strptime(value, "%Y-%m-%d" if info.field_name == "date" else "%H:%M")
+        except ValueError:
+            raise ValueError(f"{info.field_name} inexistente: {value}")
+        return value
+
+
+def llm_reply_format() -> dict:
+    """
+    Esquema JSON para el parámetro "format" de Ollama (salida estructurada).
+    Todos los campos son obligatorios para que el modelo los escriba siempre y en orden.
+    """
+    schema = LLMReply.model_json_schema()
+    schema.pop("title", None)
+    schema.pop("description", None)
+    schema["required"] = list(schema["properties"])
+    return schema
@@ -0,0 +1,22 @@
+from typing import Optional
+from datetime import date, time
+from pydantic import BaseModel, Field
+
+class WeeklyHours(BaseModel):
+    business_id: str
+    weekday: int = Field(ge=0, le=6)  # 0=Monday
+    # Sin horas: cerrado ese día de la semana
+    open_time: Optional[time] = None
+    close_time: Optional[time] = None
+
+class OverrideCreate(BaseModel):
+    business_id: str
+    date: date
+    closed: bool = False
+    open_time: Optional[time] = None
+    close_time: Optional[time] = None
+
+class HolidayCreate(BaseModel):
+    business_id: Optional[str] = None  # None = festivo para todos los negocios
+    date: date
+    name: Optional[str] = None
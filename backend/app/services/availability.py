@@ -1,26 +1,29 @@
-from datetime import datetime, timedelta, time
-from app.models.booking import Booking
-from app.models.schedule import WeeklySchedule
-from app.database import SessionLocal
+from datetime import datetime
+from app.services.availability_engine import AvailabilityEngine
+from app.services.availability_cache import get_availability_cache, AVAILABILITY_CACHE_ENABLED
+from app.services.single_flight import SingleFlight
+from app.services.timing import stage
 
-# Lista de días festivos (formato YYYY-MM-DD)
+# Festivos que se repiten cada año (mes, día)
+RECURRING_HOLIDAYS = {
+    (1, 1),   # Año Nuevo
+    (1, 6),   # Reyes Magos
+    (12, 25), # Navidad
+}
+
+# Festivos puntuales (formato YYYY-MM-DD). Los de cada negocio van en la tabla holidays.
 HOLIDAYS = [
     "2025-01-01", # Año Nuevo
     "2025-01-06", # Reyes Magos
     "2025-12-25", # Navidad
 ]
+_HOLIDAY_DATES = frozenset(datetime.strptime(d, "%Y-%m-%d").date() for d in HOLIDAYS)
 
-def is_holiday(date_obj):
-    return date_obj.strftime("%Y-%m-%d") in HOLIDAYS
+# Consultas simultáneas del mismo (negocio, día) comparten una sola lectura de la BD
+_slots_flight = SingleFlight()
 
-def generate_hour_slots(open_time: time, close_time: time):
-    slots = []
-    current = datetime.combine(datetime.today(), open_time)
-    end = datetime.combine(datetime.today(), close_time)
-    while current + timedelta(hours=1) <= end:
-        slots.append(current.time())
-        current += timedelta(hours=1)
-    return slots
+def is_holiday(date_obj):
+    return (date_obj.month, date_obj.day) in RECURRING_HOLIDAYS or date_obj in _HOLIDAY_DATES
 
 def get_available_slots(business_id, date, db, target_date=None):
     if date < datetime.now().date():
@@ -29,14 +32,45 @@ def get_available_slots(business_id, date, db, target_date=None):
     if is_holiday(date):
         return []
 
-    weekday = date.weekday()
-    schedule = db.query(WeeklySchedule).filter_by(business_id=business_id, weekday=weekday).first()
-    if not schedule:
-        return []
+    def load():
+        return _slots_flight.do((str(business_id), str(date)), lambda: tuple(_load_slots(business_id, date, db)))
+
+    if AVAILABILITY_CACHE_ENABLED:
+        # Un día de un negocio rara vez cambia entre lecturas: se invalida al reservar o cambiar el horario
+        return get_availability_cache().get_or_load(business_id, date, load)
+    return list(load())
+
+def slots_flight_stats() -> dict:
+    return _slots_flight.stats()
+
+def _load_slots(business_id, date, db):
+    from app.services.business_calendar import get_calendar
+
+    calendar = get_calendar(business_id, db)
+    with stage("db"):
+        engine = AvailabilityEngine.from_db(db, business_id, is_holiday, calendar=calendar)
+        if engine.template_for(date) is None:
+            return []
+
+        # Huecos libres = horario del día con los bits de las reservas limpiados
+        booked = engine.booked_masks(db, date, date).get(date, 0)
+    return engine.free_slots(date, booked)
+
+def get_available_slots_range(business_id, start, end, db):
+    """
+    Disponibilidad de todos los días de [start, end] con una consulta de
+    horarios y una de reservas. Devuelve (motor, {fecha: bitset libre}).
+    Los días pasados y los festivos salen sin huecos.
+    """
+    from app.services.business_calendar import get_calendar
 
-    all_slots = generate_hour_slots(schedule.open_time, schedule.close_time)
-    bookings = db.query(Booking).filter_by(business_id=business_id, date=date).all()
-    booked_slots = [b.start_time for b in bookings]
+    engine = AvailabilityEngine.from_db(db, business_id, is_holiday, calendar=get_calendar(business_id, db))
+    today = datetime.now().date()
+    first = max(start, today)
 
-    free_slots = [s for s in all_slots if s not in booked_slots]
-    return free_slots
+    booked = engine.booked_masks(db, first, end) if first <= end and engine.templates else {}
+    free = engine.free_masks(start, end, booked)
+    for day in free:
+        if day < today:
+            free[day] = 0
+    return engine, free
@@ -0,0 +1,181 @@
+# backend/app/services/availability_cache.py
+
+import os
+import json
+import uuid
+import logging
+import threading
+
+from app.services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Caché de lectura de los huecos libres por (negocio, día)
+AVAILABILITY_CACHE_ENABLED = os.getenv("AVAILABILITY_CACHE_ENABLED", "true").lower() == "true"
+AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", "30"))
+AVAILABILITY_CACHE_MAX_ENTRIES = int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", "4096"))
+# Opcional: Redis para avisar de las invalidaciones al resto de workers (p. ej. redis://localhost:6379/0)
+AVAILABILITY_CACHE_REDIS_URL = os.getenv("AVAILABILITY_CACHE_REDIS_URL")
+AVAILABILITY_CACHE_CHANNEL = os.getenv("AVAILABILITY_CACHE_CHANNEL", "availability:invalidate")
+
+
+class AvailabilityCache:
+    """
+    Caché read-through de get_available_slots, acotada (LRU) y con TTL.
+
+    Las claves llevan una generación por negocio: invalidar un negocio entero
+    (cambio de horario semanal) es subir su generación, sin recorrer la caché.
+    Un día concreto (reserva creada o borrada, festivo) se borra directamente.
+    """
+
+    def __init__(self, maxsize=AVAILABILITY_CACHE_MAX_ENTRIES, ttl=AVAILABILITY_CACHE_TTL, bus=None):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.bus = bus
+        self._generations = {}
+        # Sube con cada invalidación: un cálculo que la cruza no se guarda
+        self._version = 0
+        self._lock = threading.Lock()
+        self.invalidations = {"day": 0, "business": 0, "all": 0, "remote": 0}
+
+    def _key(self, business_id, day):
+        return (str(business_id), self._generations.get(str(business_id), 0), str(day))
+
+    def get_or_load(self, business_id, day, loader):
+        """Huecos libres del día; si no están en caché se calculan con loader() y se guardan."""
+        key = self._key(business_id, day)
+        slots = self.cache.get(key)
+        if slots is None:
+            version = self._version
+            slots = tuple(loader())
+            # Si hubo una invalidación mientras se calculaba, el resultado puede estar obsoleto
+            with self._lock:
+                if version == self._version:
+                    self.cache.set(key, slots)
+        return list(slots)
+
+    def invalidate(self, business_id=None, day=None, publish=True, calendar=False):
+        """
+        Olvida un día, todo un negocio (day=None) o toda la caché (business_id=None).
+        calendar=True: ha cambiado el horario, el resto de workers recargan también su calendario.
+        """
+        with self._lock:
+            self._version += 1
+            if business_id is None:
+                self.cache.clear()
+                self._generations.clear()
+                self.invalidations["all"] += 1
+            elif day is None:
+                business_id = str(business_id)
+                self._generations[business_id] = self._generations.get(business_id, 0) + 1
+                self.invalidations["business"] += 1
+            else:
+                self.cache.pop(self._key(business_id, day), None)
+                self.invalidations["day"] += 1
+        if publish and self.bus is not None:
+            self.bus.publish(business_id, day, calendar)
+
+    def clear(self):
+        self.invalidate(publish=False)
+        with self._lock:
+            self.cache.hits = self.cache.misses = 0
+            self.invalidations = dict.fromkeys(self.invalidations, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            invalidations = dict(self.invalidations)
+        return {**self.cache.stats(), "invalidations": invalidations, "shared": self.bus is not None}
+
+
+class RedisInvalidationBus:
+    """
+    Propaga las invalidaciones entre workers con pub/sub de Redis. Cada
+    worker mantiene su propia caché en memoria; solo viajan los avisos.
+    """
+
+    def __init__(self, url, channel=AVAILABILITY_CACHE_CHANNEL):
+        import redis  # dependencia opcional
+
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.redis = redis.Redis.from_url(url)
+        self.cache = None
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, cache):
+        self.cache = cache
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, business_id, day, calendar=False):
+        message = {"origin": self.origin, "business_id": business_id, "date": None if day is None else str(day),
+                   "calendar": calendar}
+        try:
+            self.redis.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            # Sin Redis el resto de workers se ponen al día por TTL
+            logger.warning("No se pudo publicar la invalidación de disponibilidad: %s", e)
+
+    def _on_message(self, message):
+        data = json.loads(message["data"])
+        if data.get("origin") == self.origin or self.cache is None:
+            return
+        self.cache.invalidate(data.get("business_id"), data.get("date"), publish=False)
+        with self.cache._lock:
+            self.cache.invalidations["remote"] += 1
+        if data.get("calendar"):
+            for listener in _calendar_listeners:
+                listener(data.get("business_id"))
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+        self.redis.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+# Avisos de cambio de horario llegados de otro worker (business_calendar recarga su índice)
+_calendar_listeners = []
+
+
+def on_remote_calendar_change(listener):
+    """listener(business_id) se llama cuando otro worker cambia el horario (None = todos)."""
+    _calendar_listeners.append(listener)
+    return listener
+
+
+def get_availability_cache() -> AvailabilityCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            bus = None
+            if AVAILABILITY_CACHE_REDIS_URL:
+                try:
+                    bus = RedisInvalidationBus(AVAILABILITY_CACHE_REDIS_URL)
+                except ImportError:
+                    logger.warning("AVAILABILITY_CACHE_REDIS_URL definido pero falta el paquete redis: caché solo local")
+            _cache = AvailabilityCache(bus=bus)
+            if bus is not None:
+                bus.start(_cache)
+        return _cache
+
+
+def invalidate_availability(business_id=None, day=None, calendar=False):
+    """Avisar tras crear o borrar una reserva (day) o cambiar el horario (calendar=True)."""
+    get_availability_cache().invalidate(business_id, day, calendar=calendar)
+
+
+def availability_cache_stats() -> dict:
+    return get_availability_cache().stats()
+
+
+def close_availability_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is not None and _cache.bus is not None:
+            _cache.bus.close()
+        _cache = None
@@ -0,0 +1,186 @@
+# backend/app/services/availability_engine.py
+
+from datetime import date as date_type, time, timedelta
+from functools import lru_cache
+
+from app.models.booking import Booking
+from app.models.schedule import WeeklySchedule
+
+# Las citas duran 1 hora
+SLOT_MINUTES = 60
+
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+class DayTemplate:
+    """
+    Huecos de un día de apertura como bitset: el bit i es el hueco que empieza
+    en open_time + i * SLOT_MINUTES. Se calcula una vez por horario.
+    """
+    __slots__ = ("open_minute", "n_slots", "mask")
+
+    def __init__(self, open_minute: int, n_slots: int):
+        self.open_minute = open_minute
+        self.n_slots = n_slots
+        self.mask = (1 << n_slots) - 1
+
+    def slot_time(self, i: int) -> time:
+        minute = self.open_minute + i * SLOT_MINUTES
+        return time(minute // 60, minute % 60)
+
+    def index(self, t: time):
+        """Bit correspondiente a una hora de inicio, o None si no es un hueco del horario."""
+        offset = _minutes(t) - self.open_minute
+        if offset < 0 or offset % SLOT_MINUTES:
+            return None
+        i = offset // SLOT_MINUTES
+        return i if i < self.n_slots else None
+
+    def booked_mask(self, start_times) -> int:
+        mask = 0
+        for t in start_times:
+            i = self.index(t)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def slots(self, mask: int):
+        """Convierte un bitset en la lista de horas de inicio (ordenadas)."""
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.slot_time(low.bit_length() - 1))
+            mask ^= low
+        return out
+
+
+@lru_cache(maxsize=256)
+def compile_template(open_time: time, close_time: time) -> DayTemplate:
+    open_minute = _minutes(open_time)
+    n_slots = max(0, (_minutes(close_time) - open_minute) // SLOT_MINUTES)
+    return DayTemplate(open_minute, n_slots)
+
+
+class AvailabilityEngine:
+    """
+    Motor de disponibilidad basado en bitsets.
+
+    Cada día laborable es un entero con un bit por hueco (derivado de
+    WeeklySchedule); las reservas se restan limpiando bits. Calcular huecos
+    libres, comprobar conflictos o buscar el siguiente hueco libre son
+    operaciones de bits.
+    """
+
+    slot_minutes = SLOT_MINUTES
+
+    def __init__(self, business_id: str, templates: dict, is_holiday=None, calendar=None):
+        self.business_id = business_id
+        self.templates = templates  # weekday -> DayTemplate
+        self.is_holiday = is_holiday or (lambda d: False)
+        # Calendario del negocio (festivos propios y excepciones por fecha), opcional
+        self.calendar = calendar
+
+    @classmethod
+    def from_db(cls, db, business_id: str, is_holiday=None, calendar=None):
+        rows = (
+            db.query(WeeklySchedule.weekday, WeeklySchedule.open_time, WeeklySchedule.close_time)
+            .filter(WeeklySchedule.business_id == business_id)
+            .all()
+        )
+        templates = {}
+        for weekday, open_time, close_time in rows:
+            # Igual que antes: si hubiera varios horarios para un día, manda el primero
+            templates.setdefault(weekday, compile_template(open_time, close_time))
+        return cls(business_id, templates, is_holiday, calendar)
+
+    # --- Reservas ---
+
+    def booked_masks(self, db, start: date_type, end: date_type) -> dict:
+        """
+        Bitsets de huecos reservados por día en [start, end], con una sola consulta.
+        """
+        rows = (
+            db.query(Booking.date, Booking.start_time)
+            .filter(
+                Booking.business_id == self.business_id,
+                Booking.date >= start,
+                Booking.date <= end,
+            )
+            .all()
+        )
+        masks = {}
+        for day, start_time in rows:
+            template = self.template_for(day)
+            if template is None or start_time is None:
+                continue
+            i = template.index(start_time)
+            if i is not None:
+                masks[day] = masks.get(day, 0) | (1 << i)
+        return masks
+
+    # --- Operaciones de bits ---
+
+    def template_for(self, day: date_type):
+        """Plantilla del día, o None si el negocio está cerrado (sin horario o festivo)."""
+        if self.calendar is not None:
+            if day in self.calendar.overrides:
+                hours = self.calendar.overrides[day]
+                return compile_template(*hours) if hours else None
+            if self.calendar.is_holiday(day):
+                return None
+        if self.is_holiday(day):
+            return None
+        return self.templates.get(day.weekday())
+
+    def free_mask(self, day: date_type, booked: int = 0) -> int:
+        template = self.template_for(day)
+        if template is None:
+            return 0
+        return template.mask & ~booked
+
+    def free_slots(self, day: date_type, booked: int = 0):
+        template = self.template_for(day)
+        if template is None:
+            return []
+        return template.slots(template.mask & ~booked)
+
+    def is_free(self, day: date_type, t: time, booked: int = 0) -> bool:
+        template = self.template_for(day)
+        if template is None:
+            return False
+        i = template.index(t)
+        return i is not None and bool((template.mask & ~booked) >> i & 1)
+
+    def free_masks(self, start: date_type, end: date_type, booked_masks: dict) -> dict:
+        """
+        Bitset de huecos libres para cada día de [start, end] (0 = cerrado o completo).
+        """
+        out = {}
+        day = start
+        while day <= end:
+            out[day] = self.free_mask(day, booked_masks.get(day, 0))
+            day += timedelta(days=1)
+        return out
+
+    def next_free_slot(self, start: date_type, booked_masks: dict, not_before: time = None, horizon_days: int = 365):
+        """
+        Primer hueco libre a partir de start (y de la hora not_before ese día).
+        Devuelve (fecha, hora) o None si no hay nada en el horizonte.
+        """
+        day = start
+        for _ in range(horizon_days):
+            template = self.template_for(day)
+            if template is not None:
+                free = template.mask & ~booked_masks.get(day, 0)
+                if day == start and not_before is not None:
+                    # Descartar los huecos que empiezan antes de not_before
+                    skip = -(-(_minutes(not_before) - template.open_minute) // SLOT_MINUTES)
+                    if skip > 0:
+                        free &= ~((1 << skip) - 1)
+                if free:
+                    low = free & -free
+                    return day, template.slot_time(low.bit_length() - 1)
+            day += timedelta(days=1)
+        return None
@@ -1,18 +1,74 @@
+from sqlalchemy.exc import IntegrityError
+
 from app.models.booking import Booking
-from app.database import SessionLocal
-from datetime import timedelta
+from app.services.availability_cache import invalidate_availability
+from app.services.email_outbox import enqueue_booking_emails, wake_outbox
+
+
+class SlotTakenError(Exception):
+    """El hueco ya está reservado (violación del índice único de bookings)."""
+
+
+def _insert(db):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Booking)
+
 
 def create_booking(db, booking_data):
-    end_time = (datetime.combine(datetime.today(), booking_data.start_time) + timedelta(hours=1)).time()
-    booking = Booking(
+    """
+    Inserta la reserva en una sola sentencia: si el hueco ya está ocupado
+    el índice único lo rechaza (ON CONFLICT DO NOTHING) y se lanza SlotTakenError,
+    sin un SELECT previo que pueda quedar obsoleto entre la comprobación y el insert.
+    Los correos de confirmación se encolan en la misma transacción.
+    """
+    stmt = (
+        _insert(db)
+        .values(
+            business_id=booking_data.business_id,
+            date=booking_data.date,
+            start_time=booking_data.start_time,
+            customer_name=booking_data.customer_name,
+            customer_email=booking_data.customer_email,
+            status="confirmed",
+        )
+        .on_conflict_do_nothing(index_elements=["business_id", "date", "start_time"])
+        .returning(Booking.id)
+    )
+    try:
+        booking_id = db.execute(stmt).scalar()
+        if booking_id is None:
+            db.rollback()
+            # La caché daba el hueco por libre: ya está ocupado
+            invalidate_availability(booking_data.business_id, booking_data.date)
+            raise SlotTakenError(f"{booking_data.date} {booking_data.start_time} ya está reservado")
+        # Los correos van en la misma transacción que la reserva: o se guardan ambos o ninguno
+        queued = enqueue_booking_emails(db, {
+            "date": str(booking_data.date),
+            "time": booking_data.start_time.strftime("%H:%M"),
+            "customer_name": booking_data.customer_name,
+            "customer_email": booking_data.customer_email,
+        })
+        db.commit()
+    except IntegrityError as e:
+        # Bases de datos sin ON CONFLICT: la restricción salta igualmente
+        db.rollback()
+        invalidate_availability(booking_data.business_id, booking_data.date)
+        raise SlotTakenError(str(e.orig)) from e
+
+    # Solo con la reserva ya confirmada: antes del commit otra lectura volvería a cachear el hueco libre
+    invalidate_availability(booking_data.business_id, booking_data.date)
+    if queued:
+        wake_outbox()
+
+    return Booking(
+        id=booking_id,
         business_id=booking_data.business_id,
         date=booking_data.date,
         start_time=booking_data.start_time,
-        end_time=end_time,
         customer_name=booking_data.customer_name,
-        customer_email=booking_data.customer_email
+        customer_email=booking_data.customer_email,
+        status="confirmed",
     )
-    db.add(booking)
-    db.commit()
-    db.refresh(booking)
-    return booking
@@ -0,0 +1,170 @@
+# backend/app/services/bookings_client.py
+
+import os
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from app.services.http_client import get_http_client
+from app.services.single_flight import AsyncSingleFlight
+from app.services.timing import stage
+from app.services.ttl_cache import TTLCache
+
+# Segundos que se reutilizan las reservas de un día leídas del backend Node (0 = sin caché).
+# Otra conversación puede reservar entretanto: el POST final es el que manda (409 si está ocupado).
+BOOKINGS_CACHE_TTL = float(os.getenv("BOOKINGS_CACHE_TTL", "10"))
+BOOKINGS_CACHE_MAX_ENTRIES = int(os.getenv("BOOKINGS_CACHE_MAX_ENTRIES", "2048"))
+
+# Consultas ya hechas (o en curso) dentro del turno de chat actual
+_turn = contextvars.ContextVar("bookings_turn", default=None)
+
+
+class BookingsClient:
+    """
+    Cliente del API /bookings del backend Node.
+
+    - Conexiones keep-alive y tiempos de espera del pool compartido (http_client).
+    - Caché TTL de las horas reservadas por (business_id, fecha); el POST de
+      una reserva invalida su día.
+    - Dentro de un turno de chat (bookings_turn) cada día se consulta una sola
+      vez, aunque lo pidan a la vez el prefetch y el flujo de reserva.
+    - Entre conversaciones, las consultas simultáneas del mismo día comparten
+      una sola petición en curso (single-flight).
+    """
+
+    def __init__(self, base_url=None, ttl=BOOKINGS_CACHE_TTL, maxsize=BOOKINGS_CACHE_MAX_ENTRIES):
+        # La URL se lee al crear el cliente: llm_agent carga antes .env.local
+        self.base_url = base_url or os.getenv("PROJECT_BACKEND_URL", "http://localhost:3001/api")
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl) if ttl > 0 else None
+        self.flight = AsyncSingleFlight()
+        self._lock = threading.Lock()
+        self._version = 0
+        self.stats_counters = {"requests": 0, "posts": 0, "cache_hits": 0, "turn_hits": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(business_id, date_obj):
+        return (str(business_id), str(date_obj))
+
+    def _count(self, name):
+        with self._lock:
+            self.stats_counters[name] += 1
+
+    @staticmethod
+    def _booked_from(resp):
+        # Supabase devuelve HH:MM:SS, nos quedamos con HH:MM
+        resp.raise_for_status()
+        return frozenset(b["start_time"][:5] for b in resp.json())
+
+    def _cached(self, key):
+        if self.cache is None:
+            return None
+        booked = self.cache.get(key)
+        if booked is not None:
+            self._count("cache_hits")
+        return booked
+
+    def _remember(self, key, booked, version):
+        # Si se ha reservado algo mientras tanto, la respuesta puede no incluirlo
+        with self._lock:
+            if self.cache is not None and version == self._version:
+                self.cache.set(key, booked)
+
+    async def _fetch(self, key):
+        booked = self._cached(key)
+        if booked is not None:
+            return booked
+        return await self.flight.do(key, lambda: self._request(key))
+
+    async def _request(self, key):
+        self._count("requests")
+        version = self._version
+        with stage("backend"):
+            resp = await get_http_client().get(
+                f"{self.base_url}/bookings", params={"business_id": key[0], "date": key[1]}
+            )
+        booked = self._booked_from(resp)
+        self._remember(key, booked, version)
+        return booked
+
+    async def booked_times(self, business_id, date_obj) -> frozenset:
+        """Horas ("HH:MM") ya reservadas ese día. Lanza excepción si el backend falla."""
+        key = self.key(business_id, date_obj)
+        turn = _turn.get()
+        if turn is None:
+            return await self._fetch(key)
+
+        task = turn.get(key)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = asyncio.ensure_future(self._fetch(key))
+            turn[key] = task
+        else:
+            self._count("turn_hits")
+        # shield: si se cancela quien espera (un prefetch descartado) la consulta sigue para los demás
+        return await asyncio.shield(task)
+
+    async def create_booking(self, payload: dict):
+        """POST de la reserva. Devuelve la respuesta; el día queda invalidado en cualquier caso."""
+        try:
+            self._count("posts")
+            with stage("backend"):
+                return await get_http_client().post(f"{self.base_url}/bookings", json=payload)
+        finally:
+            self.invalidate(payload["business_id"], payload["date"])
+
+    def invalidate(self, business_id, date_obj):
+        """Olvida las reservas cacheadas de ese día (también las del turno en curso)."""
+        key = self.key(business_id, date_obj)
+        with self._lock:
+            self._version += 1
+            self.stats_counters["invalidations"] += 1
+            if self.cache is not None:
+                self.cache.pop(key, None)
+        turn = _turn.get()
+        if turn is not None:
+            turn.pop(key, None)
+
+    def clear(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.stats_counters)
+        counters["flight_shared"] = self.flight.shared
+        lookups = counters["requests"] + counters["cache_hits"] + counters["turn_hits"] + counters["flight_shared"]
+        counters["saved_share"] = 1 - counters["requests"] / lookups if lookups else 0.0
+        return counters
+
+
+@contextmanager
+def bookings_turn():
+    """Ámbito de un turno de chat: cada día se consulta al backend como mucho una vez."""
+    tasks = {}
+    token = _turn.set(tasks)
+    try:
+        yield
+    finally:
+        try:
+            _turn.reset(token)
+        except ValueError:
+            # Generador de streaming cerrado desde otro contexto (cliente desconectado)
+            _turn.set(None)
+        # Consultas que nadie llegó a esperar (prefetch descartado)
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_bookings_client() -> BookingsClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BookingsClient()
+        return _client
@@ -0,0 +1,321 @@
+# backend/app/services/business_calendar.py
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from array import array
+from datetime import date as date_type, time as time_type, timedelta
+
+from app.database import SessionLocal
+from app.models.holiday import Holiday
+from app.models.schedule import WeeklySchedule, ScheduleOverride
+from app.services.availability import is_holiday as is_national_holiday
+from app.services.availability_cache import invalidate_availability, on_remote_calendar_change
+
+logger = logging.getLogger(__name__)
+
+# Días precalculados a partir de hoy
+CALENDAR_HORIZON_DAYS = int(os.getenv("CALENDAR_HORIZON_DAYS", "400"))
+# Segundos tras los que el índice se recarga de la BD (cambios hechos desde otro proceso)
+CALENDAR_REFRESH_SECONDS = float(os.getenv("CALENDAR_REFRESH_SECONDS", "300"))
+
+# Horario por defecto si el negocio no tiene WeeklySchedule: Lunes a Sábado, 9:00-20:00
+DEFAULT_WEEKLY_HOURS = {weekday: (time_type(9, 0), time_type(20, 0)) for weekday in range(6)}
+
+
+class BusinessCalendar:
+    """
+    Índice de apertura de un negocio para un horizonte móvil de días.
+
+    Compila horario semanal, festivos y excepciones por fecha en tablas
+    precalculadas, así is_open/is_holiday/next_open_day son consultas O(1)
+    sin tocar la base de datos. Los cambios se aplican de forma incremental.
+    """
+
+    def __init__(self, business_id, weekly_hours, holidays=(), overrides=None, start=None, horizon=CALENDAR_HORIZON_DAYS):
+        self.business_id = business_id
+        self.weekly_hours = dict(weekly_hours)      # weekday -> (open, close)
+        self.holidays = set(holidays)               # festivos propios del negocio
+        self.overrides = dict(overrides or {})      # fecha -> (open, close) o None si cierra
+        self.horizon = horizon
+        self.loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._build(start or date_type.today())
+
+    # --- Consultas O(1) ---
+
+    def is_holiday(self, day: date_type) -> bool:
+        return day in self.holidays or is_national_holiday(day)
+
+    def is_open(self, day: date_type) -> bool:
+        offset = self._offset(day)
+        if offset is None:
+            return self._compute_hours(day) is not None
+        return bool(self._open[offset])
+
+    def hours(self, day: date_type):
+        """(apertura, cierre) del día o None si está cerrado."""
+        return self._compute_hours(day)
+
+    def next_open_day(self, day: date_type):
+        """
+        Siguiente día abierto estrictamente posterior a day (None si no hay ninguno en el horizonte).
+        """
+        offset = self._offset(day)
+        if offset is not None and offset + 1 < self.horizon:
+            nxt = self._next_open[offset + 1]
+            return self.start + timedelta(days=nxt) if nxt >= 0 else None
+
+        # Fuera del horizonte precalculado: se evalúan las reglas en memoria
+        candidate = day
+        for _ in range(self.horizon):
+            candidate += timedelta(days=1)
+            if self._compute_hours(candidate) is not None:
+                return candidate
+        return None
+
+    # --- Actualizaciones incrementales ---
+
+    def set_weekday_hours(self, weekday: int, hours):
+        """Cambia (o elimina con None) el horario de un día de la semana."""
+        with self._lock:
+            if hours is None:
+                self.weekly_hours.pop(weekday, None)
+            else:
+                self.weekly_hours[weekday] = hours
+            first = (weekday - self.start.weekday()) % 7
+            for offset in range(first, self.horizon, 7):
+                self._open[offset] = self._compute_hours(self.start + timedelta(days=offset)) is not None
+            self._relink(self.horizon - 1, full=True)
+
+    def set_date(self, day: date_type, holiday: bool = None, override=False, hours=None):
+        """
+        Actualiza un día concreto: holiday=True/False marca/desmarca festivo;
+        override=True fija su horario (hours=None para cerrarlo), override=None lo elimina.
+        """
+        with self._lock:
+            if holiday is True:
+                self.holidays.add(day)
+            elif holiday is False:
+                self.holidays.discard(day)
+            if override is True:
+                self.overrides[day] = hours
+            elif override is None:
+                self.overrides.pop(day, None)
+
+            offset = self._offset(day)
+            if offset is not None:
+                self._open[offset] = self._compute_hours(day) is not None
+                self._relink(offset)
+
+    def roll(self, today: date_type = None):
+        """Mueve el horizonte para que empiece hoy (sin consultar la BD)."""
+        today = today or date_type.today()
+        if today != self.start:
+            with self._lock:
+                self._build(today)
+
+    # --- Internos ---
+
+    def _compute_hours(self, day):
+        if day in self.overrides:
+            return self.overrides[day]
+        if self.is_holiday(day):
+            return None
+        return self.weekly_hours.get(day.weekday())
+
+    def _offset(self, day):
+        offset = (day - self.start).days
+        return offset if 0 <= offset < self.horizon else None
+
+    def _build(self, start):
+        self.start = start
+        self._open = bytearray(
+            self._compute_hours(start + timedelta(days=i)) is not None for i in range(self.horizon)
+        )
+        self._next_open = array("i", [-1]) * self.horizon
+        self._relink(self.horizon - 1, full=True)
+
+    def _relink(self, offset, full=False):
+        # next_open[i] = primer día abierto >= i. Un cambio en un solo día solo afecta
+        # hacia atrás hasta el día abierto anterior, donde la cadena se estabiliza.
+        nxt = self._next_open[offset + 1] if offset + 1 < self.horizon else -1
+        for i in range(offset, -1, -1):
+            value = i if self._open[i] else nxt
+            if not full and i < offset and self._open[i] and self._next_open[i] == i:
+                break
+            self._next_open[i] = value
+            nxt = value
+
+
+def load_calendar(db, business_id: str, start: date_type = None) -> BusinessCalendar:
+    """
+    Compila el calendario de un negocio desde la BD (tres consultas).
+    """
+    today = start or date_type.today()
+    end = today + timedelta(days=CALENDAR_HORIZON_DAYS)
+
+    weekly = {}
+    for weekday, open_time, close_time in (
+        db.query(WeeklySchedule.weekday, WeeklySchedule.open_time, WeeklySchedule.close_time)
+        .filter(WeeklySchedule.business_id == business_id)
+        .all()
+    ):
+        weekly.setdefault(weekday, (open_time, close_time))
+
+    holidays = {
+        d for (d,) in db.query(Holiday.date).filter(
+            (Holiday.business_id == business_id) | (Holiday.business_id.is_(None))
+        ).all()
+    }
+
+    overrides = {}
+    for day, closed, open_time, close_time in (
+        db.query(ScheduleOverride.date, ScheduleOverride.closed, ScheduleOverride.open_time, ScheduleOverride.close_time)
+        .filter(ScheduleOverride.business_id == business_id, ScheduleOverride.date >= today, ScheduleOverride.date <= end)
+        .all()
+    ):
+        overrides[day] = None if closed or not open_time else (open_time, close_time)
+
+    return BusinessCalendar(business_id, weekly or DEFAULT_WEEKLY_HOURS, holidays, overrides, start=today)
+
+
+_CALENDARS = {}
+_CALENDARS_LOCK = threading.Lock()
+
+
+def _is_fresh(calendar) -> bool:
+    return calendar is not None and time.monotonic() - calendar.loaded_at < CALENDAR_REFRESH_SECONDS
+
+
+def _load_or_default(business_id: str, db=None) -> BusinessCalendar:
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        return load_calendar(db, business_id)
+    except Exception as e:
+        logger.warning("No se pudo cargar el calendario de %s: %s", business_id, e)
+        if not own_session:
+            # Que la sesión del llamador no quede con la transacción abortada
+            db.rollback()
+        return BusinessCalendar(business_id, DEFAULT_WEEKLY_HOURS)
+    finally:
+        if own_session:
+            db.close()
+
+
+def get_calendar(business_id: str, db=None) -> BusinessCalendar:
+    """
+    Calendario precalculado del negocio. Solo consulta la BD la primera vez
+    (o cuando ha pasado CALENDAR_REFRESH_SECONDS), con la sesión del llamador
+    si la pasa; si la BD no está disponible se usa el horario por defecto.
+    Es síncrona: desde el event loop usar get_calendar_async.
+    """
+    calendar = _CALENDARS.get(business_id)
+    if _is_fresh(calendar):
+        calendar.roll()
+        return calendar
+
+    with _CALENDARS_LOCK:
+        calendar = _CALENDARS.get(business_id)
+        if not _is_fresh(calendar):
+            calendar = _load_or_default(business_id, db)
+            _CALENDARS[business_id] = calendar
+    return calendar
+
+
+async def get_calendar_async(business_id: str) -> BusinessCalendar:
+    """
+    get_calendar para el event loop: si hay que cargar el calendario de la BD
+    o recalcular el índice (cambio de día) se hace en un hilo.
+    """
+    calendar = _CALENDARS.get(business_id)
+    if _is_fresh(calendar) and calendar.start == date_type.today():
+        return calendar
+    return await asyncio.to_thread(get_calendar, business_id)
+
+
+def warm_calendars() -> int:
+    """
+    Carga los calendarios de los negocios con horario semanal (al arrancar,
+    para que el primer turno de chat no los construya). Devuelve cuántos.
+    """
+    db = SessionLocal()
+    try:
+        business_ids = [b for (b,) in db.query(WeeklySchedule.business_id).distinct().all() if b]
+        for business_id in business_ids:
+            calendar = _load_or_default(business_id, db)
+            with _CALENDARS_LOCK:
+                _CALENDARS[business_id] = calendar
+        return len(business_ids)
+    except Exception as e:
+        logger.warning("No se pudieron precargar los calendarios: %s", e)
+        return 0
+    finally:
+        db.close()
+
+
+def on_weekly_schedule_changed(business_id: str, weekday: int, db):
+    """
+    Avisar tras modificar el WeeklySchedule de un día de la semana:
+    solo se recalculan los días afectados.
+    """
+    invalidate_availability(business_id, calendar=True)
+    calendar = _CALENDARS.get(business_id)
+    if calendar is None:
+        return
+    row = (
+        db.query(WeeklySchedule.open_time, WeeklySchedule.close_time)
+        .filter(WeeklySchedule.business_id == business_id, WeeklySchedule.weekday == weekday)
+        .first()
+    )
+    calendar.set_weekday_hours(weekday, tuple(row) if row else None)
+
+
+def on_date_changed(business_id: str, day: date_type, db):
+    """
+    Avisar tras crear/borrar un festivo o una excepción de horario para una fecha.
+    """
+    # Los festivos globales (business_id None) afectan a todos los negocios
+    invalidate_availability(business_id, day if business_id is not None else None, calendar=True)
+    for calendar_id in list(_CALENDARS) if business_id is None else [business_id]:
+        _refresh_date(calendar_id, day, db)
+
+
+def _refresh_date(business_id: str, day: date_type, db):
+    calendar = _CALENDARS.get(business_id)
+    if calendar is None:
+        return
+    holiday = db.query(Holiday.id).filter(
+        Holiday.date == day,
+        (Holiday.business_id == business_id) | (Holiday.business_id.is_(None))
+    ).first() is not None
+    override = (
+        db.query(ScheduleOverride.closed, ScheduleOverride.open_time, ScheduleOverride.close_time)
+        .filter(ScheduleOverride.business_id == business_id, ScheduleOverride.date == day)
+        .first()
+    )
+    if override is None:
+        calendar.set_date(day, holiday=holiday, override=None)
+    else:
+        closed, open_time, close_time = override
+        calendar.set_date(day, holiday=holiday, override=True,
+                          hours=None if closed or not open_time else (open_time, close_time))
+
+
+def invalidate_calendar(business_id: str = None):
+    """Fuerza la recarga completa desde la BD en el próximo uso."""
+    invalidate_availability(business_id, calendar=True)
+    _drop_calendar(business_id)
+
+
+@on_remote_calendar_change
+def _drop_calendar(business_id: str = None):
+    with _CALENDARS_LOCK:
+        if business_id is None:
+            _CALENDARS.clear()
+        else:
+            _CALENDARS.pop(business_id, None)
@@ -0,0 +1,207 @@
+# backend/app/services/date_parser.py
+
+import re
+import unicodedata
+from datetime import date as date_type, time as time_type, timedelta
+
+MONTHS = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+WEEKDAYS = {
+    "lunes": 0, "martes": 1, "miercoles": 2, "jueves": 3, "viernes": 4, "sabado": 5, "domingo": 6,
+}
+HOUR_WORDS = {
+    "una": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6, "siete": 7,
+    "ocho": 8, "nueve": 9, "diez": 10, "once": 11, "doce": 12,
+}
+
+# Palabras que no cambian el significado de una consulta de disponibilidad.
+# Si queda alguna palabra fuera de esta lista, el mensaje dice algo más y lo interpreta el LLM.
+FILLER_WORDS = frozenset("""
+    hola buenas buenos hey ey holi vale ok okey perfecto genial gracias porfa favor por
+    tienes teneis tiene tienen tendrias tendrais tendria hay habria queda quedan quedaria
+    hueco huecos disponibilidad disponible disponibles libre libres sitio cita citas hora horas
+    estas estais esta estan abierto abiertos abris abres atendeis
+    puedo podria podrias podemos podriamos puede pueden dar das darme ir pasar pasarme pasarnos quedar vernos verte veros
+    quiero queria querria quisiera reservar reserva pedir coger
+    y o que para el la los las lo de del a al en un una algo alguna alguno me te nos se mi
+    entonces pues bueno tambien vez dia
+""".split())
+# Negaciones y preferencias ("no", "mejor", "otro") no son relleno: "el sábado no" o
+# "mejor otro día" cambian el sentido de la fecha y el turno tiene que ir al LLM
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin tildes (la ñ pasa a n) y sin signos de puntuación sueltos."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    # Se conservan : / - . entre dígitos (10:30, 10/05, 2025-05-10, 17.30)
+    text = re.sub(r"(?<!\d)[:/.\-]|[:/.\-](?!\d)", " ", text)
+    text = re.sub(r"[^\w:/.\-]+", " ", text)
+    return " ".join(text.split())
+
+
+class ParsedDateTime:
+    """
+    Resultado del análisis: fecha y hora encontradas y las palabras que no se
+    han reconocido. confident indica que el mensaje es solo fecha/hora
+    (más palabras de relleno) y se puede responder sin el LLM.
+    """
+    __slots__ = ("date", "time", "leftover", "ambiguous")
+
+    def __init__(self):
+        self.date = None
+        self.time = None
+        self.leftover = []
+        self.ambiguous = False
+
+    @property
+    def confident(self) -> bool:
+        return not self.ambiguous and not self.leftover and (self.date is not None or self.time is not None)
+
+    def __repr__(self):
+        return f"ParsedDateTime(date={self.date}, time={self.time}, leftover={self.leftover}, ambiguous={self.ambiguous})"
+
+
+_MONTH_RE = "|".join(MONTHS)
+_WEEKDAY_RE = "|".join(WEEKDAYS)
+_HOUR_RE = r"\d{1,2}|" + "|".join(HOUR_WORDS)
+
+_PATTERNS = [
+    ("iso", re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")),
+    ("day_month", re.compile(
+        rf"\b(?:el\s+)?(?:dia\s+)?(\d{{1,2}})\s+de\s+({_MONTH_RE})(?:\s+(?:de|del)\s+(\d{{4}}))?\b"
+    )),
+    ("numeric", re.compile(r"\b(?:el\s+)?(?:dia\s+)?(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2}|\d{4}))?\b")),
+    ("time", re.compile(
+        rf"\b(?:(a|sobre|hacia|para|desde)\s+)?(las?\s+)?({_HOUR_RE})(?:\s*[:.h]\s*(\d{{2}}))?"
+        r"(\s*(?:h|hrs|horas)\b)?(?:\s+y\s+(media|cuarto))?"
+        r"(?:\s+(?:de\s+la\s+(manana|tarde|noche)|del\s+(mediodia)|en\s+punto))?"
+        r"(?=\s|$)"
+    )),
+    ("midday", re.compile(r"\b(?:a\s+|al\s+)?mediodia\b")),
+    ("period", re.compile(r"\b(?:por|a)\s+la\s+(?:manana|tarde)\b")),
+    ("today", re.compile(r"\b(?:hoy(?:\s+mismo)?|esta\s+(?:tarde|manana))\b")),
+    ("day_after", re.compile(r"\bpasado\s+manana\b")),
+    ("tomorrow", re.compile(r"\bmanana\b")),
+    ("weekday", re.compile(
+        rf"\b(?:el\s+)?(?:(proximo|este|esta)\s+)?({_WEEKDAY_RE})(?:\s+(que\s+viene|proximo))?\b"
+    )),
+    ("day_only", re.compile(r"\b(?:el\s+)?dia\s+(\d{1,2})\b")),
+]
+
+
+def _future_date(today, month, day, year=None):
+    """Fecha válida más próxima en el futuro si no se indica el año."""
+    try:
+        if year is not None:
+            return date_type(year if year > 99 else 2000 + year, month, day)
+        candidate = date_type(today.year, month, day)
+        if candidate < today:
+            candidate = date_type(today.year + 1, month, day)
+        return candidate
+    except ValueError:
+        return None
+
+
+def _is_explicit_time(match) -> bool:
+    """
+    Un número suelto no es una hora ("el 10", "2 personas"): hace falta "a las",
+    minutos, "h" o la franja del día. Las horas en letra exigen "la/las" ("una cita" no es la una).
+    """
+    prep, article, hour, minute, suffix, fraction, period, midday = match.groups()
+    if not hour.isdigit():
+        return bool(article)
+    return bool(prep or article or minute or suffix or fraction or period or midday)
+
+
+def _time_from(match):
+    _, _, hour_str, minute_str, _, fraction, period, midday = match.groups()
+    hour = int(hour_str) if hour_str.isdigit() else HOUR_WORDS[hour_str]
+    minute = int(minute_str) if minute_str else 0
+    if fraction == "media":
+        minute = 30
+    elif fraction == "cuarto":
+        minute = 15
+
+    if period in ("tarde", "noche") and hour < 12:
+        hour += 12
+    elif midday and hour < 5:
+        hour += 12
+    elif period is None and not midday and 1 <= hour <= 8:
+        # Sin indicar la franja, "a las 5" dentro del horario comercial (9-20) es por la tarde
+        hour += 12
+
+    if hour > 23 or minute > 59:
+        return None
+    return time_type(hour, minute)
+
+
+def parse_datetime(text: str, today: date_type = None) -> ParsedDateTime:
+    """
+    Extrae fecha y hora de un mensaje en español:
+    hoy, mañana, pasado mañana, (el próximo / este) sábado, el 10 de mayo (de 2026),
+    10/05, 2026-05-10, el día 10, a las 17, a las 5 de la tarde, 17:30, a las 12 y media...
+    """
+    today = today or date_type.today()
+    result = ParsedDateTime()
+    text = normalize(text)
+    dates, times = [], []
+
+    for kind, pattern in _PATTERNS:
+        def consume(match):
+            if kind == "time" and not _is_explicit_time(match):
+                return match.group(0)
+            value = _interpret(kind, match, today)
+            if kind in ("time", "midday"):
+                times.append(value)
+            elif kind != "period":
+                dates.append(value)
+            return " "
+        text = pattern.sub(consume, text)
+
+    result.leftover = [w for w in text.split() if w not in FILLER_WORDS]
+    if None in dates or None in times or len(set(dates)) > 1 or len(set(times)) > 1:
+        result.ambiguous = True
+    result.date = dates[0] if dates and not result.ambiguous else None
+    result.time = times[0] if times and not result.ambiguous else None
+    return result
+
+
+def _interpret(kind, match, today):
+    if kind == "iso":
+        year, month, day = (int(g) for g in match.groups())
+        return _future_date(today, month, day, year)
+    if kind == "day_month":
+        day, month, year = match.groups()
+        return _future_date(today, MONTHS[month], int(day), int(year) if year else None)
+    if kind == "numeric":
+        day, month, year = match.groups()
+        return _future_date(today, int(month), int(day), int(year) if year else None)
+    if kind == "time":
+        return _time_from(match)
+    if kind == "midday":
+        return time_type(12, 0)
+    if kind == "day_after":
+        return today + timedelta(days=2)
+    if kind == "tomorrow":
+        return today + timedelta(days=1)
+    if kind == "today":
+        return today
+    if kind == "weekday":
+        qualifier, name, _ = match.groups()
+        ahead = (WEEKDAYS[name] - today.weekday()) % 7
+        if ahead == 0 and qualifier not in ("este", "esta"):
+            ahead = 7
+        return today + timedelta(days=ahead)
+    if kind == "day_only":
+        day = int(match.group(1))
+        month, year = today.month, today.year
+        if day < today.day:
+            month, year = (1, year + 1) if month == 12 else (month + 1, year)
+        try:
+            return date_type(year, month, day)
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,383 @@
+# backend/app/services/email_outbox.py
+
+import os
+import time
+import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services.timing import stage
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se revisa la bandeja de salida si nadie avisa (segundos) y correos por vuelta
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_BATCH = int(os.getenv("OUTBOX_BATCH", "50"))
+# Reintentos con espera exponencial: 30s, 1min, 2min... hasta OUTBOX_BACKOFF_MAX
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "30"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "3600"))
+# Si un worker muere con un correo en "sending", otro lo recoge pasado este tiempo
+OUTBOX_LEASE_SECONDS = 300
+# La conexión SMTP se reutiliza entre correos y se cierra tras este tiempo sin uso
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+
+def smtp_settings() -> dict:
+    """Configuración SMTP desde el entorno (.env)."""
+    user = os.getenv("SMTP_USER")
+    return {
+        "server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        "port": int(os.getenv("SMTP_PORT", "587")),
+        "user": user,
+        "password": os.getenv("SMTP_PASSWORD"),
+        "starttls": os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+        "sender": os.getenv("SMTP_FROM", user),
+    }
+
+
+def email_enabled() -> bool:
+    s = smtp_settings()
+    return bool(s["user"] and s["password"])
+
+
+# --- Plantillas ---
+
+def confirmation_email(customer_name, date_str, time_str):
+    subject = "Confirmación de Cita - Estudio de Fotografía"
+    body = f"""
+    Hola {customer_name},
+
+    Tu cita ha sido confirmada correctamente.
+
+    📅 Fecha: {date_str}
+    ⏰ Hora: {time_str}
+
+    ¡Gracias por confiar en nosotros!
+    """
+    return subject, body
+
+
+def admin_notification(booking: dict):
+    subject = f"🔔 Nueva Reserva: {booking.get('date')} a las {booking.get('time')}"
+    body = f"""
+    ¡Hola! Tenéis una nueva cita confirmada.
+
+    👤 Cliente: {booking.get('customer_name', 'N/A')}
+    📧 Email: {booking.get('customer_email', 'N/A')}
+    📞 Teléfono: {booking.get('customer_phone', 'N/A')}
+
+    📅 Fecha: {booking.get('date')}
+    ⏰ Hora: {booking.get('time')}
+
+    📝 Detalles:
+    {booking.get('event_details', 'Sin detalles adicionales')}
+    """
+    return subject, body
+
+
+def admin_recipients():
+    # Emails de los socios separados por comas; si no hay, el mismo email de envío
+    admin_emails_str = os.getenv("ADMIN_EMAILS", smtp_settings()["sender"] or "")
+    return [e.strip() for e in admin_emails_str.split(",") if e.strip()]
+
+
+# --- Encolado ---
+
+def enqueue_email(db, to_email, subject, body, now=None):
+    """Añade un correo a la bandeja de salida (sin commit: va en la transacción del llamante)."""
+    now = now or datetime.now()
+    db.add(EmailOutbox(
+        to_email=to_email, subject=subject, body=body,
+        status="pending", attempts=0, next_attempt_at=now, created_at=now
+    ))
+
+
+def enqueue_booking_emails(db, booking: dict) -> int:
+    """
+    Encola la confirmación al cliente y el aviso a los socios de una reserva
+    (claves: date, time, customer_name, customer_email, customer_phone, event_details).
+    """
+    if not email_enabled():
+        logger.warning("Credenciales SMTP no configuradas. No se encolan correos de la reserva.")
+        return 0
+
+    count = 0
+    if booking.get("customer_email"):
+        subject, body = confirmation_email(booking.get("customer_name", "Cliente"), booking["date"], booking["time"])
+        enqueue_email(db, booking["customer_email"], subject, body)
+        count += 1
+
+    subject, body = admin_notification(booking)
+    for email in admin_recipients():
+        enqueue_email(db, email, subject, body)
+        count += 1
+    return count
+
+
+def queue_booking_emails(booking: dict) -> int:
+    """
+    Encola los correos de una reserva guardada en otro sistema (Backend Node)
+    en una transacción propia y avisa al worker. No espera al servidor de correo.
+    """
+    db = SessionLocal()
+    try:
+        count = enqueue_booking_emails(db, booking)
+        db.commit()
+    except Exception as e:
+        # La reserva ya está hecha: un fallo aquí no debe deshacer la confirmación
+        logger.error("Error encolando correos de la reserva: %s", e)
+        return 0
+    finally:
+        db.close()
+    if count:
+        wake_outbox()
+    return count
+
+
+# --- Envío ---
+
+class SmtpConnection:
+    """
+    Conexión SMTP persistente: STARTTLS y login una sola vez, y se reutiliza
+    para todos los correos. Si el servidor la ha cerrado se reconecta.
+    """
+
+    def __init__(self, settings=None, idle_timeout=SMTP_IDLE_SECONDS, timeout=SMTP_TIMEOUT, clock=time.monotonic):
+        self.settings = settings or smtp_settings()
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.clock = clock
+        self._smtp = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def send(self, to_email, subject, body):
+        msg = MIMEMultipart()
+        msg["From"] = self.settings["sender"]
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "plain"))
+
+        for attempt in range(2):
+            with stage("smtp"):
+                smtp = self._connection()
+                try:
+                    smtp.sendmail(self.settings["sender"], [to_email], msg.as_string())
+                    self._last_used = self.clock()
+                    return
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # Conexión caducada en el servidor: se reabre una vez
+                    self.close()
+                    if attempt:
+                        raise
+
+    def close_if_idle(self):
+        if self._smtp is not None and self.clock() - self._last_used > self.idle_timeout:
+            self.close()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _connection(self):
+        self.close_if_idle()
+        if self._smtp is None:
+            s = self.settings
+            smtp = smtplib.SMTP(s["server"], s["port"], timeout=self.timeout)
+            try:
+                if s["starttls"]:
+                    smtp.starttls()
+                if s["user"] and s["password"]:
+                    smtp.login(s["user"], s["password"])
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self._last_used = self.clock()
+            self.connects += 1
+        return self._smtp
+
+
+class OutboxWorker:
+    """
+    Vacía la bandeja de salida en segundo plano por una conexión SMTP reutilizada.
+
+    Cada correo se reclama con un UPDATE condicional antes de enviarlo, así que
+    con varios workers (o procesos) ninguno se envía dos veces. Los fallos se
+    reintentan con espera exponencial hasta OUTBOX_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, session_factory=SessionLocal, connection=None, poll_interval=OUTBOX_POLL_SECONDS,
+                 batch_size=OUTBOX_BATCH, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 backoff_base=OUTBOX_BACKOFF_BASE, backoff_max=OUTBOX_BACKOFF_MAX):
+        self.session_factory = session_factory
+        self.connection = connection or SmtpConnection()
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def drain_once(self, now=None) -> int:
+        """
+        Envía los correos pendientes cuyo próximo intento ya ha llegado.
+        Devuelve cuántos se han enviado.
+        """
+        now = now or datetime.now()
+        sent = 0
+        db = self.session_factory()
+        try:
+            due = [
+                outbox_id for (outbox_id,) in db.query(EmailOutbox.id)
+                .filter(EmailOutbox.status.in_(("pending", "sending")), EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .all()
+            ]
+            for outbox_id in due:
+                claimed = db.execute(
+                    update(EmailOutbox)
+                    .where(
+                        EmailOutbox.id == outbox_id,
+                        EmailOutbox.status.in_(("pending", "sending")),
+                        EmailOutbox.next_attempt_at <= now,
+                    )
+                    .values(status="sending", next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS))
+                ).rowcount
+                db.commit()
+                if not claimed:
+                    continue
+
+                row = db.get(EmailOutbox, outbox_id)
+                row.attempts += 1
+                try:
+                    self.connection.send(row.to_email, row.subject, row.body)
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Dirección rechazada: reintentar no sirve de nada
+                    self._give_up(row, e)
+                    db.commit()
+                    continue
+                except Exception as e:
+                    self._reschedule(row, e, now)
+                    db.commit()
+                    # Probablemente el servidor no está disponible: el resto espera a la próxima vuelta
+                    break
+
+                row.status = "sent"
+                row.sent_at = datetime.now()
+                row.last_error = None
+                db.commit()
+                sent += 1
+                self.sent += 1
+        finally:
+            db.close()
+
+        if sent:
+            logger.info("Correos enviados desde la bandeja de salida", extra={"sent": sent})
+        return sent
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.connection.close()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "smtp_connects": self.connection.connects,
+        }
+
+    def _reschedule(self, row, error, now):
+        row.last_error = str(error)
+        if row.attempts >= self.max_attempts:
+            self._give_up(row, error)
+            return
+        delay = min(self.backoff_base * 2 ** (row.attempts - 1), self.backoff_max)
+        row.status = "pending"
+        row.next_attempt_at = now + timedelta(seconds=delay)
+        self.retried += 1
+        logger.warning("Error enviando correo (intento %d), reintento en %.0fs: %s", row.attempts, delay, error,
+                       extra={"outbox_id": row.id})
+
+    def _give_up(self, row, error):
+        row.status = "failed"
+        row.last_error = str(error)
+        self.failed += 1
+        logger.error("Correo descartado tras %d intento(s): %s", row.attempts, error, extra={"outbox_id": row.id})
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.drain_once()
+            except Exception as e:
+                logger.exception("Error procesando la bandeja de salida: %s", e)
+            self.connection.close_if_idle()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+_WORKER = None
+
+
+def start_outbox_worker():
+    """Arranca el worker de correo (solo si hay configuración SMTP)."""
+    global _WORKER
+    if not email_enabled():
+        logger.warning("SMTP no configurado: el envío de correos está desactivado.")
+        return None
+    if _WORKER is None:
+        _WORKER = OutboxWorker()
+    _WORKER.start()
+    return _WORKER
+
+
+def stop_outbox_worker():
+    global _WORKER
+    if _WORKER is not None:
+        _WORKER.stop()
+        _WORKER = None
+
+
+def wake_outbox():
+    if _WORKER is not None:
+        _WORKER.wake()
+
+
+def outbox_stats() -> dict:
+    """Correos enviados, reintentados y descartados por el worker (None si no está en marcha)."""
+    return _WORKER.stats() if _WORKER is not None else None
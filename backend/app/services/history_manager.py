@@ -0,0 +1,98 @@
+# backend/app/services/history_manager.py
+
+import os
+import json
+
+from app.services.token_counter import count_tokens, count_message_tokens
+
+# Tokens máximos de los mensajes recientes que se reenvían al LLM en cada turno
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "300"))
+# Tokens máximos del resumen de la parte antigua de la conversación
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "120"))
+# Longitud máxima de cada mensaje dentro del resumen
+SUMMARY_LINE_CHARS = 120
+
+# Datos de la sesión que no van ya en el "Contexto actual" del prompt
+SESSION_FIELDS = {
+    "event_details": "Detalles del evento",
+    "customer_email": "Email",
+    "customer_phone": "Teléfono",
+    "event_date": "Fecha del evento",
+}
+
+
+def assistant_text(content: str) -> str:
+    """Texto del mensaje del asistente (las sesiones antiguas guardaban el JSON completo)."""
+    if content.startswith("{"):
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return content
+        if isinstance(data, dict) and data.get("message"):
+            return data["message"]
+    return content
+
+
+def _shorten(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= SUMMARY_LINE_CHARS else text[:SUMMARY_LINE_CHARS - 1] + "…"
+
+
+def record_turn(session: dict, user_message: str, reply: str):
+    """Añade el intercambio al historial (solo texto) y compacta lo que no cabe."""
+    history = session.get("history", [])
+    history.append({"role": "user", "content": user_message})
+    history.append({"role": "assistant", "content": reply})
+    session["history"] = history
+    compact(session)
+
+
+def compact(session: dict, budget: int = None, summary_budget: int = None):
+    """
+    Mientras los mensajes recientes pasen del presupuesto, el intercambio más
+    antiguo se pliega en el resumen. Siempre se conserva el último intercambio.
+    El resumen también tiene tope: se descartan sus líneas más antiguas (los
+    datos importantes ya están en los campos de la sesión).
+    """
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+    summary_budget = HISTORY_SUMMARY_TOKENS if summary_budget is None else summary_budget
+
+    history = [
+        {**m, "content": assistant_text(m["content"])} if m["role"] == "assistant" else m
+        for m in session.get("history", [])
+    ]
+    summary = list(session.get("history_summary") or [])
+
+    while len(history) > 2 and count_message_tokens(history) > budget:
+        oldest, history = history[:2], history[2:]
+        for m in oldest:
+            speaker = "Cliente" if m["role"] == "user" else "Asistente"
+            summary.append(f"{speaker}: {_shorten(m['content'])}")
+
+    while summary and count_tokens("\n".join(summary)) > summary_budget:
+        summary.pop(0)
+
+    session["history"] = history
+    if summary:
+        session["history_summary"] = summary
+    else:
+        session.pop("history_summary", None)
+
+
+def history_context(session: dict) -> str:
+    """Resumen de la conversación anterior y datos ya recogidos, para el prompt de sistema."""
+    parts = []
+    fields = [f"{label}={session[key]}" for key, label in SESSION_FIELDS.items() if session.get(key)]
+    if fields:
+        parts.append("Datos ya recogidos: " + ", ".join(fields))
+    if session.get("history_summary"):
+        parts.append("Resumen de la conversación anterior:\n" + "\n".join(session["history_summary"]))
+    return "\n" + "\n".join(parts) if parts else ""
+
+
+def history_messages(session: dict) -> list:
+    """Mensajes recientes a reenviar al LLM (el asistente solo con su texto)."""
+    return [
+        {"role": "assistant", "content": assistant_text(m["content"])} if m["role"] == "assistant" else m
+        for m in session.get("history", [])
+    ]
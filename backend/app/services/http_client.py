@@ -0,0 +1,57 @@
+# backend/app/services/http_client.py
+
+import os
+import asyncio
+from typing import Optional
+
+import httpx
+
+# Tiempos de espera (segundos). El LLM necesita bastante más margen que el backend Node.
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# Pool de conexiones: se reutilizan las conexiones keep-alive entre peticiones
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Devuelve el cliente HTTP asíncrono compartido por todo el proceso.
+    Se crea la primera vez que se usa y se mantiene vivo hasta el apagado.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+
+    # Las conexiones de httpx quedan ligadas a su event loop: si el loop cambia
+    # (scripts con varios asyncio.run) se crea un cliente nuevo.
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(HTTP_TIMEOUT), limits=_limits())
+        _client_loop = loop
+
+    return _client
+
+
+async def close_http_client():
+    """
+    Cierra el cliente compartido (se llama al apagar la aplicación).
+    """
+    global _client, _client_loop
+    # Un cliente creado en otro loop (ya cerrado) no se puede cerrar desde este: se descarta
+    if _client is not None and not _client.is_closed and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
@@ -0,0 +1,227 @@
+# backend/app/services/intent_router.py
+
+import os
+import re
+import json
+import math
+import time
+import threading
+from collections import Counter
+
+from app.services.date_parser import normalize
+from app.services.response_cache import BOOKING_STATE_KEYS
+
+# Modelos por nivel: el pequeño para turnos sencillos, el grande para el resto
+LLM_MODEL_LARGE = os.getenv("OLLAMA_MODEL", "gpt-oss:120b")
+LLM_MODEL_SMALL = os.getenv("OLLAMA_SMALL_MODEL", "gpt-oss:20b")
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+# Intenciones que puede atender el modelo pequeño y confianza mínima del clasificador
+ROUTER_SMALL_INTENTS = tuple(
+    i.strip() for i in os.getenv("ROUTER_SMALL_INTENTS", "smalltalk,faq").split(",") if i.strip()
+)
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.6"))
+# Mensajes más largos que esto (en palabras) se consideran complejos
+ROUTER_MAX_WORDS = int(os.getenv("ROUTER_MAX_WORDS", "20"))
+# Transcripciones etiquetadas adicionales (JSONL con "message" e "intent")
+ROUTER_TRAINING_FILE = os.getenv("ROUTER_TRAINING_FILE")
+
+# Ejemplos de entrenamiento: (mensaje, intención)
+TRAINING_EXAMPLES = [
+    ("Hola", "smalltalk"), ("Buenas", "smalltalk"), ("Buenos días", "smalltalk"),
+    ("Buenas noches", "smalltalk"), ("Hola, ¿qué tal?", "smalltalk"), ("Hey, buenas", "smalltalk"),
+    ("Gracias", "smalltalk"), ("Muchas gracias por todo", "smalltalk"), ("Vale, gracias", "smalltalk"),
+    ("Perfecto, muchas gracias", "smalltalk"), ("Adiós", "smalltalk"), ("Hasta luego", "smalltalk"),
+    ("Un saludo", "smalltalk"), ("Ok", "smalltalk"), ("Genial", "smalltalk"), ("¿Quién eres?", "smalltalk"),
+    ("¿Eres un robot?", "smalltalk"), ("¿Cómo estás?", "smalltalk"),
+
+    ("¿Qué servicios ofrecéis?", "faq"), ("¿Qué tipo de fotografía hacéis?", "faq"),
+    ("¿Cuánto cuesta una sesión?", "faq"), ("¿Qué precio tiene un reportaje?", "faq"),
+    ("¿Cuáles son vuestras tarifas?", "faq"), ("¿Dónde estáis?", "faq"), ("¿Dónde está el estudio?", "faq"),
+    ("¿Hacéis retratos?", "faq"), ("¿Hacéis fotos de comunión?", "faq"), ("¿Cubrís eventos de empresa?", "faq"),
+    ("¿Os desplazáis a otras ciudades?", "faq"), ("¿Cuánto tardáis en entregar?", "faq"),
+    ("¿Entregáis las fotos en digital?", "faq"), ("¿Hacéis álbumes?", "faq"), ("¿Qué horario tenéis?", "faq"),
+    ("¿Se puede pagar con tarjeta?", "faq"), ("¿Hay que pagar señal?", "faq"),
+    ("¿Puedo cancelar o cambiar la cita?", "faq"), ("¿Grabáis vídeo?", "faq"), ("Información sobre precios", "faq"),
+
+    ("¿Tienes hueco mañana?", "availability"), ("¿Hay disponibilidad el viernes?", "availability"),
+    ("¿Tenéis algo libre esta semana?", "availability"), ("¿Qué días tenéis libres?", "availability"),
+    ("¿Qué horas quedan libres el lunes?", "availability"), ("¿Estáis abiertos el sábado?", "availability"),
+    ("¿Hay sitio el 14 de marzo?", "availability"), ("¿A las 18 hay hueco?", "availability"),
+    ("¿Cuándo podría pasarme?", "availability"), ("¿Tenéis hueco la semana que viene?", "availability"),
+    ("¿Y el jueves?", "availability"), ("¿Algo antes?", "availability"),
+
+    ("Quiero reservar una cita", "booking"), ("Quiero pedir cita", "booking"),
+    ("Resérvame el martes a las 10", "booking"), ("Me quedo con ese hueco", "booking"),
+    ("Sí, confírmalo", "booking"), ("Apúntame a las 17", "booking"), ("Quiero cambiar mi cita", "booking"),
+    ("Quiero cancelar la reserva", "booking"), ("Mi nombre es Ana López", "booking"),
+    ("Mi email es ana@example.com", "booking"), ("Mi teléfono es 600 000 000", "booking"),
+    ("Quiero ir a veros al estudio", "booking"),
+
+    ("Me caso en junio y busco fotógrafo", "event"), ("Nos casamos el año que viene", "event"),
+    ("Es una boda en una finca con 150 invitados", "event"),
+    ("Queremos un reportaje de la ceremonia y el banquete", "event"),
+    ("Será en la playa al atardecer", "event"), ("Es el bautizo de mi hija", "event"),
+    ("Organizamos una conferencia de empresa", "event"), ("Queremos una sesión de pareja antes de la boda", "event"),
+    ("La celebración será en una masía", "event"), ("Somos unos 80 invitados", "event"),
+    ("Buscamos algo natural, nada posado", "event"), ("Mi boda es civil y pequeña", "event"),
+]
+
+
+def _features(text: str):
+    """n-gramas de caracteres (2-4) y palabras del mensaje normalizado; los dígitos se agrupan."""
+    text = re.sub(r"\d", "0", normalize(text))
+    padded = f" {text} "
+    feats = [f"w:{w}" for w in text.split()]
+    for n in (2, 3, 4):
+        feats.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return feats
+
+
+class IntentRouter:
+    """
+    Clasificador Naive Bayes multinomial sobre n-gramas de caracteres.
+    Sin dependencias ni GPU: se entrena al importar (milisegundos) y
+    clasifica un mensaje en torno a 0,1 ms.
+    """
+
+    def __init__(self, examples, alpha=0.5):
+        self.alpha = alpha
+        self.counts = {}
+        self.totals = Counter()
+        docs = Counter()
+        vocab = set()
+        for text, intent in examples:
+            feats = _features(text)
+            self.counts.setdefault(intent, Counter()).update(feats)
+            self.totals[intent] += len(feats)
+            docs[intent] += 1
+            vocab.update(feats)
+        self.vocab_size = len(vocab)
+        n_docs = sum(docs.values())
+        self.log_prior = {intent: math.log(docs[intent] / n_docs) for intent in self.counts}
+
+    @property
+    def intents(self):
+        return list(self.counts)
+
+    def classify(self, text: str):
+        """(intención, confianza 0-1) del mensaje."""
+        feats = _features(text)
+        scores = {}
+        for intent, counts in self.counts.items():
+            denom = math.log(self.totals[intent] + self.alpha * self.vocab_size)
+            score = self.log_prior[intent]
+            for f in feats:
+                score += math.log(counts.get(f, 0) + self.alpha) - denom
+            scores[intent] = score
+        best = max(scores, key=scores.get)
+        # Normalización softmax de las log-probabilidades
+        top = scores[best]
+        total = sum(math.exp(s - top) for s in scores.values())
+        return best, 1.0 / total
+
+
+class RouteDecision:
+    __slots__ = ("tier", "model", "intent", "confidence", "reason")
+
+    def __init__(self, tier, model, intent=None, confidence=0.0, reason=""):
+        self.tier = tier
+        self.model = model
+        self.intent = intent
+        self.confidence = confidence
+        self.reason = reason
+
+    def __repr__(self):
+        return (f"RouteDecision(tier={self.tier}, model={self.model}, intent={self.intent}, "
+                f"confidence={self.confidence:.2f}, reason={self.reason})")
+
+
+def _load_examples():
+    examples = list(TRAINING_EXAMPLES)
+    if ROUTER_TRAINING_FILE:
+        with open(ROUTER_TRAINING_FILE, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    examples.append((row["message"], row["intent"]))
+    return examples
+
+
+_ROUTER = IntentRouter(_load_examples())
+_STATS_LOCK = threading.Lock()
+ROUTER_STATS = {
+    "tiers": {"small": {"turns": 0, "seconds": 0.0, "errors": 0}, "large": {"turns": 0, "seconds": 0.0, "errors": 0}},
+    "reasons": Counter(),
+    "escalations": 0,
+}
+
+
+def get_router() -> IntentRouter:
+    return _ROUTER
+
+
+def route(session: dict, message: str) -> RouteDecision:
+    """
+    Decide qué modelo atiende el turno. Va al pequeño solo si no hay una
+    reserva en curso, el mensaje es corto y el clasificador está seguro de
+    que es smalltalk o una pregunta frecuente.
+    """
+    # La intención se calcula siempre: también la usa el constructor del prompt
+    intent, confidence = _ROUTER.classify(message)
+    if not MODEL_ROUTING_ENABLED:
+        decision = RouteDecision("large", LLM_MODEL_LARGE, intent, confidence, "disabled")
+    elif session.get("intent") in ("check_availability", "book") or any(session.get(k) for k in BOOKING_STATE_KEYS):
+        # Hay que extraer y combinar datos con el estado de la reserva
+        decision = RouteDecision("large", LLM_MODEL_LARGE, intent, confidence, "booking_state")
+    elif len(message.split()) > ROUTER_MAX_WORDS or message.count("?") > 1:
+        decision = RouteDecision("large", LLM_MODEL_LARGE, intent, confidence, "complex")
+    elif intent not in ROUTER_SMALL_INTENTS:
+        decision = RouteDecision("large", LLM_MODEL_LARGE, intent, confidence, "intent")
+    elif confidence < ROUTER_MIN_CONFIDENCE:
+        decision = RouteDecision("large", LLM_MODEL_LARGE, intent, confidence, "low_confidence")
+    else:
+        decision = RouteDecision("small", LLM_MODEL_SMALL, intent, confidence, "simple")
+
+    with _STATS_LOCK:
+        ROUTER_STATS["reasons"][decision.reason] += 1
+    return decision
+
+
+def record_call(tier: str, started: float, error: bool = False):
+    """Registra una llamada al LLM del nivel indicado (started = time.perf_counter() al empezar)."""
+    elapsed = time.perf_counter() - started
+    with _STATS_LOCK:
+        stats = ROUTER_STATS["tiers"][tier]
+        stats["turns"] += 1
+        stats["seconds"] += elapsed
+        if error:
+            stats["errors"] += 1
+
+
+def record_escalation():
+    with _STATS_LOCK:
+        ROUTER_STATS["escalations"] += 1
+
+
+def router_stats() -> dict:
+    """Reparto de turnos y latencia media por nivel."""
+    with _STATS_LOCK:
+        tiers = {}
+        for tier, stats in ROUTER_STATS["tiers"].items():
+            turns = stats["turns"]
+            tiers[tier] = {**stats, "avg_seconds": stats["seconds"] / turns if turns else 0.0}
+        total = sum(s["turns"] for s in tiers.values())
+        return {
+            "tiers": tiers,
+            "small_share": tiers["small"]["turns"] / total if total else 0.0,
+            "reasons": dict(ROUTER_STATS["reasons"]),
+            "escalations": ROUTER_STATS["escalations"],
+        }
+
+
+def reset_router_stats():
+    with _STATS_LOCK:
+        for stats in ROUTER_STATS["tiers"].values():
+            stats.update(turns=0, seconds=0.0, errors=0)
+        ROUTER_STATS["reasons"].clear()
+        ROUTER_STATS["escalations"] = 0
@@ -1,17 +1,35 @@
 import os
-import re
 import json
-import requests
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime, time, timedelta
+import logging
+import hashlib
+import asyncio
+from time import perf_counter
+from datetime import datetime, time
 from dotenv import load_dotenv
-from app.services.availability import is_holiday
-from app.services.session_service import get_session, clear_session
-
-
-print(">>> CARGADO llm_agent.py CORRECTO")
+from app.services.booking_service import SlotTakenError
+from app.services.business_calendar import get_calendar_async
+from app.services.date_parser import parse_datetime
+from app.services.history_manager import record_turn, history_context, history_messages
+from app.services.intent_router import route, record_call, record_escalation, LLM_MODEL_LARGE
+from app.services.llm_output import parse_llm_reply
+from app.services.prompt_builder import PromptBuilder, PROMPT_FILTER_ENABLED, PROMPT_TOKEN_BUDGET
+from app.services.response_cache import get_response_cache
+from app.services.slot_prefetch import SlotPrefetch, SLOT_PREFETCH_ENABLED
+from app.services.bookings_client import get_bookings_client, bookings_turn
+from app.services.availability_cache import invalidate_availability
+from app.services.timing import stage, record_stage
+from app.services.llm_cassette import get_cassette
+from app.services.metrics import (
+    record_llm_response, LLM_ERRORS, BOOKINGS, BOOKING_CONFLICTS, CHAT_TURN_SECONDS, CHAT_TURNS_IN_PROGRESS,
+)
+from app.schemas.llm import llm_reply_format
+from app.services.email_outbox import queue_booking_emails
+from app.services.session_service import get_session_async, save_session
+from app.services.http_client import get_http_client, LLM_TIMEOUT
+from app.services.stream_parser import MessageFieldStreamer, extract_json_object
+from app.services.structured_log import sample_payloads, log_payload
+
+logger = logging.getLogger(__name__)
 
 # Cargar variables del .env
 load_dotenv(dotenv_path=".env.local")
@@ -21,8 +39,22 @@ OLLAMA_API_BASE = os.getenv("OLLAMA_API_BASE", "https://ollama.com/api")
 # URL del Backend del Proyecto (Node.js)
 PROJECT_BACKEND_URL = os.getenv("PROJECT_BACKEND_URL", "http://localhost:3001/api")
 
-print(">>> OLLAMA_API_KEY:", OLLAMA_API_KEY)
-print(">>> OLLAMA_API_BASE:", OLLAMA_API_BASE)
+# Responder sin LLM los turnos que solo preguntan por una fecha/hora
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+FAST_PATH_STATS = {"turns": 0, "fast_path": 0}
+
+# Prompt de sistema fijo (caché de prefijo de Ollama) con el estado del turno en el último mensaje.
+# Solo compensa si el servidor reutiliza el prefijo (Ollama propio con keep_alive): envía el prompt
+# completo y no aplica el filtrado por relevancia (PROMPT_FILTER_ENABLED), que es lo que se usa por defecto
+PROMPT_STABLE_PREFIX = os.getenv("PROMPT_STABLE_PREFIX", "false").lower() == "true"
+# Tiempo que Ollama mantiene el modelo cargado en memoria entre peticiones
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Pedir a Ollama salida estructurada con el esquema JSON del sobre (parámetro "format")
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"
+LLM_REPLY_FORMAT = llm_reply_format()
+
+logger.info("Ollama configurado", extra={"api_base": OLLAMA_API_BASE, "api_key_set": bool(OLLAMA_API_KEY)})
 
 
 # --- PERSONALIZACIÓN DEL CLIENTE ---
@@ -96,16 +128,14 @@ Ejemplos Responde siempre con un mensaje que incluya una pregunta para avanzar e
 6. Negocio: {{"intent": "smalltalk", "date": null, "time": null, "message": "¡Hola! Ofrecemos servicios de fotografía y cobertura de eventos. ¿En qué puedo ayudarte hoy?"}}'''
 # -----------------------------------
 
-SYSTEM_PROMPT = f"""
-{PERSONALITY}
-{BUSINESS_CONTEXT}
-{REGLAS}
-
+# Formato de la respuesta (va siempre al final del prompt de sistema)
+RESPONSE_FORMAT = """
 RESPONDE SOLO con un JSON válido sin ningún texto adicional. Nada más.
-El JSON debe tener el formato EXACTO:
+El JSON debe tener el formato EXACTO, empezando siempre por "message":
 
 Formato:
-{{
+{
+  "message": "respuesta al cliente",
   "intent": "smalltalk | check_availability | book | unknown",
   "date": "YYYY-MM-DD | null | RESET",
   "time": "HH:MM | null | RESET",
@@ -113,253 +143,545 @@ Formato:
   "customer_name": "string | null",
   "customer_email": "string | null",
   "customer_phone": "string | null",
-  "event_date": "string | null",
-  "message": "respuesta al cliente"
-}}
+  "event_date": "string | null"
+}
+"""
 
+SYSTEM_PROMPT = f"""
+{PERSONALITY}
+{BUSINESS_CONTEXT}
+{REGLAS}
+{RESPONSE_FORMAT}
 """
 
-def cloud_chat(model: str, messages: list):
-    """
-    Hace una petición de chat a Ollama Cloud y devuelve el JSON completo.
-    """
-    headers = {
-        "Authorization": f"Bearer {OLLAMA_API_KEY}",
-        "Content-Type": "application/json"
-    }
+# Prompt de sistema por turno: solo los fragmentos relevantes (ver prompt_builder)
+prompt_builder = PromptBuilder(PERSONALITY, BUSINESS_CONTEXT, REGLAS, RESPONSE_FORMAT)
+
+# Versión del prompt: forma parte de la clave de la caché de respuestas,
+# así un cambio en el prompt invalida las respuestas guardadas
+PROMPT_VERSION = hashlib.sha1(
+    f"{SYSTEM_PROMPT}|{PROMPT_FILTER_ENABLED}|{PROMPT_TOKEN_BUDGET}|{PROMPT_STABLE_PREFIX}".encode("utf-8")
+).hexdigest()[:12]
+response_cache = get_response_cache()
+
+def _chat_payload(model: str, messages: list, stream: bool) -> dict:
     payload = {
         "model": model,
         "messages": messages,
-        "stream": False,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
         "options": {
             "temperature": 0.5,
             "top_p": 0.9
         }
     }
+    if LLM_STRUCTURED_OUTPUT:
+        payload["format"] = LLM_REPLY_FORMAT
+    return payload
 
-    response = requests.post(
+async def cloud_chat_async(model: str, messages: list):
+    """
+    Hace una petición de chat a Ollama Cloud y devuelve el JSON completo.
+    Usa el cliente HTTP asíncrono compartido del proceso: una llamada lenta al LLM no bloquea al resto de sesiones del worker.
+    """
+    started = perf_counter()
+    try:
+        data = await _cloud_chat_async(model, messages)
+    except Exception:
+        LLM_ERRORS.inc(model=model, mode="async")
+        raise
+    record_llm_response(model, "async", perf_counter() - started, data)
+    return data
+
+async def _cloud_chat_async(model: str, messages: list):
+    cassette = get_cassette()
+    if cassette.replaying:
+        return await cassette.replay(model, messages)
+
+    client = get_http_client()
+    response = await client.post(
         f"{OLLAMA_API_BASE}/chat",
-        headers=headers,
-        json=payload
+        headers={
+            "Authorization": f"Bearer {OLLAMA_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        json=_chat_payload(model, messages, stream=False),
+        timeout=LLM_TIMEOUT
     )
 
-    if not response.ok:
+    if not response.is_success:
         raise Exception(f"Error en Ollama Cloud: {response.status_code} {response.text}")
 
-    return response.json()
+    data = response.json()
+    if cassette.recording:
+        cassette.record(model, messages, data)
+    return data
+
+async def cloud_chat_stream(model: str, messages: list):
+    """
+    Petición de chat en modo stream: va devolviendo los trozos de texto según
+    los genera el modelo. El último elemento es el JSON final de Ollama
+    (done=True, con los contadores de tokens y tiempos).
+    """
+    started = perf_counter()
+    try:
+        async for chunk in _cloud_chat_stream(model, messages):
+            if isinstance(chunk, dict):
+                record_llm_response(model, "stream", perf_counter() - started, chunk)
+            yield chunk
+    except Exception:
+        LLM_ERRORS.inc(model=model, mode="stream")
+        raise
+
+async def _cloud_chat_stream(model: str, messages: list):
+    cassette = get_cassette()
+    if cassette.replaying:
+        async for chunk in cassette.replay_stream(model, messages):
+            yield chunk
+        return
 
-def get_supabase_slots(business_id, date_obj):
-    """Obtiene huecos libres consultando directamente a Supabase"""
-    # 1. Validar festivos y domingos (0=Lunes, 6=Domingo)
-    if date_obj.weekday() == 6 or is_holiday(date_obj):
+    parts = []
+    client = get_http_client()
+    async with client.stream(
+        "POST",
+        f"{OLLAMA_API_BASE}/chat",
+        headers={
+            "Authorization": f"Bearer {OLLAMA_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        json=_chat_payload(model, messages, stream=True),
+        timeout=LLM_TIMEOUT
+    ) as response:
+        if not response.is_success:
+            await response.aread()
+            raise Exception(f"Error en Ollama Cloud: {response.status_code} {response.text}")
+
+        # Ollama envía una línea JSON por trozo (NDJSON)
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            if chunk.get("done"):
+                if cassette.recording:
+                    full = {**chunk, "message": {"role": "assistant", "content": "".join(parts)}}
+                    cassette.record(model, messages, full, chunks=parts)
+                yield chunk
+                return
+            part = chunk.get("message", {}).get("content", "")
+            parts.append(part)
+            yield part
+
+def _free_slots(date_obj, booked_times):
+    """Calcula los huecos libres (Horario fijo 9:00 - 20:00) dadas las horas ya reservadas (HH:MM)"""
+    slots = []
+    now = datetime.now()
+    for h in range(9, 20):
+        t_str = f"{h:02d}:00"
+        if t_str not in booked_times:
+            # No mostrar horas pasadas si es hoy
+            if date_obj > now.date() or (date_obj == now.date() and h > now.hour):
+                slots.append(time(h, 0))
+    return slots
+
+async def get_supabase_slots_async(business_id, date_obj):
+    """Huecos libres de una fecha: calendario del negocio y reservas del Backend del Proyecto"""
+    if not (await get_calendar_async(business_id)).is_open(date_obj):
         return []
-    
-    # 2. Consultar reservas existentes al Backend del Proyecto
-    url = f"{PROJECT_BACKEND_URL}/bookings?business_id={business_id}&date={date_obj}"
-    
+
     try:
-        resp = requests.get(url)
-        booked_times = set()
-        if resp.ok:
-            # Supabase devuelve HH:MM:SS, nos quedamos con HH:MM
-            booked_times = {b['start_time'][:5] for b in resp.json()}
-            
-        # 3. Calcular huecos libres (Horario fijo 9:00 - 20:00)
-        slots = []
-        now = datetime.now()
-        for h in range(9, 20):
-            t_str = f"{h:02d}:00"
-            if t_str not in booked_times:
-                # No mostrar horas pasadas si es hoy
-                if date_obj > now.date() or (date_obj == now.date() and h > now.hour):
-                    slots.append(time(h, 0))
-        return slots
+        # Una sola consulta por día y turno aunque la pidan el prefetch y el flujo
+        booked_times = await get_bookings_client().booked_times(business_id, date_obj)
+        return _free_slots(date_obj, booked_times)
     except Exception as e:
-        print(f"Error consultando Backend del Proyecto: {e}")
+        logger.warning("Error consultando Backend del Proyecto: %s", e)
         return []
 
-def is_slot_available(business_id, date_str, time_str):
+async def is_slot_available_async(business_id, date_str, time_str):
     check_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-    # Reutilizamos la lógica de slots para verificar disponibilidad
-    slots = get_supabase_slots(business_id, check_date)
+    slots = await get_supabase_slots_async(business_id, check_date)
     check_time_obj = datetime.strptime(time_str, "%H:%M").time()
     return check_time_obj in slots
 
-def send_confirmation_email(to_email, customer_name, date_str, time_str):
-    # Configuración SMTP (Cargar desde .env para producción)
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-
-    if not smtp_user or not smtp_password:
-        print("⚠️ Credenciales SMTP no configuradas. No se envió el correo de confirmación.")
-        return
-
-    subject = "Confirmación de Cita - Estudio de Fotografía"
-    body = f"""
-    Hola {customer_name},
-
-    Tu cita ha sido confirmada correctamente.
+def start_slot_prefetch(business_id, session, message):
+    """
+    Lanza en segundo plano la consulta de huecos de las fechas que
+    probablemente va a pedir el LLM: la que aparece en el mensaje y la que ya
+    está en la sesión. Devuelve None si no hay nada que adelantar.
+    """
+    if not SLOT_PREFETCH_ENABLED or session.get("slot_confirmed"):
+        return None
+
+    today = datetime.now().date()
+    dates = []
+    parsed = parse_datetime(message, today)
+    if parsed.date is not None:
+        dates.append(parsed.date)
+    if session.get("date") and session.get("intent") in ("check_availability", "book"):
+        try:
+            dates.append(datetime.strptime(session["date"], "%Y-%m-%d").date())
+        except ValueError:
+            pass
+    dates = [d for d in dict.fromkeys(dates) if d >= today]
+    if not dates:
+        return None
+    return SlotPrefetch(lambda day: get_supabase_slots_async(business_id, day), dates)
+
+async def slots_for(business_id, date_obj, prefetch=None):
+    """Huecos libres de una fecha, usando la consulta adelantada si coincide."""
+    if prefetch is not None:
+        return await prefetch.slots(date_obj)
+    return await get_supabase_slots_async(business_id, date_obj)
+
+def _booking_payload(business_id, session):
+    """Prepara los datos de la reserva para el Backend del Proyecto"""
+    return {
+        "business_id": business_id,
+        "date": session["date"],
+        "start_time": session["time"],
+        "customer_name": session.get("customer_name"),
+        "customer_email": session.get("customer_email"),
+        "customer_phone": session.get("customer_phone"),
+        "event_date": session.get("event_date"),
+        "event_details": session.get("event_details")
+    }
 
-    📅 Fecha: {date_str}
-    ⏰ Hora: {time_str}
+async def create_event_async(business_id, session):
+    """
+    Guarda la reserva en el Backend del Proyecto. Los correos no se envían aquí: se
+    dejan en la bandeja de salida y los manda el worker de email_outbox.
 
-    ¡Gracias por confiar en nosotros!
+    Lanza SlotTakenError si otra conversación ha reservado el hueco entretanto
+    (el backend responde 409 por la restricción única de bookings).
     """
+    try:
+        resp = await get_bookings_client().create_booking(_booking_payload(business_id, session))
+        if resp.status_code == 409:
+            # La caché daba el hueco por libre: ya está ocupado
+            invalidate_availability(business_id, session["date"])
+            raise SlotTakenError(f"{session['date']} {session['time']}")
+        if not resp.is_success:
+            raise Exception(f"Error Backend: {resp.text}")
+        invalidate_availability(business_id, session["date"])
 
-    msg = MIMEMultipart()
-    msg["From"] = smtp_user
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
+        logger.info("Cita guardada en BD", extra={"business_id": business_id, "date": session["date"], "time": session["time"]})
+        BOOKINGS.inc(result="created")
 
-    try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.sendmail(smtp_user, to_email, msg.as_string())
-        server.quit()
-        print(f"📧 Correo de confirmación enviado a {to_email}")
+        # Insertar en la bandeja de salida es una escritura local (ms), sin esperar al SMTP
+        with stage("db"):
+            await asyncio.to_thread(queue_booking_emails, dict(session))
+
+        return True
+    except SlotTakenError:
+        BOOKINGS.inc(result="conflict")
+        BOOKING_CONFLICTS.inc(source="chat")
+        raise
     except Exception as e:
-        print(f"❌ Error enviando correo: {e}")
+        logger.error("Error guardando cita: %s", e)
+        BOOKINGS.inc(result="error")
+        return False
 
-def send_admin_notification(session):
+def build_messages(session, message, intent=None):
     """
-    Envía un correo a los socios del negocio con los detalles de la nueva reserva.
+    Construye la lista de mensajes para el LLM: prompt de sistema, historial
+    y mensaje del usuario con el contexto actual de la sesión.
+
+    Por defecto el prompt de sistema se filtra por relevancia (PROMPT_FILTER_ENABLED).
+    Con PROMPT_STABLE_PREFIX es siempre el mismo, completo y sin filtrar (igual
+    en todas las sesiones) y lo que cambia en cada turno va en el último
+    mensaje, así un servidor con caché de prefijo no reevalúa el prompt.
     """
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-    
-    # Obtener emails de los socios desde el .env (separados por comas)
-    # Si no está configurado, usa el mismo email de envío para probar
-    admin_emails_str = os.getenv("ADMIN_EMAILS", smtp_user)
-    
-    if not smtp_user or not smtp_password or not admin_emails_str:
-        print("⚠️ No se puede enviar notificación a socios: faltan credenciales.")
-        return
+    # Contexto actual para que el LLM sepa qué está pasando, más el resumen de lo antiguo
+    context_str = f"Contexto actual: Intent={session.get('intent')}, Date={session.get('date')}, Time={session.get('time')}, CustomerName={session.get('customer_name')}"
+    context_str += history_context(session)
+
+    # Historial reciente (el asistente solo con su texto)
+    history = history_messages(session)
+
+    if PROMPT_STABLE_PREFIX:
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        messages.extend(history)
+        messages.append({"role": "user", "content": f"[{context_str}]\n\n{message}"})
+        return messages
+
+    # Solo el contexto del negocio y las reglas relevantes para este turno
+    if PROMPT_FILTER_ENABLED:
+        system_prompt = prompt_builder.build(message, intent, session)
+    else:
+        system_prompt = SYSTEM_PROMPT
+
+    messages = [{"role": "system", "content": system_prompt + "\n" + context_str}]
+    messages.extend(history)
+    messages.append({"role": "user", "content": message})
+    return messages
 
-    admin_emails = [e.strip() for e in admin_emails_str.split(",") if e.strip()]
-    
-    subject = f"🔔 Nueva Reserva: {session.get('date')} a las {session.get('time')}"
-    body = f"""
-    ¡Hola! Tenéis una nueva cita confirmada.
-
-    👤 Cliente: {session.get('customer_name', 'N/A')}
-    📧 Email: {session.get('customer_email', 'N/A')}
-    📞 Teléfono: {session.get('customer_phone', 'N/A')}
-
-    📅 Fecha: {session.get('date')}
-    ⏰ Hora: {session.get('time')}
-    
-    📝 Detalles:
-    {session.get('event_details', 'Sin detalles adicionales')}
+def fast_path_fields(session: dict, message: str, today=None):
+    """
+    Campos del turno (como los devolvería el LLM) si el mensaje es solo una
+    consulta de fecha/hora que el parser entiende con seguridad; si no, None.
     """
+    # Recogiendo los datos del cliente, una fecha suelta puede ser la de la boda
+    if session.get("intent") == "book" and session.get("slot_confirmed"):
+        return None
+
+    parsed = parse_datetime(message, today)
+    if not parsed.confident or (parsed.date is None and not session.get("date")):
+        return None
+
+    data = {"intent": "check_availability"}
+    if parsed.date is not None:
+        data["date"] = parsed.date.strftime("%Y-%m-%d")
+    if parsed.time is not None:
+        data["time"] = parsed.time.strftime("%H:%M")
+    return data
+
+async def try_fast_path(business_id: str, session: dict, message: str):
+    """
+    Atajo sin LLM: "¿tienes hueco mañana a las 17?", "el 10 de mayo"... se
+    responden directamente con el flujo de disponibilidad.
+    Devuelve None si hay que preguntar al LLM.
+    """
+    FAST_PATH_STATS["turns"] += 1
+    data = fast_path_fields(session, message) if FAST_PATH_ENABLED else None
+    if data is None:
+        return None
 
-    try:
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        
-        for email in admin_emails:
-            msg = MIMEMultipart()
-            msg["From"] = smtp_user
-            msg["To"] = email
-            msg["Subject"] = subject
-            msg.attach(MIMEText(body, "plain"))
-            server.sendmail(smtp_user, email, msg.as_string())
-            
-        server.quit()
-        print(f"📧 Notificación enviada a socios: {admin_emails}")
-    except Exception as e:
-        print(f"❌ Error enviando notificación a socios: {e}")
+    result = await apply_turn(business_id, session, message, data)
+    FAST_PATH_STATS["fast_path"] += 1
+    return result
 
-def create_event(business_id, session):
+async def try_shortcuts(business_id: str, session: dict, message: str):
+    """
+    Intenta responder el turno sin el LLM: primero el atajo de fecha/hora y
+    luego la caché de respuestas. Devuelve (resultado o None, clave de caché
+    para guardar la respuesta del LLM).
+    """
+    result = await try_fast_path(business_id, session, message)
+    if result is not None:
+        return result, None
+
+    # La clave se calcula antes de que el turno modifique la sesión
+    cache_key = response_cache.key_for(business_id, PROMPT_VERSION, session, message)
+    data = response_cache.get(cache_key)
+    if data is None:
+        return None, cache_key
+    return await apply_turn(business_id, session, message, data), None
+
+async def ask_llm(decision, messages: list) -> str:
+    """
+    Cascada de modelos: si el router ha elegido el modelo pequeño y este
+    falla o no devuelve un JSON utilizable, se repite con el grande.
+    Devuelve el texto bruto de la respuesta.
+    """
+    logger.debug("Router: %s", decision)
+
+    if decision.tier == "small":
+        started = perf_counter()
+        try:
+            response = await cloud_chat_async(model=decision.model, messages=messages)
+            raw = response["message"]["content"].strip()
+            if extract_json_object(raw) is not None:
+                record_call("small", started)
+                return raw
+            logger.warning("Respuesta no válida del modelo pequeño, se repite con %s", LLM_MODEL_LARGE,
+                           extra={"raw_chars": len(raw)})
+        except Exception as e:
+            logger.warning("Error del modelo pequeño, se repite con %s: %s", LLM_MODEL_LARGE, e)
+        record_call("small", started, error=True)
+        record_escalation()
+
+    started = perf_counter()
     try:
-        # Preparar datos para el Backend del Proyecto
-        data = {
-            "business_id": business_id,
-            "date": session["date"],
-            "start_time": session["time"],
-            "customer_name": session.get("customer_name"),
-            "customer_email": session.get("customer_email"),
-            "customer_phone": session.get("customer_phone"),
-            "event_date": session.get("event_date"),
-            "event_details": session.get("event_details")
-        }
-        
-        url = f"{PROJECT_BACKEND_URL}/bookings"
-        
-        resp = requests.post(url, json=data)
-        if not resp.ok:
-            raise Exception(f"Error Backend: {resp.text}")
-            
-        print(f"✅ Cita guardada en BD: {session['date']} a las {session['time']} para {session.get('customer_name')}")
-        
-        # Enviar correo si tenemos el email
-        if session.get("customer_email"):
-            send_confirmation_email(
-                session["customer_email"],
-                session.get("customer_name", "Cliente"),
-                session["date"],
-                session["time"]
-            )
-        
-        # Notificar a los socios (tú y tu socia)
-        send_admin_notification(session)
-
-        return True
-    except Exception as e:
-        print(f"❌ Error guardando cita: {e}")
-        return False
+        response = await cloud_chat_async(model=LLM_MODEL_LARGE, messages=messages)
+    except Exception:
+        record_call("large", started, error=True)
+        raise
+    record_call("large", started)
+    return response["message"]["content"].strip()
+
+def fast_path_stats() -> dict:
+    turns = FAST_PATH_STATS["turns"]
+    return {**FAST_PATH_STATS, "share": FAST_PATH_STATS["fast_path"] / turns if turns else 0.0}
+
+async def handle_chat(business_id: str, session_id: str, message: str):
+    # Las consultas de huecos al backend Node se deduplican dentro del turno
+    started = perf_counter()
+    status = "error"
+    CHAT_TURNS_IN_PROGRESS.inc()
+    try:
+        with bookings_turn():
+            result = await _handle_chat(business_id, session_id, message)
+        status = result["status"]
+        return result
+    finally:
+        CHAT_TURNS_IN_PROGRESS.dec()
+        CHAT_TURN_SECONDS.observe(perf_counter() - started, endpoint="chat", status=status)
+
+async def _handle_chat(business_id: str, session_id: str, message: str):
+    with stage("db"):
+        session = await get_session_async(session_id)
+
+    # Consultas de fecha/hora que entiende el parser o saludos/preguntas frecuentes
+    # ya respondidos: sin pasar por el LLM
+    try:
+        result, cache_key = await try_shortcuts(business_id, session, message)
+    finally:
+        save_session(session_id, session)
+    if result is not None:
+        return result
 
-def handle_chat(business_id: str, session_id: str, message: str):
-    session = get_session(session_id)
+    # Modelo (pequeño o grande) e intención del turno según el router
+    decision = route(session, message)
+    messages = build_messages(session, message, decision.intent)
 
-    # Inyectar contexto actual para que el LLM sepa qué está pasando
-    context_str = f"\nContexto actual: Intent={session.get('intent')}, Date={session.get('date')}, Time={session.get('time')}, CustomerName={session.get('customer_name')}"
+    # Prompt y respuesta completos solo en una muestra de los turnos (LOG_LLM_SAMPLE_RATE)
+    sampled = sample_payloads()
+    if sampled:
+        customer = [session.get(k) for k in ("customer_name", "customer_email", "customer_phone")]
+        log_payload("llm_request", messages, mask=customer, session_id=session_id, model=decision.model)
 
-    # Recuperar historial de la sesión
-    history = session.get("history", [])
+    # Mientras responde el LLM se adelanta la consulta de huecos de la fecha del mensaje
+    prefetch = start_slot_prefetch(business_id, session, message)
 
-    messages = [{"role": "system", "content": SYSTEM_PROMPT + context_str}]
-    messages.extend(history)
-    messages.append({"role": "user", "content": message})
+    # Usar Ollama Cloud
+    try:
+        with stage("llm"):
+            raw = await ask_llm(decision, messages)
+    except Exception:
+        if prefetch is not None:
+            prefetch.close()
+        raise
 
-    print(">>> Enviando mensaje al modelo LLM...")
-    print(messages)
+    if sampled:
+        log_payload("llm_response", raw, mask=customer, session_id=session_id)
 
-    # Usar Ollama Cloud
-    response = cloud_chat(
-        model="gpt-oss:120b",  # modelo potente en la nube
-        messages=messages
-    )
+    try:
+        return await process_llm_reply(business_id, session, message, raw, cache_key, prefetch)
+    finally:
+        if prefetch is not None:
+            prefetch.close()
+        # Persistir el estado del turno (en segundo plano, write-behind)
+        save_session(session_id, session)
+
+async def handle_chat_stream(business_id: str, session_id: str, message: str):
+    """
+    Variante en streaming de handle_chat. Emite eventos:
+      {"type": "token", "text": ...}  texto del campo "message" según llega
+      {"type": "done", "reply": ..., "status": ...}  resultado final del flujo
 
-    print(">>> Respuesta recibida del modelo LLM:")
-    print(response)
+    Los campos estructurados (intent, date, time, datos del cliente) se aplican
+    a la sesión cuando el JSON está completo, igual que en handle_chat.
+    """
+    started = perf_counter()
+    status = "error"
+    CHAT_TURNS_IN_PROGRESS.inc()
+    try:
+        with bookings_turn():
+            async for event in _handle_chat_stream(business_id, session_id, message):
+                if event["type"] == "done":
+                    status = event["status"]
+                yield event
+    finally:
+        CHAT_TURNS_IN_PROGRESS.dec()
+        CHAT_TURN_SECONDS.observe(perf_counter() - started, endpoint="stream", status=status)
+
+async def _handle_chat_stream(business_id: str, session_id: str, message: str):
+    with stage("db"):
+        session = await get_session_async(session_id)
 
-    raw = response["message"]["content"].strip()
-    print(">>> Texto bruto del LLM:")
-    print(raw)
+    try:
+        result, cache_key = await try_shortcuts(business_id, session, message)
+    finally:
+        save_session(session_id, session)
+    if result is not None:
+        yield {"type": "done", "reply": result["reply"], "status": result["status"], "replace": True}
+        return
 
-    # 🔹 Extraer bloque JSON del texto
+    decision = route(session, message)
+    messages = build_messages(session, message, decision.intent)
+    prefetch = start_slot_prefetch(business_id, session, message)
+
+    tiers = [(decision.tier, decision.model)]
+    if decision.tier == "small":
+        tiers.append(("large", LLM_MODEL_LARGE))
+
+    for tier, model in tiers:
+        streamer = MessageFieldStreamer()
+        parts = []
+        streamed = []
+        started = perf_counter()
+        try:
+            async for chunk in cloud_chat_stream(model=model, messages=messages):
+                if isinstance(chunk, dict):
+                    continue  # JSON final con estadísticas de Ollama
+                parts.append(chunk)
+                text = streamer.feed(chunk)
+                if text:
+                    streamed.append(text)
+                    yield {"type": "token", "text": text}
+        except Exception as e:
+            record_call(tier, started, error=True)
+            record_stage("llm", perf_counter() - started)
+            # Solo se puede repetir con el modelo grande si aún no se ha enviado nada al cliente
+            if tier == "small" and not streamed:
+                logger.warning("Error del modelo pequeño, se repite con %s: %s", LLM_MODEL_LARGE, e)
+                record_escalation()
+                continue
+            logger.error("Error en el stream del LLM: %s", e)
+            if prefetch is not None:
+                prefetch.close()
+            yield {"type": "done", "reply": "Ahora mismo no puedo responder.", "status": "error", "replace": True}
+            return
+        record_call(tier, started)
+        # Incluye el tiempo de envío de los tokens al cliente
+        record_stage("llm", perf_counter() - started)
+        break
+
+    raw = "".join(parts).strip()
     try:
-        json_match = re.search(r'{.*}', raw, re.DOTALL)
-        if not json_match:
-            raise ValueError("No se encontró JSON en la respuesta del LLM")
-        json_str = json_match.group(0)
-        data = json.loads(json_str)
-    except Exception as e:
-        print(f"Error parsing JSON: {e}")
+        result = await process_llm_reply(business_id, session, message, raw, cache_key, prefetch)
+    finally:
+        if prefetch is not None:
+            prefetch.close()
+        save_session(session_id, session)
+
+    # Si el flujo genera otra respuesta (p. ej. la lista de huecos libres),
+    # el cliente debe sustituir el texto que ya ha mostrado.
+    yield {
+        "type": "done",
+        "reply": result["reply"],
+        "status": result["status"],
+        "replace": result["reply"] != "".join(streamed)
+    }
+
+async def process_llm_reply(business_id: str, session: dict, message: str, raw: str, cache_key=None, prefetch=None):
+    """
+    Aplica la respuesta del LLM (JSON) a la sesión y ejecuta el flujo real:
+    disponibilidad, reserva y recogida de datos del cliente.
+    """
+    # 🔹 Extraer y validar el JSON (tolera texto alrededor, respuestas cortadas, comas sobrantes...)
+    with stage("parse"):
+        data = parse_llm_reply(raw)
+    if data is None:
+        logger.warning("Respuesta del LLM sin JSON aprovechable", extra={"raw_chars": len(raw or "")})
         return {"reply": "Error procesando la respuesta.", "status": "error"}
 
-    # Guardar en el historial (limitado a los últimos 10 mensajes para no saturar)
-    history.append({"role": "user", "content": message})
-    history.append({"role": "assistant", "content": raw}) # Guardamos el JSON crudo para que el LLM mantenga el formato
-    session["history"] = history[-10:]
+    # Respuestas sin estado (smalltalk/unknown) se guardan para el próximo mensaje igual
+    response_cache.store(cache_key, data)
 
+    return await apply_turn(business_id, session, message, data, prefetch)
+
+async def apply_turn(business_id: str, session: dict, message: str, data: dict, prefetch=None):
+    """
+    Aplica los campos ya extraídos del turno (intent, fecha, hora, datos del
+    cliente), ejecuta el flujo de disponibilidad y reserva y guarda el
+    intercambio en el historial.
+    """
+    result = await run_flow(business_id, session, data, prefetch)
+    # Se guarda la respuesta que ha visto el cliente, solo el texto (el formato lo fija el esquema JSON)
+    record_turn(session, message, result["reply"])
+    return result
+
+async def run_flow(business_id: str, session: dict, data: dict, prefetch=None):
     # 2️⃣ Actualizar estado
     for key in ["intent", "date", "time", "event_details", "customer_name", "customer_email", "customer_phone", "event_date"]:
         val = data.get(key)
@@ -379,7 +701,7 @@ def handle_chat(business_id: str, session_id: str, message: str):
             return {"reply": data.get("message", "¿Para qué fecha?"), "status": "need_info"}
 
         # Consultar disponibilidad en Supabase
-        slots = get_supabase_slots(business_id, datetime.strptime(session["date"], "%Y-%m-%d").date())
+        slots = await slots_for(business_id, datetime.strptime(session["date"], "%Y-%m-%d").date(), prefetch)
 
         if not slots:
             check_date = datetime.strptime(session["date"], "%Y-%m-%d").date()
@@ -389,25 +711,16 @@ def handle_chat(business_id: str, session_id: str, message: str):
                  return {"reply": f"No puedo darte disponibilidad para el pasado ({session['date']}).", "status": "need_info"}
             
             # 2. Validar festivo
-            if is_holiday(check_date):
+            calendar = await get_calendar_async(business_id)
+            if calendar.is_holiday(check_date):
                  return {"reply": f"El {session['date']} es festivo. ¿Buscas otro día?", "status": "need_info"}
 
-            # 3. Validar si estamos cerrados (ej. Domingo)
-            weekday = check_date.weekday()
-            # Asumimos cerrado los domingos (6)
-            if weekday == 6:
-                 # Buscar el siguiente día laborable
-                 next_date = check_date
-                 found_next = False
-                 for _ in range(7):
-                     next_date += timedelta(days=1)
-                     next_weekday = next_date.weekday()
-                     # Si no es domingo y no es festivo
-                     if next_weekday != 6 and not is_holiday(next_date):
-                         found_next = True
-                         break
-                 
-                 if found_next:
+            # 3. Validar si estamos cerrados (ej. Domingo o cierre puntual)
+            if not calendar.is_open(check_date):
+                 # Buscar el siguiente día laborable (índice precalculado, sin consultar la BD)
+                 next_date = calendar.next_open_day(check_date)
+
+                 if next_date:
                      original_date = session['date']
                      # Actualizamos la sesión con la fecha sugerida para romper el bucle
                      session['date'] = next_date.strftime('%Y-%m-%d')
@@ -438,18 +751,19 @@ def handle_chat(business_id: str, session_id: str, message: str):
 
         # ⛔ Comprobar disponibilidad solo una vez por intento de reserva
         if not session.get('slot_confirmed'):
-            if not is_slot_available(business_id, session["date"], session["time"]):
-                date_obj = datetime.strptime(session["date"], "%Y-%m-%d").date()
+            date_obj = datetime.strptime(session["date"], "%Y-%m-%d").date()
+            requested = datetime.strptime(session["time"], "%H:%M").time()
+            if requested not in await slots_for(business_id, date_obj, prefetch):
                 
                 if date_obj < datetime.now().date():
                     session["time"] = None
                     return {"reply": f"No es posible reservar en el pasado ({session['date']}). Por favor, elige una fecha futura.", "status": "need_info"}
 
-                if is_holiday(date_obj):
+                if (await get_calendar_async(business_id)).is_holiday(date_obj):
                     session["time"] = None
                     return {"reply": f"El {session['date']} es festivo y estamos cerrados. ¿Qué otro día te viene bien?", "status": "need_info"}
 
-                slots = get_supabase_slots(business_id, date_obj)
+                slots = await slots_for(business_id, date_obj, prefetch)
                 session["time"] = None
 
                 if slots:
@@ -473,8 +787,20 @@ def handle_chat(business_id: str, session_id: str, message: str):
         if not session.get("event_date"):
              return {"reply": data.get("message", "Por último, ¿cuál es la fecha de la boda o evento?"), "status": "need_info"}
 
-        # ✅ crear evento
-        if create_event(business_id, session):
+        # ✅ crear evento (inserción atómica: si alguien se ha adelantado, el backend lo rechaza)
+        try:
+            created = await create_event_async(business_id, session)
+        except SlotTakenError:
+            session["time"] = None
+            session["slot_confirmed"] = False
+            # Consulta nueva: lo adelantado ya no refleja la reserva que se ha adelantado
+            slots = await slots_for(business_id, datetime.strptime(session["date"], "%Y-%m-%d").date())
+            if slots:
+                horarios = ", ".join(s.strftime("%H:%M") for s in slots)
+                return {"reply": f"Vaya, alguien acaba de reservar ese horario. Para el {session['date']} quedan libres: {horarios}. ¿Cuál prefieres?", "status": "need_info"}
+            return {"reply": f"Vaya, alguien acaba de reservar el último hueco del {session['date']}. ¿Te viene bien otro día?", "status": "need_info"}
+
+        if created:
             # Preservar el nombre del cliente para futuras interacciones
             saved_name = session.get("customer_name")
             session.clear()
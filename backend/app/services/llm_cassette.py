@@ -0,0 +1,201 @@
+# backend/app/services/llm_cassette.py
+
+import os
+import re
+import json
+import logging
+import asyncio
+import hashlib
+import threading
+from datetime import datetime
+
+# Grabación y reproducción de las llamadas al LLM:
+#   off    -> llamadas reales
+#   record -> llamadas reales y se guardan en el cassette
+#   replay -> se responden desde el cassette, sin red ni API key
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "cassettes/llm.jsonl")
+# En replay: "instant" o "recorded" (se esperan los tiempos grabados de Ollama)
+LLM_CASSETTE_TIMING = os.getenv("LLM_CASSETTE_TIMING", "instant").lower()
+# Factor sobre los tiempos grabados (0.5 = el doble de rápido)
+LLM_CASSETTE_SPEED = float(os.getenv("LLM_CASSETTE_SPEED", "1.0"))
+
+logger = logging.getLogger(__name__)
+
+# Campos de Ollama que se guardan con cada respuesta
+STATS_FIELDS = (
+    "total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+    "eval_count", "eval_duration", "done_reason",
+)
+
+# Contexto de la sesión que cambia en cada turno: "[Contexto actual: ...]\n\n" al
+# principio del último mensaje (prefijo estable) o al final del prompt de sistema
+_CONTEXT_PREFIX = re.compile(r"^\[Contexto actual:.*?\]\n\n", re.S)
+
+
+class CassetteMiss(Exception):
+    """En replay no hay ninguna respuesta grabada para la petición."""
+
+
+def _normalize(messages: list) -> list:
+    """Mensajes sin el prompt de sistema ni el contexto volátil de la sesión."""
+    normalized = []
+    for m in messages:
+        if m.get("role") == "system":
+            continue
+        content = m.get("content", "")
+        if m.get("role") == "user":
+            content = _CONTEXT_PREFIX.sub("", content, count=1)
+        normalized.append({"role": m.get("role"), "content": content})
+    return normalized
+
+
+def fingerprint(model: str, messages: list) -> str:
+    """
+    Huella de la petición: modelo, historial y mensaje del cliente. Se ignoran
+    el prompt de sistema, el contexto de la sesión (intent, fecha, resumen...)
+    y las opciones de muestreo, así una grabación sigue valiendo aunque cambie
+    el estado de la sesión o la fecha del día en que se reproduce.
+    """
+    canonical = json.dumps({"model": model, "messages": _normalize(messages)}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:20]
+
+
+class LLMCassette:
+    """
+    Fichero JSONL con una línea por llamada grabada: huella, petición
+    normalizada y respuesta completa de Ollama (texto, trozos del stream y
+    contadores eval_count / *_duration). Una misma huella puede tener varias
+    respuestas: en replay se sirven en orden y después se repite la última.
+    """
+
+    def __init__(self, path=LLM_CASSETTE_PATH, mode=LLM_CASSETTE_MODE, timing=LLM_CASSETTE_TIMING,
+                 speed=LLM_CASSETTE_SPEED):
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.speed = speed
+        self._entries = None
+        self._served = {}
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["fingerprint"], []).append(entry)
+
+    # --- Grabación ---
+
+    def record(self, model: str, messages: list, response: dict, chunks=None):
+        """Guarda la respuesta (JSON final de Ollama con el mensaje completo)."""
+        entry = {
+            "fingerprint": fingerprint(model, messages),
+            "model": model,
+            "request": _normalize(messages),
+            "response": {
+                "content": response.get("message", {}).get("content", ""),
+                "chunks": chunks,
+                **{k: response[k] for k in STATS_FIELDS if k in response},
+            },
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self._load()
+            self._entries.setdefault(entry["fingerprint"], []).append(entry)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.stats["recorded"] += 1
+
+    # --- Reproducción ---
+
+    def _next(self, model: str, messages: list) -> dict:
+        key = fingerprint(model, messages)
+        with self._lock:
+            self._load()
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"Sin respuesta grabada para {model} ({key}) en {self.path}")
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+            self.stats["replayed"] += 1
+            return entries[min(served, len(entries) - 1)]["response"]
+
+    def _seconds(self, response, field) -> float:
+        if self.timing != "recorded":
+            return 0.0
+        return response.get(field, 0) / 1e9 * self.speed
+
+    def _first_token_seconds(self, response) -> float:
+        first = self._seconds(response, "load_duration") + self._seconds(response, "prompt_eval_duration")
+        # Grabaciones sin desglose: todo el tiempo se cuenta antes de la respuesta
+        return first or self._seconds(response, "total_duration")
+
+    def _final(self, model, response, content) -> dict:
+        final = {k: response[k] for k in STATS_FIELDS if k in response}
+        return {"model": model, "done": True, "message": {"role": "assistant", "content": content}, **final}
+
+    def _total_seconds(self, response) -> float:
+        return self._seconds(response, "total_duration") or (
+            self._first_token_seconds(response) + self._seconds(response, "eval_duration")
+        )
+
+    async def replay(self, model: str, messages: list) -> dict:
+        """Respuesta completa, como la de /api/chat sin stream."""
+        response = self._next(model, messages)
+        wait = self._total_seconds(response)
+        if wait:
+            await asyncio.sleep(wait)
+        return self._final(model, response, response["content"])
+
+    async def replay_stream(self, model: str, messages: list):
+        """Trozos de texto y el JSON final, como cloud_chat_stream."""
+        response = self._next(model, messages)
+        content = response["content"]
+        chunks = response.get("chunks") or [content[i:i + 4] for i in range(0, len(content), 4)]
+
+        first = self._first_token_seconds(response)
+        generation = self._seconds(response, "eval_duration")
+        if first:
+            await asyncio.sleep(first)
+        delay = generation / len(chunks) if chunks and generation else 0.0
+        for chunk in chunks:
+            yield chunk
+            if delay:
+                await asyncio.sleep(delay)
+        yield self._final(model, response, "")
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> LLMCassette:
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = LLMCassette()
+            if _cassette.mode != "off":
+                logger.info("Cassette del LLM en modo %s: %s", _cassette.mode, _cassette.path)
+        return _cassette
+
+
+def cassette_stats() -> dict:
+    cassette = get_cassette()
+    return {"mode": cassette.mode, "path": cassette.path, **cassette.stats}
@@ -0,0 +1,60 @@
+# backend/app/services/llm_output.py
+
+import json
+
+from pydantic import ValidationError
+
+from app.schemas.llm import LLMReply
+from app.services.stream_parser import extract_json_object
+
+# Resultado del análisis de cada respuesta del LLM:
+#   clean: JSON válido tal cual · repaired: JSON recuperado (texto alrededor, cortado, comas...)
+#   prose: sin JSON, el texto se usa como mensaje · failed: inservible (llamada al LLM desperdiciada)
+PARSE_STATS = {"replies": 0, "clean": 0, "repaired": 0, "prose": 0, "failed": 0}
+
+
+def parse_llm_reply(raw: str):
+    """
+    Convierte la salida del LLM en los campos del turno (dict sin los nulos),
+    validados con LLMReply. Devuelve None si no hay nada aprovechable.
+    """
+    PARSE_STATS["replies"] += 1
+    raw = (raw or "").strip()
+
+    try:
+        data = json.loads(raw)
+        kind = "clean" if isinstance(data, dict) else None
+    except ValueError:
+        kind = None
+    if kind is None:
+        data = extract_json_object(raw)
+        kind = "repaired" if data is not None else None
+    if kind is None:
+        if not raw:
+            PARSE_STATS["failed"] += 1
+            return None
+        # El modelo ha contestado en texto plano: mejor eso que pedir al usuario que repita
+        PARSE_STATS["prose"] += 1
+        return {"message": raw}
+
+    reply = _validate(data)
+    PARSE_STATS[kind] += 1
+    return reply.model_dump(exclude_none=True)
+
+
+def _validate(data: dict) -> LLMReply:
+    try:
+        return LLMReply.model_validate(data)
+    except ValidationError as e:
+        # Se descartan solo los campos inválidos (p. ej. una fecha mal formateada)
+        bad = {err["loc"][0] for err in e.errors() if err["loc"]}
+        return LLMReply.model_validate({k: v for k, v in data.items() if k not in bad})
+
+
+def parse_stats() -> dict:
+    replies = PARSE_STATS["replies"]
+    return {
+        **PARSE_STATS,
+        "failure_rate": PARSE_STATS["failed"] / replies if replies else 0.0,
+        "wasted_llm_calls": PARSE_STATS["failed"],
+    }
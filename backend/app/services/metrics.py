@@ -0,0 +1,238 @@
+# backend/app/services/metrics.py
+
+import os
+import math
+import logging
+import threading
+
+# Exponer /metrics (formato de texto de Prometheus)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Límites (segundos) de los histogramas de latencia: de 1 ms a 30 s
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: etiquetas {sorted(labels)}, se esperaban {list(self.labelnames)}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _labels(self.labelnames, key), value) for key, value in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    """Contador que solo sube (peticiones, tokens, errores...)."""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja (turnos en curso...)."""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribución por cubetas acumuladas, más suma y número de observaciones."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def value(self, **labels):
+        """Número de observaciones."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in sorted(self._values.items())]
+        samples = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                samples.append((f"{self.name}_bucket", _labels(self.labelnames, key, (le,)), cumulative))
+            samples.append((f"{self.name}_sum", _labels(self.labelnames, key), total))
+            samples.append((f"{self.name}_count", _labels(self.labelnames, key), count))
+        return samples
+
+
+_registry = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name, help, labels=()) -> Counter:
+    return _register(Counter(name, help, labels))
+
+
+def gauge(name, help, labels=()) -> Gauge:
+    return _register(Gauge(name, help, labels))
+
+
+def histogram(name, help, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labels, buckets))
+
+
+def register_collector(fn):
+    """
+    fn() -> [(nombre, tipo, ayuda, [({etiquetas}, valor), ...]), ...]
+    Se llama en cada lectura de /metrics: así se exponen los *_stats() que
+    ya llevan los servicios sin duplicar sus contadores.
+    """
+    with _registry_lock:
+        _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    """Todas las métricas en el formato de texto de Prometheus (0.0.4)."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+        collectors = list(_collectors)
+
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in metric.samples())
+
+    for collect in collectors:
+        try:
+            families = collect()
+        except Exception as e:
+            logger.warning("Error leyendo métricas de %s: %s", collect.__name__, e)
+            continue
+        for name, kind, help, values in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in values:
+                lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    """Pone a cero las métricas registradas (tests y benchmarks)."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        metric.clear()
+
+
+# --- Métricas del chatbot ---
+
+STAGE_SECONDS = histogram(
+    "chatbot_stage_duration_seconds", "Tiempo por etapa de un turno (llm, parse, db, backend, smtp)", ("stage",)
+)
+CHAT_TURN_SECONDS = histogram(
+    "chatbot_chat_turn_duration_seconds", "Duración total de un turno de chat", ("endpoint", "status")
+)
+CHAT_TURNS_IN_PROGRESS = gauge("chatbot_chat_turns_in_progress", "Turnos de chat en curso")
+LLM_REQUEST_SECONDS = histogram(
+    "chatbot_llm_request_duration_seconds", "Duración de cada llamada a Ollama", ("model", "mode")
+)
+LLM_ERRORS = counter("chatbot_llm_errors_total", "Llamadas a Ollama fallidas", ("model", "mode"))
+LLM_PROMPT_TOKENS = counter(
+    "chatbot_llm_prompt_tokens_total", "Tokens del prompt evaluados por Ollama (prompt_eval_count)", ("model",)
+)
+LLM_EVAL_TOKENS = counter("chatbot_llm_eval_tokens_total", "Tokens generados por Ollama (eval_count)", ("model",))
+BOOKINGS = counter("chatbot_bookings_total", "Reservas intentadas desde el chat", ("result",))
+BOOKING_CONFLICTS = counter(
+    "chatbot_booking_conflicts_total", "Reservas rechazadas porque otro cliente ya tenía el hueco", ("source",)
+)
+
+
+def record_llm_response(model: str, mode: str, seconds: float, data: dict):
+    """Latencia de la llamada y contadores de tokens del JSON final de Ollama."""
+    LLM_REQUEST_SECONDS.observe(seconds, model=model, mode=mode)
+    LLM_PROMPT_TOKENS.inc(data.get("prompt_eval_count", 0), model=model)
+    LLM_EVAL_TOKENS.inc(data.get("eval_count", 0), model=model)
+
+
+def server_timing(timings: dict, total: float = None) -> str:
+    """Cabecera Server-Timing (milisegundos) con los tiempos por etapa de la petición."""
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
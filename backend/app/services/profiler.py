@@ -0,0 +1,201 @@
+# backend/app/services/profiler.py
+
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import random
+import cProfile
+import logging
+import threading
+from datetime import datetime
+from collections import Counter
+from contextlib import contextmanager
+
+# Perfilado de peticiones de chat bajo demanda (desactivado por defecto)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Token de administración: necesario para pedir un perfil y para descargarlos
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Fracción de turnos que se perfilan sin pedirlo (0 = solo bajo demanda)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Segundos entre muestras de la pila para el fichero de flamegraph
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+logger = logging.getLogger(__name__)
+
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]")
+# cProfile no admite dos perfiles activos a la vez: una petición perfilada por proceso
+_active = threading.Lock()
+
+
+def safe_name(value: str) -> str:
+    """Nombre de fichero seguro a partir de un session_id."""
+    return _SAFE.sub("_", value)[:80] or "_"
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Muestrea la pila de un hilo cada `interval` segundos y cuenta las pilas
+    iguales. El resultado en formato "collapsed" (una pila por línea,
+    funciones separadas por ';' y el número de muestras) lo leen
+    flamegraph.pl y speedscope. Las esperas de red salen como el select
+    del event loop.
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Capture:
+    """Perfil de una petición: se rellena al salir de profile_request."""
+
+    def __init__(self, session_id, directory):
+        self.session_id = session_id
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self.id = f"{stamp}-{random.randrange(16 ** 6):06x}"
+        self.directory = os.path.join(directory, safe_name(session_id))
+        self.meta = {}
+
+    def path(self, ext) -> str:
+        return os.path.join(self.directory, f"{self.id}.{ext}")
+
+
+def is_admin(token) -> bool:
+    return bool(PROFILE_ADMIN_TOKEN) and hmac.compare_digest((token or "").encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+def should_profile(requested: bool, token: str = None) -> bool:
+    """Perfilar si un administrador lo pide (con el token) o si toca por muestreo."""
+    if not PROFILING_ENABLED:
+        return False
+    if requested:
+        return is_admin(token)
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+@contextmanager
+def profile_request(session_id: str, enabled: bool, directory=None, interval=None):
+    """
+    Ejecuta el bloque bajo cProfile (determinista, .pstats) y el muestreador
+    de pila (.collapsed) y guarda ambos en PROFILE_DIR/<session_id>/.
+    Devuelve la Capture o None si no se perfila (desactivado u otro perfil
+    en curso). En asyncio el perfil incluye a las demás corrutinas que
+    avancen mientras tanto en el mismo event loop.
+    """
+    if not enabled or not _active.acquire(blocking=False):
+        yield None
+        return
+
+    capture = Capture(session_id, directory or PROFILE_DIR)
+    sampler = StackSampler(interval=interval or PROFILE_SAMPLE_INTERVAL)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Otro perfilador activo en el proceso (p. ej. cobertura): solo muestreo
+            profiler = None
+        sampler.start()
+        try:
+            yield capture
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            sampler.stop()
+            capture.meta.update(
+                session_id=session_id,
+                id=capture.id,
+                seconds=time.perf_counter() - started,
+                samples=sum(sampler.stacks.values()),
+                created_at=datetime.now().isoformat(timespec="seconds"),
+            )
+            _save(capture, profiler, sampler)
+    finally:
+        _active.release()
+
+
+def _save(capture, profiler, sampler):
+    try:
+        os.makedirs(capture.directory, exist_ok=True)
+        if profiler is not None:
+            profiler.dump_stats(capture.path("pstats"))
+        with open(capture.path("collapsed"), "w", encoding="utf-8") as f:
+            f.write(sampler.collapsed())
+        with open(capture.path("json"), "w", encoding="utf-8") as f:
+            json.dump(capture.meta, f, ensure_ascii=False, default=str)
+        logger.info("Perfil guardado", extra={"profile_id": capture.id, "seconds": capture.meta["seconds"]})
+    except OSError as e:
+        logger.error("No se pudo guardar el perfil %s: %s", capture.id, e)
+
+
+def list_profiles(directory=None) -> list:
+    """Perfiles guardados, del más reciente al más antiguo."""
+    directory = directory or PROFILE_DIR
+    profiles = []
+    if not os.path.isdir(directory):
+        return profiles
+    for session_dir in os.listdir(directory):
+        folder = os.path.join(directory, session_dir)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(folder, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            profile_id = name[:-len(".json")]
+            meta["files"] = [
+                f"{session_dir}/{profile_id}.{ext}" for ext in ("pstats", "collapsed")
+                if os.path.exists(os.path.join(folder, f"{profile_id}.{ext}"))
+            ]
+            profiles.append(meta)
+    return sorted(profiles, key=lambda m: m.get("created_at", ""), reverse=True)
+
+
+def profile_file(session_dir: str, filename: str, directory=None):
+    """Ruta de un fichero de perfil, o None si no existe o el nombre no es válido."""
+    directory = directory or PROFILE_DIR
+    if safe_name(session_dir) != session_dir or safe_name(filename) != filename:
+        return None
+    if not filename.endswith((".pstats", ".collapsed", ".json")) or session_dir.startswith("."):
+        return None
+    path = os.path.join(directory, session_dir, filename)
+    return path if os.path.isfile(path) else None
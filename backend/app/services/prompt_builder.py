@@ -0,0 +1,184 @@
+# backend/app/services/prompt_builder.py
+
+import os
+import re
+import math
+import threading
+from collections import Counter
+
+from app.services.date_parser import normalize
+from app.services.token_counter import count_tokens
+
+# Enviar solo los fragmentos del contexto y las reglas relevantes para el turno
+PROMPT_FILTER_ENABLED = os.getenv("PROMPT_FILTER_ENABLED", "true").lower() == "true"
+# Presupuesto aproximado de tokens del prompt de sistema (sin el historial)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "900"))
+
+# Etiquetas de cada fragmento según las palabras por las que empieza alguna de sus palabras
+# (texto normalizado). Los fragmentos sin etiqueta son reglas generales y van siempre,
+# igual que las prohibiciones ("Nunca digas...").
+TAG_KEYWORDS = {
+    "services": ("servicio", "reportaje", "retrato", "cobertura", "album", "documental"),
+    "business": ("ubicacion", "desplazamiento", "publico objetivo", "filosofia", "diferenciadores"),
+    "hours": ("horario", "festivo", "lunes a sabado"),
+    "booking": ("reserv", "cita", "datos del cliente", "nombre completo", "email", "telefono"),
+    "availability": ("disponibilidad", "fecha", "get_available_slots"),
+    "policy": ("cancelacion", "reprogramar", "pago", "senal"),
+    "event": ("boda", "celebracion", "evento", "enhorabuena", "felicitalo"),
+    "reset": ("reset",),
+}
+
+# Etiquetas necesarias según la intención del turno (la del router de intenciones)
+INTENT_TAGS = {
+    "smalltalk": set(),
+    "faq": {"services", "business", "hours", "policy"},
+    "availability": {"availability", "hours", "booking"},
+    "booking": {"booking", "availability", "policy", "reset"},
+    "event": {"event", "services", "booking"},
+}
+
+# Palabras demasiado comunes para decidir la relevancia de un fragmento
+STOPWORDS = frozenset("""
+    a al algo como con de del el en es esta este esto la las le lo los mas me mi muy no o para
+    pero por que se si sin sobre su sus te tu un una uno y ya yo
+""".split())
+
+
+def _keywords(text: str):
+    # Se comparan raíces de 5 letras para que "reservar", "reserva" y "reservas" coincidan
+    return {w[:5] for w in re.findall(r"[a-z0-9_]+", normalize(text)) if w not in STOPWORDS and len(w) > 2}
+
+
+class Chunk:
+    __slots__ = ("index", "section", "text", "tags", "keywords", "tokens")
+
+    def __init__(self, index, section, text):
+        self.index = index
+        self.section = section
+        self.text = text
+        normalized = " " + normalize(text)
+        self.tags = {tag for tag, words in TAG_KEYWORDS.items() if any(" " + w in normalized for w in words)}
+        self.keywords = _keywords(text)
+        self.tokens = count_tokens(text) + 1
+
+    @property
+    def general(self) -> bool:
+        return not self.tags
+
+
+def split_chunks(text: str):
+    """
+    Parte un bloque del prompt en fragmentos: una línea por fragmento; los
+    títulos ("Servicios principales:") se unen al fragmento siguiente y las
+    líneas numeradas (ejemplos) al anterior.
+    """
+    chunks, header = [], None
+    for line in text.strip().splitlines():
+        line = line.rstrip()
+        if not line.strip():
+            continue
+        if re.match(r"\s*\d+\.\s", line) and chunks:
+            chunks[-1] += "\n" + line
+        elif line.endswith(":") and not line.lstrip().startswith("-"):
+            header = line
+        else:
+            chunks.append(f"{header}\n{line}" if header else line)
+            header = None
+    return chunks
+
+
+class PromptBuilder:
+    """
+    Prompt de sistema por turno con solo los fragmentos relevantes.
+
+    El contexto del negocio y las reglas se parten en fragmentos etiquetados e
+    indexados por palabra clave (índice invertido en memoria). En cada turno
+    entran la personalidad, el formato de respuesta, las reglas generales y los
+    fragmentos con más relevancia para la intención, el estado de la sesión y
+    el mensaje, hasta llenar el presupuesto de tokens.
+    """
+
+    def __init__(self, personality, business_context, rules, response_format, token_budget=PROMPT_TOKEN_BUDGET):
+        self.personality = personality.strip()
+        self.response_format = response_format.strip()
+        self.token_budget = token_budget
+        self.chunks = [
+            Chunk(i, section, text)
+            for i, (section, text) in enumerate(
+                [("business", t) for t in split_chunks(business_context)] +
+                [("rules", t) for t in split_chunks(rules)]
+            )
+        ]
+        self.index = {}
+        for chunk in self.chunks:
+            for word in chunk.keywords:
+                self.index.setdefault(word, []).append(chunk)
+        n = len(self.chunks)
+        self.idf = {word: math.log(1 + n / len(chunks)) for word, chunks in self.index.items()}
+        # Más unos pocos tokens por los saltos de línea entre secciones
+        self.fixed_tokens = count_tokens(self.personality) + count_tokens(self.response_format) + 8
+
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.tokens_sent = 0
+        self.tokens_full = self.fixed_tokens + sum(c.tokens for c in self.chunks)
+
+    def tags_for(self, intent=None, session=None):
+        tags = set(INTENT_TAGS.get(intent, ()))
+        session = session or {}
+        if session.get("intent") in ("check_availability", "book") or session.get("date"):
+            tags |= {"availability", "booking", "reset"}
+        if session.get("slot_confirmed"):
+            tags |= {"booking", "event"}
+        return tags
+
+    def select(self, message: str, intent=None, session=None):
+        """Fragmentos elegidos para el turno, en el orden original."""
+        tags = self.tags_for(intent, session)
+        scores = Counter()
+        matches = Counter()
+        for word in _keywords(message):
+            for chunk in self.index.get(word, ()):
+                scores[chunk.index] += self.idf[word]
+                matches[chunk.index] += 1
+        for index in list(scores):
+            # Una sola palabra en común ("hola") no basta para que un fragmento sea relevante
+            if matches[index] < 2 and not self.chunks[index].tags & tags:
+                del scores[index]
+        for chunk in self.chunks:
+            if chunk.tags & tags:
+                scores[chunk.index] += 2.0 * len(chunk.tags & tags)
+
+        selected = [c for c in self.chunks if c.general]
+        used = self.fixed_tokens + sum(c.tokens for c in selected)
+        for index, score in scores.most_common():
+            chunk = self.chunks[index]
+            if chunk.general or score <= 0:
+                continue
+            if used + chunk.tokens > self.token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk.tokens
+        return sorted(selected, key=lambda c: c.index)
+
+    def build(self, message: str, intent=None, session=None) -> str:
+        chunks = self.select(message, intent, session)
+        business = "\n".join(c.text for c in chunks if c.section == "business")
+        rules = "\n".join(c.text for c in chunks if c.section == "rules")
+        prompt = "\n\n".join(part for part in (self.personality, business, rules, self.response_format) if part)
+        prompt = f"\n{prompt}\n"
+
+        with self._lock:
+            self.turns += 1
+            self.tokens_sent += count_tokens(prompt)
+        return prompt
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg = self.tokens_sent / self.turns if self.turns else 0.0
+            return {
+                "turns": self.turns,
+                "avg_prompt_tokens": avg,
+                "full_prompt_tokens": self.tokens_full,
+                "saved_share": 1 - avg / self.tokens_full if self.turns else 0.0,
+            }
@@ -0,0 +1,86 @@
+# backend/app/services/response_cache.py
+
+import os
+
+from app.services.date_parser import normalize
+from app.services.ttl_cache import TTLCache
+
+# Caché de respuestas del LLM para turnos sin estado (saludos, preguntas frecuentes)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+
+# Solo se reutilizan respuestas de estas intenciones, sin ningún otro campo
+CACHEABLE_INTENTS = ("smalltalk", "unknown")
+
+# Si la sesión tiene cualquiera de estos campos la respuesta depende de la reserva en curso
+BOOKING_STATE_KEYS = (
+    "date", "time", "event_details", "customer_name", "customer_email",
+    "customer_phone", "event_date", "slot_confirmed",
+)
+# Con conversación previa el LLM responde según el contexto: solo se cachea el primer turno
+HISTORY_KEYS = ("history", "history_summary")
+
+
+class ResponseCache:
+    """
+    Respuestas del LLM indexadas por (business_id, versión del prompt, mensaje
+    normalizado). LRU con caducidad; al cambiar el prompt cambia la clave y
+    las entradas antiguas dejan de usarse y acaban expulsadas.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, enabled=RESPONSE_CACHE_ENABLED):
+        self.enabled = enabled
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.bypasses = 0
+        self.stores = 0
+
+    def key_for(self, business_id: str, prompt_version: str, session: dict, message: str):
+        """
+        Clave del turno, o None si no se debe usar la caché (sesión con historial
+        o con una reserva en curso).
+        Hay que calcularla antes de que el turno modifique la sesión.
+        """
+        if not self.enabled:
+            return None
+        if session.get("intent") in ("check_availability", "book") or any(
+            session.get(k) for k in BOOKING_STATE_KEYS + HISTORY_KEYS
+        ):
+            self.bypasses += 1
+            return None
+        text = normalize(message)
+        if not text:
+            return None
+        return (business_id, prompt_version, text)
+
+    def get(self, key):
+        if key is None:
+            return None
+        data = self.cache.get(key)
+        return dict(data) if data is not None else None
+
+    def store(self, key, data: dict):
+        """Guarda los campos del turno solo si es una respuesta sin estado."""
+        if key is None or data.get("intent") not in CACHEABLE_INTENTS or not data.get("message"):
+            return
+        if set(data) - {"message", "intent"}:
+            return
+        self.cache.set(key, dict(data))
+        self.stores += 1
+
+    def clear(self):
+        """Vacía la caché y pone a cero los contadores."""
+        self.cache.clear()
+        self.cache.hits = self.cache.misses = 0
+        self.bypasses = 0
+        self.stores = 0
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "bypasses": self.bypasses, "stores": self.stores}
+
+
+_CACHE = ResponseCache()
+
+
+def get_response_cache() -> ResponseCache:
+    return _CACHE
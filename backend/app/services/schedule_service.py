@@ -0,0 +1,60 @@
+from app.models.holiday import Holiday
+from app.models.schedule import WeeklySchedule, ScheduleOverride
+from app.services.business_calendar import on_weekly_schedule_changed, on_date_changed
+
+
+def set_weekly_hours(db, business_id, weekday, open_time=None, close_time=None):
+    """
+    Horario de un día de la semana (sin horas = cerrado ese día).
+    Tras guardar se avisa a la caché de disponibilidad y al calendario.
+    """
+    db.query(WeeklySchedule).filter(
+        WeeklySchedule.business_id == business_id, WeeklySchedule.weekday == weekday
+    ).delete()
+    if open_time and close_time:
+        db.add(WeeklySchedule(business_id=business_id, weekday=weekday, open_time=open_time, close_time=close_time))
+    db.commit()
+    on_weekly_schedule_changed(business_id, weekday, db)
+
+
+def set_override(db, business_id, day, closed=False, open_time=None, close_time=None):
+    """Excepción de horario para una fecha: cierre puntual u horario distinto."""
+    db.query(ScheduleOverride).filter(
+        ScheduleOverride.business_id == business_id, ScheduleOverride.date == day
+    ).delete()
+    db.add(ScheduleOverride(business_id=business_id, date=day, closed=closed, open_time=open_time, close_time=close_time))
+    db.commit()
+    on_date_changed(business_id, day, db)
+
+
+def delete_override(db, business_id, day) -> bool:
+    deleted = db.query(ScheduleOverride).filter(
+        ScheduleOverride.business_id == business_id, ScheduleOverride.date == day
+    ).delete()
+    db.commit()
+    if deleted:
+        on_date_changed(business_id, day, db)
+    return bool(deleted)
+
+
+def add_holiday(db, day, business_id=None, name=None):
+    """Festivo de un negocio o, sin business_id, de todos."""
+    exists = db.query(Holiday.id).filter(
+        Holiday.date == day,
+        Holiday.business_id.is_(None) if business_id is None else Holiday.business_id == business_id,
+    ).first()
+    if exists is None:
+        db.add(Holiday(business_id=business_id, date=day, name=name))
+        db.commit()
+    on_date_changed(business_id, day, db)
+
+
+def delete_holiday(db, day, business_id=None) -> bool:
+    deleted = db.query(Holiday).filter(
+        Holiday.date == day,
+        Holiday.business_id.is_(None) if business_id is None else Holiday.business_id == business_id,
+    ).delete(synchronize_session=False)
+    db.commit()
+    if deleted:
+        on_date_changed(business_id, day, db)
+    return bool(deleted)
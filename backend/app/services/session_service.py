@@ -1,27 +1,410 @@
 # backend/app/services/session_service.py
 
-from typing import Dict
+import os
+import json
+import asyncio
+import time
+import logging
+import atexit
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete
+
+from app.services.ttl_cache import TTLCache, approx_sizeof
+
+logger = logging.getLogger(__name__)
+
+# "database": sesiones persistidas en la BD (sobreviven a reinicios y permiten varios workers)
+# "memory": solo en memoria del proceso (un único worker)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "database")
+
+# Límites de la caché en memoria: número máximo de conversaciones
+# y segundos de inactividad tras los que una conversación se descarta.
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", "0")) or None
+
+# Write-behind: cada cuánto se vuelcan los cambios pendientes y tamaño máximo del lote
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.5"))
+SESSION_FLUSH_BATCH = int(os.getenv("SESSION_FLUSH_BATCH", "500"))
+# Segundos tras los que una sesión cacheada se revalida contra la BD (otro worker pudo cambiarla)
+SESSION_REVALIDATE_AFTER = float(os.getenv("SESSION_REVALIDATE_AFTER", "2"))
+
+
+def new_session() -> dict:
+    return {
+        "intent": None,
+        "date": None,
+        "time": None,
+        "confirmed": False
+    }
+
+
+class MemorySessionBackend:
+    """
+    Sesiones solo en memoria: LRU acotada con caducidad por inactividad.
+    """
+
+    def __init__(self, maxsize=SESSION_MAX_ENTRIES, ttl=SESSION_IDLE_TTL, max_bytes=SESSION_MAX_BYTES):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, sliding=True, sizeof=approx_sizeof, max_bytes=max_bytes)
+
+    def get(self, session_id: str) -> dict:
+        session = self.cache.get(session_id)
+        if session is None:
+            session = new_session()
+            self.cache.set(session_id, session)
+        return session
+
+    async def get_async(self, session_id: str) -> dict:
+        return self.get(session_id)
+
+    def save(self, session_id: str, session: dict):
+        # La sesión se modifica en sitio durante cada turno: actualizamos su tamaño
+        self.cache.resize(session_id)
+
+    def delete(self, session_id: str):
+        self.cache.pop(session_id, None)
+
+    def flush(self):
+        return 0
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self.cache.stats()}
+
+
+class _Entry:
+    __slots__ = ("session", "version", "checked_at", "persist")
+
+    def __init__(self, session, version, checked_at, persist=True):
+        self.session = session
+        self.version = version
+        self.checked_at = checked_at
+        # False: sesión provisional creada porque no se pudo leer la BD; no se guarda
+        self.persist = persist
+
+
+class DatabaseSessionBackend:
+    """
+    Sesiones persistidas en la base de datos (SQLite/PostgreSQL vía app.database)
+    con caché de lectura en memoria.
+
+    Las escrituras son write-behind: save() solo serializa la sesión y la deja
+    pendiente; un hilo de fondo agrupa los cambios (varios turnos de la misma
+    sesión se quedan en una sola escritura) y los vuelca por lotes en una única
+    transacción. Así un turno de chat no espera a la base de datos.
+    """
+
+    def __init__(self, engine=None, maxsize=SESSION_MAX_ENTRIES, ttl=SESSION_IDLE_TTL,
+                 max_bytes=SESSION_MAX_BYTES, flush_interval=SESSION_FLUSH_INTERVAL,
+                 batch_size=SESSION_FLUSH_BATCH, revalidate_after=SESSION_REVALIDATE_AFTER,
+                 clock=time.monotonic):
+        from app.database import engine as default_engine
+        from app.models.chat_session import ChatSession
+
+        self.engine = engine or default_engine
+        self.table = ChatSession.__table__
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.revalidate_after = revalidate_after
+        self.clock = clock
+        self.cache = TTLCache(
+            maxsize=maxsize, ttl=ttl, sliding=True,
+            sizeof=lambda e: approx_sizeof(e.session), max_bytes=max_bytes
+        )
+
+        self._pending = {}  # session_id -> (json | None si hay que borrarla, version)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._table_ready = False
+        self._last_purge = clock()
+
+        self.loads = 0
+        self.writes = 0
+        self.flushes = 0
+        self.coalesced = 0
+        self.skipped = 0
+
+    # --- API ---
+
+    def get(self, session_id: str) -> dict:
+        now = self.clock()
+        entry = self.cache.get(session_id)
+        if self._is_fresh(session_id, entry, now):
+            return entry.session
+        return self._refresh(session_id, entry, now)
+
+    async def get_async(self, session_id: str) -> dict:
+        """
+        Igual que get(), pero la revalidación y la carga desde la BD se hacen
+        en un hilo para no bloquear el event loop. Un acierto reciente en la
+        caché se resuelve sin salir del loop.
+        """
+        now = self.clock()
+        entry = self.cache.get(session_id)
+        if self._is_fresh(session_id, entry, now):
+            return entry.session
+        return await asyncio.to_thread(self._refresh, session_id, entry, now)
+
+    def save(self, session_id: str, session: dict):
+        # Se serializa ya: el hilo de fondo no debe leer un dict que se sigue modificando
+        payload = json.dumps(session, ensure_ascii=False, default=str)
+
+        entry = self.cache.peek(session_id)
+        if entry is not None and entry.session is session and not entry.persist:
+            self.skipped += 1
+            logger.warning("Sesión no guardada: no se pudo leer la versión de la BD", extra={"session_id": session_id})
+            return
+        if entry is None or entry.session is not session:
+            entry = _Entry(session, 0, self.clock())
+            self.cache.set(session_id, entry)
+        entry.version += 1
+        entry.checked_at = self.clock()
+        self.cache.resize(session_id)
+
+        with self._lock:
+            if session_id in self._pending:
+                self.coalesced += 1
+            self._pending[session_id] = (payload, entry.version)
+            pending = len(self._pending)
+
+        self._ensure_worker()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def delete(self, session_id: str):
+        self.cache.pop(session_id, None)
+        with self._lock:
+            self._pending[session_id] = (None, 0)
+        self._ensure_worker()
+
+    def flush(self) -> int:
+        """
+        Vuelca a la BD los cambios pendientes en una sola transacción.
+        Devuelve el número de sesiones escritas.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        now = datetime.now()
+        upserts = [
+            {"session_id": sid, "data": data, "version": version, "updated_at": now}
+            for sid, (data, version) in batch.items() if data is not None
+        ]
+        deletes = [sid for sid, (data, _) in batch.items() if data is None]
+
+        try:
+            self._ensure_table()
+            with self.engine.begin() as conn:
+                if upserts:
+                    conn.execute(self._upsert(), upserts)
+                if deletes:
+                    conn.execute(delete(self.table).where(self.table.c.session_id.in_(deletes)))
+        except Exception as e:
+            logger.error("Error guardando sesiones: %s", e)
+            # Reencolar lo que no se haya vuelto a modificar entretanto
+            with self._lock:
+                for sid, item in batch.items():
+                    self._pending.setdefault(sid, item)
+            return 0
+
+        self.flushes += 1
+        self.writes += len(batch)
+        return len(batch)
+
+    def purge_expired(self):
+        """
+        Borra de la BD las conversaciones inactivas más allá del TTL.
+        """
+        limit = datetime.now() - timedelta(seconds=self.ttl)
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.updated_at < limit))
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "backend": "database",
+            **self.cache.stats(),
+            "pending_writes": pending,
+            "loads": self.loads,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "coalesced_writes": self.coalesced,
+            "skipped_writes": self.skipped,
+        }
+
+    # --- Internos ---
+
+    def _is_fresh(self, session_id, entry, now) -> bool:
+        """Entrada cacheada que se puede usar sin consultar la BD."""
+        return (
+            entry is not None and entry.persist
+            and (now - entry.checked_at < self.revalidate_after or self._is_pending(session_id))
+        )
+
+    def _refresh(self, session_id, entry, now) -> dict:
+        if entry is not None and entry.persist:
+            # Otro worker puede haber avanzado la conversación desde la última lectura
+            entry.checked_at = now
+            if self._db_version(session_id) in (None, entry.version):
+                return entry.session
+
+        loaded = self._load(session_id)
+        if loaded is None:
+            # BD no disponible: se sigue con lo que haya en memoria o con una sesión
+            # provisional que save() no escribe, para no pisar la guardada
+            if entry is None:
+                entry = _Entry(new_session(), 0, now, persist=False)
+                self.cache.set(session_id, entry)
+            return entry.session
+        self.cache.set(session_id, loaded)
+        return loaded.session
+
+    def _is_pending(self, session_id):
+        with self._lock:
+            return session_id in self._pending
+
+    def _ensure_table(self):
+        if not self._table_ready:
+            self.table.create(self.engine, checkfirst=True)
+            self._table_ready = True
+
+    def _load(self, session_id):
+        """Entrada leída de la BD, o None si la lectura falla."""
+        now = self.clock()
+        try:
+            self._ensure_table()
+            with self.engine.connect() as conn:
+                row = conn.execute(
+                    select(self.table.c.data, self.table.c.version, self.table.c.updated_at)
+                    .where(self.table.c.session_id == session_id)
+                ).first()
+        except Exception as e:
+            logger.error("Error leyendo sesión: %s", e, extra={"session_id": session_id})
+            return None
+
+        self.loads += 1
+        if row is None or row.updated_at < datetime.now() - timedelta(seconds=self.ttl):
+            return _Entry(new_session(), 0, now)
+        return _Entry(json.loads(row.data), row.version, now)
+
+    def _db_version(self, session_id):
+        try:
+            with self.engine.connect() as conn:
+                return conn.execute(
+                    select(self.table.c.version).where(self.table.c.session_id == session_id)
+                ).scalar()
+        except Exception:
+            return None
+
+    def _upsert(self):
+        if self.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(self.table)
+        return stmt.on_conflict_do_update(
+            index_elements=[self.table.c.session_id],
+            set_={
+                "data": stmt.excluded.data,
+                "version": stmt.excluded.version,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._run, name="session-flusher", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self.clock() - self._last_purge > 300:
+                self._last_purge = self.clock()
+                try:
+                    self.purge_expired()
+                except Exception as e:
+                    logger.warning("Error purgando sesiones caducadas: %s", e)
+
+
+def _create_backend():
+    if SESSION_BACKEND == "memory":
+        return MemorySessionBackend()
+    return DatabaseSessionBackend()
+
+
+_BACKEND = _create_backend()
 
-_SESSIONS: Dict[str, dict] = {}
 
 def get_session(session_id: str) -> dict:
     """
     Devuelve el estado de la conversación.
-    Crea una nueva sesión si no existe.
-    """
-    if session_id not in _SESSIONS:
-        _SESSIONS[session_id] = {
-            "intent": None,
-            "date": None,
-            "time": None,
-            "confirmed": False
-        }
+    Crea una nueva sesión si no existe (o si caducó por inactividad).
+    """
+    return _BACKEND.get(session_id)
+
 
-    return _SESSIONS[session_id]
+async def get_session_async(session_id: str) -> dict:
+    """
+    get_session para el event loop: las consultas a la BD van a un hilo.
+    """
+    return await _BACKEND.get_async(session_id)
+
+
+def save_session(session_id: str, session: dict):
+    """
+    Marca la sesión como modificada al final de un turno (se persiste en segundo plano).
+    """
+    _BACKEND.save(session_id, session)
 
 
 def clear_session(session_id: str):
     """
     Resetea la sesión tras confirmar una cita.
     """
-    _SESSIONS.pop(session_id, None)
+    _BACKEND.delete(session_id)
+
+
+def flush_sessions():
+    """
+    Fuerza el volcado de los cambios pendientes (p. ej. al apagar).
+    """
+    return _BACKEND.flush()
+
+
+def close_session_store():
+    _BACKEND.close()
+
+
+def session_stats() -> dict:
+    """
+    Estado del almacén: entradas, bytes aproximados, expulsiones, escrituras pendientes...
+    """
+    return _BACKEND.stats()
+
+
+atexit.register(close_session_store)
@@ -0,0 +1,107 @@
+# backend/app/services/single_flight.py
+
+import os
+import asyncio
+import threading
+
+# Peticiones simultáneas con la misma clave comparten una sola consulta en curso
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Versión para hilos: el primero que pide una clave ejecuta fn() y los que
+    llegan mientras tanto esperan y reciben el mismo resultado (o la misma
+    excepción). Al terminar la clave se libera: no es una caché.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = SINGLE_FLIGHT_ENABLED if enabled is None else enabled
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    Versión asyncio: las corrutinas que piden la misma clave esperan a la
+    misma tarea. Si se cancela una de ellas, la consulta sigue para las demás.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = SINGLE_FLIGHT_ENABLED if enabled is None else enabled
+        self._tasks = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        # fn() -> corrutina
+        if not self.enabled:
+            return await fn()
+
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        # Una tarea de otro event loop (scripts con varios asyncio.run) no se puede esperar
+        if task is not None and task.get_loop() is loop:
+            self.shared += 1
+        else:
+            task = loop.create_task(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Nadie la espera si todos los que la pidieron se cancelaron
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._tasks)}
@@ -0,0 +1,72 @@
+# backend/app/services/slot_prefetch.py
+
+import os
+import time
+import asyncio
+
+# Consultar los huecos de la fecha del mensaje mientras responde el LLM
+SLOT_PREFETCH_ENABLED = os.getenv("SLOT_PREFETCH_ENABLED", "true").lower() == "true"
+
+PREFETCH_STATS = {"started": 0, "used": 0, "discarded": 0, "misses": 0, "saved_seconds": 0.0}
+
+
+class SlotPrefetch:
+    """
+    Consulta especulativa de huecos libres lanzada en paralelo con la llamada
+    al LLM. Si el LLM acaba pidiendo una de esas fechas se usa el resultado
+    (ya disponible o en curso); si pide otra, se consulta en ese momento y lo
+    especulado se descarta.
+    """
+
+    def __init__(self, fetch, dates):
+        # fetch(fecha) -> corrutina con la lista de huecos libres
+        self.fetch = fetch
+        self._tasks = {}
+        self._durations = {}
+        self._used = set()
+        for day in dates:
+            self._tasks[day] = asyncio.create_task(self._timed(day))
+            PREFETCH_STATS["started"] += 1
+
+    async def _timed(self, day):
+        started = time.perf_counter()
+        try:
+            return await self.fetch(day)
+        finally:
+            self._durations[day] = time.perf_counter() - started
+
+    async def slots(self, day):
+        """Huecos libres de day, del prefetch si se lanzó para esa fecha."""
+        task = self._tasks.get(day)
+        if task is None:
+            PREFETCH_STATS["misses"] += 1
+            return await self.fetch(day)
+
+        waited = time.perf_counter()
+        result = await task
+        waited = time.perf_counter() - waited
+        if day not in self._used:
+            self._used.add(day)
+            PREFETCH_STATS["used"] += 1
+            # Lo que habría tardado la consulta menos lo que aún hubo que esperar
+            PREFETCH_STATS["saved_seconds"] += max(0.0, self._durations.get(day, 0.0) - waited)
+        # Copia: el flujo reordena la lista
+        return list(result)
+
+    def close(self):
+        """Cancela (o da por descartadas) las consultas que no se han usado."""
+        for day, task in self._tasks.items():
+            if day in self._used:
+                continue
+            PREFETCH_STATS["discarded"] += 1
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Recoger el error si lo hubo para que asyncio no avise
+                task.exception()
+        self._tasks = {}
+
+
+def prefetch_stats() -> dict:
+    used = PREFETCH_STATS["used"]
+    return {**PREFETCH_STATS, "avg_saved_seconds": PREFETCH_STATS["saved_seconds"] / used if used else 0.0}
@@ -0,0 +1,285 @@
+# backend/app/services/stream_parser.py
+
+import json
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class MessageFieldStreamer:
+    """
+    Extrae de forma incremental el valor del campo "message" del JSON que
+    devuelve el LLM, a medida que llegan los trozos del stream.
+
+    feed(chunk) devuelve el texto nuevo del campo "message" (ya decodificado)
+    contenido en ese trozo. Cada carácter se procesa una sola vez, así que el
+    coste total es lineal en el tamaño de la respuesta.
+    """
+
+    def __init__(self, field: str = "message"):
+        self.field = field
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.unicode_buf = None   # dígitos pendientes de una secuencia \\uXXXX
+        self.pending_surrogate = None
+        self.expect_key = False   # el próximo string del objeto raíz es una clave
+        self.reading_key = False
+        self.key_buf = []
+        self.last_key = None
+        self.capturing = False    # estamos dentro del valor de "message"
+        self.done = False         # el valor de "message" ya se ha cerrado
+
+    def feed(self, chunk: str) -> str:
+        out = []
+        for ch in chunk:
+            if self.in_string:
+                self._string_char(ch, out)
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.reading_key = True
+                    self.key_buf = []
+                elif self.depth == 1 and self.last_key == self.field and not self.done:
+                    self.capturing = True
+            elif ch in "{[":
+                self.depth += 1
+                self.expect_key = ch == "{" and self.depth == 1
+            elif ch in "}]":
+                self.depth -= 1
+            elif ch == "," and self.depth == 1:
+                self.expect_key = True
+                self.last_key = None
+            elif ch == ":" and self.depth == 1:
+                self.expect_key = False
+
+        return "".join(out)
+
+    def _string_char(self, ch, out):
+        if self.unicode_buf is not None:
+            self.unicode_buf.append(ch)
+            if len(self.unicode_buf) == 4:
+                code = int("".join(self.unicode_buf), 16)
+                self.unicode_buf = None
+                self._emit_code(code, out)
+            return
+
+        if self.escape:
+            self.escape = False
+            if ch == "u":
+                self.unicode_buf = []
+            else:
+                self._emit(_ESCAPES.get(ch, ch), out)
+            return
+
+        if ch == "\\":
+            self.escape = True
+        elif ch == '"':
+            self.in_string = False
+            if self.reading_key:
+                self.reading_key = False
+                self.last_key = "".join(self.key_buf)
+            elif self.capturing:
+                self.capturing = False
+                self.done = True
+        else:
+            self._emit(ch, out)
+
+    def _emit_code(self, code, out):
+        # Pares sustitutos UTF-16 (emojis escapados como \\ud83d\\ude00)
+        if 0xD800 <= code <= 0xDBFF:
+            self.pending_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self.pending_surrogate is not None:
+            code = 0x10000 + ((self.pending_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self.pending_surrogate = None
+        self._emit(chr(code), out)
+
+    def _emit(self, text, out):
+        if self.reading_key:
+            self.key_buf.append(text)
+        elif self.capturing:
+            out.append(text)
+
+
+_LITERALS = ("true", "false", "null")
+
+
+class JsonRepairer:
+    """
+    Reconstruye el primer objeto JSON de la salida del LLM aunque venga
+    rodeado de texto o en un bloque ```json, con comas sobrantes o cortado
+    a medias (se cierran el string y las llaves pendientes).
+
+    feed() admite la respuesta por trozos (streaming); cada carácter se
+    procesa una sola vez, así que el coste es lineal.
+    """
+
+    def __init__(self):
+        self.out = []
+        self.stack = []            # cierres pendientes: "}" o "]"
+        self.started = False
+        self.done = False
+        self.in_string = False
+        self.escape_at = None      # posición en out de un escape todavía incompleto
+        self.unicode_left = 0
+        self.key_position = False  # el próximo string del objeto actual es una clave
+        self.string_is_key = False
+        self.after_key = False     # clave cerrada a la espera de ":"
+        self.repaired = False
+
+    def feed(self, chunk: str):
+        for ch in chunk:
+            if self.done:
+                return
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.stack.append("}")
+                    self.out.append(ch)
+                    self.key_position = True
+                continue
+            if self.in_string:
+                self._string_char(ch)
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                self.string_is_key = self.key_position and self.stack[-1] == "}"
+                self.out.append(ch)
+            elif ch in "{[":
+                self.stack.append("}" if ch == "{" else "]")
+                self.out.append(ch)
+                self.key_position = ch == "{"
+            elif ch in "}]":
+                self._strip_trailing_comma()
+                if ch != self.stack[-1]:
+                    self.repaired = True
+                self.out.append(self.stack.pop())
+                self.key_position = False
+                if not self.stack:
+                    self.done = True
+            elif ch == ",":
+                self.out.append(ch)
+                self.key_position = self.stack[-1] == "}"
+            elif ch == ":":
+                self.out.append(ch)
+                self.key_position = False
+                self.after_key = False
+            else:
+                self.out.append(ch)
+
+    def text(self):
+        """JSON reparado (o None si no había ningún objeto)."""
+        if not self.started:
+            return None
+        if self.done:
+            return "".join(self.out)
+
+        # Respuesta cortada: cerrar lo que quedó abierto
+        self.repaired = True
+        out = list(self.out)
+        after_key = self.after_key
+        if self.in_string:
+            if self.escape_at is not None:
+                del out[self.escape_at:]
+            out.append('"')
+            after_key = self.string_is_key
+        else:
+            _strip_partial_literal(out)
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ",":
+            out.pop()
+        if after_key:
+            out.append(":null")
+        elif out and out[-1] == ":":
+            out.append("null")
+        out.extend(reversed(self.stack))
+        return "".join(out)
+
+    def result(self):
+        """El objeto reparado como dict, o None si no se ha podido recuperar."""
+        text = self.text()
+        if text is None:
+            return None
+        try:
+            # strict=False: saltos de línea literales dentro de los strings
+            value = json.loads(text, strict=False)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+
+    def _string_char(self, ch):
+        self.out.append(ch)
+        if self.unicode_left:
+            self.unicode_left -= 1
+            if not self.unicode_left:
+                self.escape_at = None
+        elif self.escape_at is not None:
+            if ch == "u":
+                self.unicode_left = 4
+            else:
+                self.escape_at = None
+        elif ch == "\\":
+            self.escape_at = len(self.out) - 1
+        elif ch == '"':
+            self.in_string = False
+            if self.string_is_key:
+                self.after_key = True
+
+    def _strip_trailing_comma(self):
+        # Coma antes de } o ] (JSON inválido que algunos modelos generan)
+        end = len(self.out)
+        while end and self.out[end - 1].isspace():
+            end -= 1
+        if end and self.out[end - 1] == ",":
+            del self.out[end - 1:]
+            self.repaired = True
+
+
+def _strip_partial_literal(out):
+    # Un true/false/null o número a medio escribir no es JSON válido: se descarta
+    end = len(out)
+    start = end
+    while start and (out[start - 1].isalnum() or out[start - 1] in ".+-"):
+        start -= 1
+    token = "".join(out[start:end])
+    if not token or token in _LITERALS:
+        return
+    try:
+        float(token)
+        if not token.endswith((".", "e", "E", "+", "-")):
+            return
+    except ValueError:
+        pass
+    del out[start:]
+
+
+def extract_json_object(raw: str, max_attempts: int = 3):
+    """
+    Primer objeto JSON recuperable de raw. Si un objeto no es válido (p. ej. una
+    llave suelta en el texto previo) se prueba desde la siguiente "{", como
+    mucho max_attempts veces, así que el coste sigue siendo lineal.
+    """
+    start = raw.find("{")
+    for _ in range(max_attempts):
+        if start < 0:
+            break
+        repairer = JsonRepairer()
+        repairer.feed(raw[start:])
+        value = repairer.result()
+        if value is not None:
+            return value
+        start = raw.find("{", start + 1)
+    return None
@@ -0,0 +1,242 @@
+# backend/app/services/structured_log.py
+
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+
+# Nivel general de los loggers de la aplicación ("app.*") y niveles por logger:
+#   LOG_LEVELS="app.services.email_outbox=WARNING,app.llm_payload=INFO"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# json (una línea JSON por registro) o text (legible en desarrollo)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Registros en cola como máximo; si el hilo de escritura no da abasto se descartan
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fracción de turnos cuyo prompt y respuesta del LLM se registran (0 = ninguno)
+LOG_LLM_SAMPLE_RATE = float(os.getenv("LOG_LLM_SAMPLE_RATE", "0.0"))
+# Caracteres máximos de cada payload del LLM registrado
+LOG_LLM_MAX_CHARS = int(os.getenv("LOG_LLM_MAX_CHARS", "2000"))
+
+# Logger de los payloads del LLM (prompt y respuesta en bruto)
+PAYLOAD_LOGGER = "app.llm_payload"
+
+# Campos de los registros que nunca se escriben
+SENSITIVE_FIELDS = {
+    "customer_name", "customer_email", "customer_phone", "email", "phone", "to_email",
+    "api_key", "password", "authorization", "token", "secret",
+}
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?<![\w-])\+?\d(?:[ .]?\d){8,}(?![\w-])")
+_BEARER = re.compile(r"(?i)\bbearer\s+[\w.~+/=-]+")
+# Variables de entorno cuyo valor es una credencial
+_SECRET_ENV = re.compile(r"KEY|PASSWORD|SECRET|TOKEN", re.I)
+
+# Atributos estándar de LogRecord: el resto son campos pasados con extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_stats = {"records": 0, "dropped": 0, "payloads": 0}
+_stats_lock = threading.Lock()
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _secret_values():
+    return sorted(
+        (v for k, v in os.environ.items() if _SECRET_ENV.search(k) and v and len(v) >= 8),
+        key=len, reverse=True,
+    )
+
+
+def redact(text: str, secrets=(), values=()) -> str:
+    """Quita credenciales, emails y teléfonos de un texto, y los valores dados (datos del cliente)."""
+    for secret in secrets:
+        text = text.replace(secret, "[secret]")
+    values = {str(v).strip() for v in values if v}
+    for value in sorted((v for v in values if len(v) >= 2), key=len, reverse=True):
+        text = re.sub(rf"(?<!\w){re.escape(value)}(?!\w)", "[redacted]", text, flags=re.I)
+    text = _BEARER.sub("Bearer [secret]", text)
+    text = _EMAIL.sub("[email]", text)
+    return _PHONE.sub("[phone]", text)
+
+
+def _redact_value(key, value, secrets):
+    if key.lower() in SENSITIVE_FIELDS:
+        return "[redacted]"
+    if isinstance(value, str):
+        return redact(value, secrets)
+    if isinstance(value, dict):
+        return {k: _redact_value(k, v, secrets) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact_value("", v, secrets) for v in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos de extra={...} y sin datos sensibles."""
+
+    def __init__(self, secrets=None):
+        super().__init__()
+        self.secrets = _secret_values() if secrets is None else secrets
+
+    def fields(self, record) -> dict:
+        return {
+            key: _redact_value(key, value, self.secrets)
+            for key, value in vars(record).items() if key not in _RECORD_ATTRS
+        }
+
+    def format(self, record) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage(), self.secrets),
+            **self.fields(record),
+        }
+        exc = self.exception_text(record)
+        if exc:
+            entry["exc"] = exc
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+    def exception_text(self, record):
+        # Con la cola, la traza llega ya como texto (NonBlockingQueueHandler.prepare)
+        exc = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        return redact(exc, self.secrets) if exc else None
+
+
+class TextFormatter(JsonFormatter):
+    """Formato legible para desarrollo, con la misma redacción."""
+
+    def format(self, record) -> str:
+        fields = self.fields(record)
+        extra = " ".join(f"{k}={v}" for k, v in fields.items())
+        line = f"{datetime.fromtimestamp(record.created):%H:%M:%S} {record.levelname:<7} {record.name}: " \
+               f"{redact(record.getMessage(), self.secrets)}"
+        if extra:
+            line += f" [{extra}]"
+        exc = self.exception_text(record)
+        if exc:
+            line += "\n" + exc
+        return line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Encola el registro y vuelve: el formateo y la escritura los hace el hilo
+    del QueueListener. Con la cola llena el registro se descarta (y se cuenta)
+    en lugar de bloquear la petición.
+    """
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _stats_lock:
+                _stats["dropped"] += 1
+            return
+        with _stats_lock:
+            _stats["records"] += 1
+
+    def prepare(self, record):
+        # Igual que QueueHandler pero sin formatear aquí: solo se fija el mensaje
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Stdout:
+    """sys.stdout en el momento de escribir (puede cambiar: tests, redirecciones)."""
+
+    def write(self, text):
+        return sys.stdout.write(text)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(stream=None, level=LOG_LEVEL, levels=LOG_LEVELS, fmt=LOG_FORMAT):
+    """
+    Configura los loggers "app.*": cola sin bloqueo y un hilo que escribe en
+    stdout. Idempotente; la primera llamada es la que cuenta.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = TextFormatter() if fmt == "text" else JsonFormatter()
+        output = logging.StreamHandler(stream or _Stdout())
+        output.setFormatter(formatter)
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        app_logger = logging.getLogger("app")
+        app_logger.setLevel(level)
+        app_logger.addHandler(NonBlockingQueueHandler(log_queue))
+        app_logger.propagate = False
+        for name, logger_level in _parse_levels(levels).items():
+            logging.getLogger(name).setLevel(logger_level)
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    """Escribe lo que quede en la cola y para el hilo (al apagar)."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            app_logger = logging.getLogger("app")
+            for handler in list(app_logger.handlers):
+                if isinstance(handler, NonBlockingQueueHandler):
+                    app_logger.removeHandler(handler)
+            app_logger.propagate = True
+            _listener = None
+
+
+def sample_payloads(rate=None) -> bool:
+    """Decide (una vez por turno) si se registran el prompt y la respuesta del LLM."""
+    rate = LOG_LLM_SAMPLE_RATE if rate is None else rate
+    return rate > 0 and logging.getLogger(PAYLOAD_LOGGER).isEnabledFor(logging.INFO) and random.random() < rate
+
+
+def log_payload(kind: str, payload, max_chars=None, mask=(), **fields):
+    """
+    Registra un payload del LLM (ya muestreado) recortado a LOG_LLM_MAX_CHARS.
+    Se redacta antes de recortar (un email cortado ya no se reconoce); mask son
+    valores que tampoco deben salir, como el nombre o el teléfono del cliente.
+    """
+    max_chars = LOG_LLM_MAX_CHARS if max_chars is None else max_chars
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+    text = redact(text, _secret_values(), mask)
+    truncated = len(text) > max_chars
+    with _stats_lock:
+        _stats["payloads"] += 1
+    logging.getLogger(PAYLOAD_LOGGER).info(
+        kind, extra={"payload": text[:max_chars], "payload_chars": len(text), "truncated": truncated, **fields}
+    )
+
+
+def logging_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
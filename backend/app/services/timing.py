@@ -0,0 +1,90 @@
+# backend/app/services/timing.py
+
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+from app.services.metrics import STAGE_SECONDS
+
+# Muestras que se guardan por etapa para los percentiles
+TIMING_SAMPLES = int(os.getenv("TIMING_SAMPLES", "10000"))
+
+# Etapas medidas: LLM, interpretación de su respuesta, BD local, backend Node y correo
+STAGES = ("llm", "parse", "db", "backend", "smtp")
+
+# Tiempos por etapa de la petición en curso (None fuera de una petición)
+_current = contextvars.ContextVar("stage_timings", default=None)
+_lock = threading.Lock()
+_samples = {stage: deque(maxlen=TIMING_SAMPLES) for stage in STAGES}
+_totals = {stage: [0, 0.0] for stage in STAGES}  # etapa -> [veces, segundos]
+
+
+def record_stage(name: str, seconds: float):
+    """Suma la duración a la petición en curso y a las estadísticas globales de la etapa."""
+    timings = _current.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+    with _lock:
+        if name not in _samples:
+            _samples[name] = deque(maxlen=TIMING_SAMPLES)
+            _totals[name] = [0, 0.0]
+        _samples[name].append(seconds)
+        _totals[name][0] += 1
+        _totals[name][1] += seconds
+    STAGE_SECONDS.observe(seconds, stage=name)
+
+
+@contextmanager
+def stage(name: str):
+    """Mide el bloque como una etapa: with stage("llm"): ..."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def request_timings():
+    """Ámbito de una petición: devuelve el dict etapa -> segundos que se va llenando."""
+    timings = {}
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def percentile(values, p: float) -> float:
+    """Percentil por rango más cercano (p entre 0 y 1)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def stage_stats() -> dict:
+    """Por etapa: número de mediciones, total, media y p50/p95/p99 (segundos)."""
+    with _lock:
+        snapshot = {name: (list(_samples[name]), *_totals[name]) for name in _samples}
+    return {
+        name: {
+            "count": count,
+            "total_seconds": total,
+            "avg_seconds": total / count if count else 0.0,
+            "p50_seconds": percentile(samples, 0.50),
+            "p95_seconds": percentile(samples, 0.95),
+            "p99_seconds": percentile(samples, 0.99),
+        }
+        for name, (samples, count, total) in snapshot.items()
+    }
+
+
+def reset_stage_stats():
+    with _lock:
+        for name in _samples:
+            _samples[name].clear()
+            _totals[name] = [0, 0.0]
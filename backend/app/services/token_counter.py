@@ -0,0 +1,65 @@
+# backend/app/services/token_counter.py
+
+import os
+import re
+from functools import lru_cache
+
+# Recuento exacto con tiktoken (dependencia opcional, no está en requirements.txt).
+# Desactivado por defecto: la primera vez tiktoken descarga la codificación de
+# internet y el primer recuento se hace al importar prompt_builder, es decir, al
+# arrancar. Sin él se estima con la misma pretokenización que hacen los BPE.
+TOKENIZER_TIKTOKEN = os.getenv("TOKENIZER_TIKTOKEN", "false").lower() == "true"
+# Codificación del tokenizador (gpt-oss usa o200k)
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+
+# Trozos como los separa un BPE antes de aplicar las fusiones: palabras con su
+# espacio delante, números de hasta 3 cifras, signos y espacios
+_PRETOKEN = re.compile(r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+""")
+# Caracteres que los tokenizadores entrenados sobre todo en inglés parten más
+_RARE_CHARS = re.compile(r"[^\x00-\x7f]")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Codificación de tiktoken, cargada en el primer recuento; None si no se usa."""
+    if not TOKENIZER_TIKTOKEN:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception:
+        # Sin tiktoken o sin poder descargar la codificación: se usa la estimación
+        return None
+
+
+def _estimate(text: str) -> int:
+    tokens = 0
+    for piece in _PRETOKEN.findall(text):
+        word = piece.strip()
+        if not word:
+            tokens += 1
+        elif word[0].isalpha():
+            # Las palabras habituales son un token; las largas se parten cada ~5 letras
+            tokens += 1 if len(word) <= 7 else 1 + (len(word) - 4) // 5
+            tokens += len(_RARE_CHARS.findall(word)) // 2
+        elif word[0].isdigit():
+            tokens += 1
+        else:
+            # Los signos seguidos (", "}) se suelen fusionar de dos en dos
+            tokens += (len(word) + 1) // 2
+    return tokens
+
+
+def count_tokens(text: str) -> int:
+    """Tokens de un texto para el modelo (exacto con tiktoken, estimado si no)."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _estimate(text)
+
+
+def count_message_tokens(messages) -> int:
+    """Tokens de una lista de mensajes de chat (contenido más ~4 de formato por mensaje)."""
+    return sum(count_tokens(m.get("content", "")) + 4 for m in messages)
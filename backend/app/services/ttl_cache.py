@@ -0,0 +1,167 @@
+# backend/app/services/ttl_cache.py
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+
+def approx_sizeof(obj, _seen=None) -> int:
+    """
+    Tamaño aproximado en bytes de un objeto y de todo lo que contiene
+    (dicts, listas, strings...). Suficiente para contabilidad de memoria.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += approx_sizeof(k, _seen) + approx_sizeof(v, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += approx_sizeof(item, _seen)
+    return size
+
+
+class TTLCache:
+    """
+    Caché LRU con caducidad (TTL) y contabilidad aproximada de memoria.
+
+    - maxsize: número máximo de entradas; al superarlo se expulsa la menos usada.
+    - ttl: segundos de vida de cada entrada (None = sin caducidad).
+    - sliding: si es True el TTL cuenta desde el último acceso (caducidad por inactividad).
+    - sizeof: función para estimar el tamaño de cada valor (None = no se contabiliza).
+    - max_bytes: límite opcional de memoria aproximada.
+
+    Es segura entre hilos.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, sliding=False, sizeof=None, max_bytes=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self.sizeof = sizeof
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+        self._data = OrderedDict()  # key -> [value, expires_at, size]
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            now = self.clock()
+            if entry[1] is not None and entry[1] <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            if self.sliding and self.ttl is not None:
+                entry[1] = now + self.ttl
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key, default=None):
+        """
+        Devuelve el valor sin contar acierto/fallo ni refrescar su posición o TTL.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= self.clock()):
+                return default
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+            now = self.clock()
+            size = self.sizeof(value) if self.sizeof else 0
+            expires_at = now + self.ttl if self.ttl is not None else None
+            self._data[key] = [value, expires_at, size]
+            self._bytes += size
+
+            self._expire_front(now)
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def resize(self, key):
+        """
+        Recalcula el tamaño de una entrada cuyo valor se ha modificado en sitio.
+        """
+        if not self.sizeof:
+            return
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                new_size = self.sizeof(entry[0])
+                self._bytes += new_size - entry[2]
+                entry[2] = new_size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "approx_bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > self.clock())
+
+    def __len__(self):
+        return len(self._data)
+
+    def _remove(self, key):
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+
+    def _expire_front(self, now):
+        # Las entradas menos usadas están al principio; con TTL por inactividad
+        # son también las primeras en caducar, así que basta con mirar por delante.
+        while self._data:
+            key, entry = next(iter(self._data.items()))
+            if entry[1] is None or entry[1] > now:
+                break
+            self._remove(key)
+            self.expirations += 1
@@ -0,0 +1,40 @@
+# backend/benchmarks/app_server.py
+"""
+Arranca la app FastAPI con uvicorn en un hilo de fondo, para medir con
+conexiones HTTP reales (httpx.ASGITransport acumula la respuesta completa
+y no sirve para medir el streaming).
+"""
+
+import time
+import socket
+import threading
+
+import uvicorn
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    def __init__(self, app="app.main:app", port=None):
+        self.port = port or _free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
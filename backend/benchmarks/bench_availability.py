@@ -0,0 +1,146 @@
+# backend/benchmarks/bench_availability.py
+"""
+Microbenchmarks del motor de disponibilidad (bitsets) frente a la
+implementación anterior de get_available_slots (generate_hour_slots +
+filtro lista-en-lista), para consultas de un día y de 365 días.
+
+Usa una base de datos SQLite temporal con horario Lun-Sáb 9:00-20:00 y
+reservas aleatorias.
+
+    cd backend
+    python -m benchmarks.bench_availability --occupancy 0.4
+"""
+
+import os
+import sys
+import random
+import tempfile
+import argparse
+import timeit
+from datetime import datetime, date, time, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from app.database import Base, engine, SessionLocal
+from app.models.booking import Booking
+from app.models.schedule import WeeklySchedule
+from app.services.availability import is_holiday, get_available_slots, _load_slots
+from app.services.availability_engine import AvailabilityEngine
+
+
+# --- Implementación anterior (copiada tal cual para comparar) ---
+
+def legacy_generate_hour_slots(open_time, close_time):
+    slots = []
+    current = datetime.combine(datetime.today(), open_time)
+    end = datetime.combine(datetime.today(), close_time)
+    while current + timedelta(hours=1) <= end:
+        slots.append(current.time())
+        current += timedelta(hours=1)
+    return slots
+
+
+def legacy_get_available_slots(business_id, date, db):
+    if date < datetime.now().date():
+        return []
+    if is_holiday(date):
+        return []
+    weekday = date.weekday()
+    schedule = db.query(WeeklySchedule).filter_by(business_id=business_id, weekday=weekday).first()
+    if not schedule:
+        return []
+    all_slots = legacy_generate_hour_slots(schedule.open_time, schedule.close_time)
+    bookings = db.query(Booking).filter_by(business_id=business_id, date=date).all()
+    booked_slots = [b.start_time for b in bookings]
+    return [s for s in all_slots if s not in booked_slots]
+
+
+def seed(occupancy, days):
+    Base.metadata.create_all(bind=engine, tables=[Booking.__table__, WeeklySchedule.__table__])
+    db = SessionLocal()
+    for weekday in range(6):
+        db.add(WeeklySchedule(business_id="demo", weekday=weekday, open_time=time(9, 0), close_time=time(20, 0)))
+    rng = random.Random(42)
+    start = date.today() + timedelta(days=1)
+    count = 0
+    for d in range(days):
+        day = start + timedelta(days=d)
+        for hour in range(9, 20):
+            if rng.random() < occupancy:
+                db.add(Booking(business_id="demo", date=day, start_time=time(hour, 0)))
+                count += 1
+    db.commit()
+    return db, start, count
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    print(f"{label:<42} | {seconds * 1e6:>12.1f} µs")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--occupancy", type=float, default=0.4)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    db, start, count = seed(args.occupancy, args.days)
+    end = start + timedelta(days=args.days - 1)
+    print(f"\n>>> {count} reservas en {args.days} días (ocupación {args.occupancy:.0%})")
+    print(f"{'caso':<42} | {'tiempo':>15}")
+    print("-" * 60)
+
+    # Comprobación de equivalencia antes de medir
+    for d in range(args.days):
+        day = start + timedelta(days=d)
+        assert legacy_get_available_slots("demo", day, db) == get_available_slots("demo", day, db)
+
+    # 1. Un día, con base de datos
+    old = bench("1 día · anterior (2 consultas ORM)", lambda: legacy_get_available_slots("demo", start, db), 200)
+    new = bench("1 día · bitset (2 consultas)", lambda: _load_slots("demo", start, db), 200)
+    print(f"{'':<42} | {'x' + format(old / new, '.1f'):>15}")
+    cached = bench("1 día · caché (get_available_slots)", lambda: get_available_slots("demo", start, db), 200)
+    print(f"{'':<42} | {'x' + format(new / cached, '.1f'):>15}")
+
+    # 2. 365 días, con base de datos
+    def legacy_year():
+        return [legacy_get_available_slots("demo", start + timedelta(days=d), db) for d in range(args.days)]
+
+    def engine_year():
+        engine_ = AvailabilityEngine.from_db(db, "demo", is_holiday)
+        return engine_.free_masks(start, end, engine_.booked_masks(db, start, end))
+
+    old = bench(f"{args.days} días · anterior ({2 * args.days} consultas)", legacy_year, 3)
+    new = bench(f"{args.days} días · bitset (2 consultas)", engine_year, 3)
+    print(f"{'':<42} | {'x' + format(old / new, '.1f'):>15}")
+
+    # 3. Solo cálculo (sin base de datos)
+    engine_ = AvailabilityEngine.from_db(db, "demo", is_holiday)
+    booked = engine_.booked_masks(db, start, end)
+    booked_lists = {day: engine_.templates[day.weekday()].slots(mask) for day, mask in booked.items()}
+    days = [start + timedelta(days=d) for d in range(args.days)]
+
+    def legacy_compute():
+        for day in days:
+            if day.weekday() == 6:
+                continue
+            all_slots = legacy_generate_hour_slots(time(9, 0), time(20, 0))
+            booked_slots = booked_lists.get(day, [])
+            [s for s in all_slots if s not in booked_slots]
+
+    def engine_compute():
+        for day in days:
+            engine_.free_mask(day, booked.get(day, 0))
+
+    old = bench(f"{args.days} días · solo cálculo · anterior", legacy_compute, 20)
+    new = bench(f"{args.days} días · solo cálculo · bitset", engine_compute, 20)
+    print(f"{'':<42} | {'x' + format(old / new, '.1f'):>15}")
+
+    # 4. Siguiente hueco libre
+    bench("next_free_slot (bitset)", lambda: engine_.next_free_slot(start, booked), 2000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_availability_range.py
+"""
+Benchmark del endpoint /availability/range para la vista mensual del
+calendario: una ventana de 90 días con miles de reservas, frente a pedir
+/availability día a día.
+
+    cd backend
+    python -m benchmarks.bench_availability_range --days 90 --businesses 10
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+import statistics
+from datetime import date, timedelta, time as dtime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from fastapi.testclient import TestClient
+
+from app.database import Base, engine, SessionLocal
+from app.main import app
+from app.models.booking import Booking
+from app.models.schedule import WeeklySchedule
+
+
+def seed(businesses, days, occupancy):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    rng = random.Random(7)
+    start = date.today() + timedelta(days=1)
+    count = 0
+    for b in range(businesses):
+        business_id = f"negocio-{b}"
+        for weekday in range(6):
+            db.add(WeeklySchedule(business_id=business_id, weekday=weekday, open_time=dtime(9, 0), close_time=dtime(20, 0)))
+        for d in range(days):
+            for hour in range(9, 20):
+                if rng.random() < occupancy:
+                    db.add(Booking(business_id=business_id, date=start + timedelta(days=d), start_time=dtime(hour, 0)))
+                    count += 1
+    db.commit()
+    db.close()
+    return start, count
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--businesses", type=int, default=10)
+    parser.add_argument("--occupancy", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    start, count = seed(args.businesses, args.days, args.occupancy)
+    end = start + timedelta(days=args.days - 1)
+
+    with TestClient(app) as client:
+        def range_call():
+            resp = client.get("/availability/range", params={"business_id": "negocio-0", "from": start.isoformat(), "to": end.isoformat()})
+            resp.raise_for_status()
+
+        def per_day_calls():
+            for d in range(args.days):
+                client.get("/availability", params={"business_id": "negocio-0", "date": (start + timedelta(days=d)).isoformat()}).raise_for_status()
+
+        range_call()
+        rng_p50, rng_p95 = measure(range_call, args.repeat)
+        day_p50, day_p95 = measure(per_day_calls, max(3, args.repeat // 10))
+
+    print(f"\n>>> {count} reservas ({args.businesses} negocios), ventana de {args.days} días")
+    print(f"{'modo':<32} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    print("-" * 56)
+    print(f"{'/availability/range (1 petición)':<32} | {rng_p50:>9.1f} | {rng_p95:>9.1f}")
+    print(f"{f'/availability x {args.days}':<32} | {day_p50:>9.1f} | {day_p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
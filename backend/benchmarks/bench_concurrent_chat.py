@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_concurrent_chat.py
+"""
+Benchmark: N sesiones de chat concurrentes servidas por un único worker.
+
+Compara el endpoint antiguo (handle_chat síncrono con requests.post dentro de
+un endpoint async, que bloquea el event loop) con el flujo asíncrono actual,
+ambos contra un Ollama falso local con latencia fija.
+
+    cd backend
+    python -m benchmarks.bench_concurrent_chat --sessions 50 --latency 0.5
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_ollama import MockOllama
+
+
+async def run_blocking(url, n):
+    # Reproduce el comportamiento anterior: la llamada bloqueante se hace
+    # dentro de una corrutina, por lo que las sesiones se atienden en serie.
+    async def old_endpoint(i):
+        requests.post(f"{url}/chat", json={
+            "model": "gpt-oss:120b",
+            "messages": [{"role": "user", "content": f"hola {i}"}],
+            "stream": False
+        }, timeout=120).raise_for_status()
+
+    await asyncio.gather(*(old_endpoint(i) for i in range(n)))
+
+
+async def run_async(n):
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            resp = await client.post("/agent/chat", json={
+                "business_id": "demo",
+                "session_id": f"bench-{i}",
+                "message": "Hola"
+            })
+            resp.raise_for_status()
+
+        await asyncio.gather(*(one(i) for i in range(n)))
+
+
+def timed(coro):
+    start = time.perf_counter()
+    asyncio.run(coro)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with MockOllama(latency=args.latency) as mock:
+        os.environ["OLLAMA_API_BASE"] = mock.url
+
+        n = args.sessions
+        blocking = timed(run_blocking(mock.url, n))
+        concurrent = timed(run_async(n))
+
+    print(f"\n>>> {n} sesiones, latencia LLM {args.latency}s, 1 worker")
+    print(f"{'modo':<12} | {'total (s)':>10} | {'sesiones/s':>10}")
+    print("-" * 38)
+    print(f"{'bloqueante':<12} | {blocking:>10.2f} | {n / blocking:>10.1f}")
+    print(f"{'async':<12} | {concurrent:>10.2f} | {n / concurrent:>10.1f}")
+    print(f"\nMejora: x{blocking / concurrent:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# backend/benchmarks/bench_fast_path.py
+"""
+Porcentaje de turnos que el atajo sin LLM (parser de fechas/horas en español)
+puede responder, sobre un corpus de mensajes reales de conversaciones de
+reserva (benchmarks/corpus/chat_turns.jsonl: mensaje + estado de la sesión).
+
+También mide el coste del parser frente a una llamada al LLM.
+
+    cd backend
+    python -m benchmarks.bench_fast_path [--verbose]
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("SESSION_BACKEND", "memory")
+
+from app.services.llm_agent import fast_path_fields
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "chat_turns.jsonl")
+
+
+def load_corpus(path=CORPUS):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--today", default="2026-10-18", help="fecha de referencia (YYYY-MM-DD)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    today = date.fromisoformat(args.today)
+    turns = load_corpus(args.corpus)
+
+    served = 0
+    start = time.perf_counter()
+    decisions = [fast_path_fields(t["session"], t["message"], today) for t in turns]
+    elapsed = time.perf_counter() - start
+
+    for turn, data in zip(turns, decisions):
+        if data is not None:
+            served += 1
+        if args.verbose:
+            print(f"{'⚡' if data else '🤖'} {turn['message']!r:60} {data or ''}")
+
+    print(f"Turnos en el corpus:         {len(turns)}")
+    print(f"Respondidos sin LLM:         {served} ({served / len(turns):.1%})")
+    print(f"Coste medio del parser:      {elapsed / len(turns) * 1e6:.0f} µs/turno")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# backend/benchmarks/bench_history.py
+"""
+Tokens enviados al LLM por turno en una conversación larga: ventana fija de
+10 mensajes con el JSON completo del asistente (comportamiento anterior)
+frente al historial con presupuesto de tokens y resumen (history_manager).
+
+    cd backend
+    python -m benchmarks.bench_history --turns 60
+"""
+
+import os
+import sys
+import json
+import tempfile
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from benchmarks.bench_fast_path import load_corpus
+from benchmarks.mock_ollama import DEFAULT_REPLY
+from app.services.history_manager import record_turn, history_context
+from app.services.token_counter import count_tokens, count_message_tokens
+
+REPLY = "¡Qué bien! Te cuento: cubro la ceremonia y el banquete con un estilo natural. ¿Dónde será la celebración?"
+
+
+def legacy_history(history, message):
+    # Antes: se guardaba el JSON completo del LLM y se reenviaban los últimos 10 mensajes
+    history.append({"role": "user", "content": message})
+    history.append({"role": "assistant", "content": json.dumps({**DEFAULT_REPLY, "message": REPLY}, ensure_ascii=False)})
+    return history[-10:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=60)
+    args = parser.parse_args()
+
+    messages = [t["message"] for t in load_corpus()]
+    legacy, session = [], {}
+    checkpoints = {5, 10, 20, 40, args.turns}
+
+    print(f"{'turno':>6} {'ventana de 10 (JSON)':>22} {'presupuesto + resumen':>22}")
+    for turn in range(1, args.turns + 1):
+        message = messages[turn % len(messages)]
+        legacy = legacy_history(legacy, message)
+        record_turn(session, message, REPLY)
+        if turn in checkpoints:
+            old = count_message_tokens(legacy)
+            new = count_message_tokens(session["history"]) + count_tokens(history_context(session))
+            print(f"{turn:>6} {old:>22} {new:>22}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# backend/benchmarks/bench_llm_parsing.py
+"""
+Tasa de fallos al interpretar la salida del LLM: extracción anterior
+(re.search(r'{.*}') + json.loads) frente a parse_llm_reply (JSON reparador
+lineal + validación con Pydantic).
+
+Cada fallo es una llamada al LLM desperdiciada: el usuario recibe
+"Error procesando la respuesta." y tiene que repetir el mensaje.
+
+El corpus (benchmarks/corpus/llm_outputs.jsonl) recoge los modos de fallo
+típicos de los modelos: bloques ```json, texto antes/después, respuestas
+cortadas por max tokens, comas sobrantes, saltos de línea sin escapar...
+
+    cd backend
+    python -m benchmarks.bench_llm_parsing [--verbose] [--clean-weight 20]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_output import parse_llm_reply, parse_stats
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "llm_outputs.jsonl")
+
+
+def legacy_parse(raw):
+    """Extracción anterior de process_llm_reply (copiada tal cual para comparar)."""
+    try:
+        json_match = re.search(r'{.*}', raw, re.DOTALL)
+        if not json_match:
+            raise ValueError("No se encontró JSON en la respuesta del LLM")
+        return json.loads(json_match.group(0))
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--clean-weight", type=int, default=1,
+                        help="repeticiones de cada respuesta limpia (para simular su proporción real)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    outputs = []
+    for row in rows:
+        outputs.extend([row] * (args.clean_weight if row["kind"] == "clean" else 1))
+
+    legacy_failed = 0
+    shown = set()
+    start = time.perf_counter()
+    for row in outputs:
+        legacy = legacy_parse(row["raw"])
+        new = parse_llm_reply(row["raw"])
+        legacy_failed += legacy is None
+        if args.verbose and id(row) not in shown:
+            shown.add(id(row))
+            print(f"{row['kind']:24} antes: {'❌' if legacy is None else '✅'}  ahora: {'❌' if new is None else '✅'}  {new}")
+    elapsed = time.perf_counter() - start
+
+    stats = parse_stats()
+    n = len(outputs)
+    print(f"Respuestas analizadas:        {n}")
+    print(f"Fallos antes (regex+loads):   {legacy_failed} ({legacy_failed / n:.1%}) -> llamadas al LLM desperdiciadas")
+    print(f"Fallos ahora:                 {stats['failed']} ({stats['failure_rate']:.1%})")
+    print(f"  limpias / reparadas / texto: {stats['clean']} / {stats['repaired']} / {stats['prose']}")
+    print(f"Coste medio (ambos parsers):  {elapsed / n * 1e6:.0f} µs/respuesta")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# backend/benchmarks/bench_load.py
+"""
+Prueba de carga de los endpoints de chat y reservas.
+
+Levanta la app (uvicorn en un hilo o en proceso con ASGITransport) contra
+un Ollama, un backend Node de reservas y un servidor SMTP falsos, y lanza
+conversaciones de reserva completas con guion (saludo, disponibilidad, hora,
+detalles del evento y datos del cliente) a concurrencia creciente.
+
+Por nivel informa del rendimiento (peticiones/s y conversaciones/s), de
+p50/p95/p99 por endpoint y del desglose por etapa (LLM, BD, backend Node,
+SMTP, interpretación de la respuesta). Los resultados se guardan en JSON
+para comparar entre commits.
+
+    cd backend
+    python -m benchmarks.bench_load --levels 1,5,20 --latency 0.3 --token-rate 300
+    python -m benchmarks.bench_load --compare benchmarks/results/load-<commit>.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import argparse
+import subprocess
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+
+from benchmarks.mock_ollama import MockOllama, DEFAULT_REPLY
+from benchmarks.mock_bookings import MockBookings
+from benchmarks.mock_smtp import MockSmtp
+from app.services.date_parser import MONTHS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MONTH_NAMES = {number: name for name, number in MONTHS.items() if name != "setiembre"}
+# Horario por defecto: de lunes a sábado, huecos de 9:00 a 19:00
+HOURS = list(range(9, 20))
+
+# Respuesta del LLM para cada mensaje del guion
+SCRIPTED_REPLIES = {}
+
+
+def scripted_responder(payload):
+    # Con el prefijo estable el último mensaje es "[contexto]\n\nmensaje"
+    message = payload["messages"][-1]["content"].rsplit("\n\n", 1)[-1]
+    return SCRIPTED_REPLIES.get(message, DEFAULT_REPLY)
+
+
+def slot_for(n, first_day):
+    """Hueco (día, hora) distinto para cada conversación, saltando los domingos."""
+    day, remaining = first_day, n // len(HOURS)
+    while True:
+        if day.weekday() != 6:
+            if remaining == 0:
+                return day, HOURS[n % len(HOURS)]
+            remaining -= 1
+        day += timedelta(days=1)
+
+
+def conversation(n, day, hour):
+    """Pasos (endpoint, mensaje o parámetros) de la conversación n, registrando las respuestas del LLM."""
+    iso = day.isoformat()
+    name, email, phone = f"Cliente {n}", f"cliente{n}@example.com", f"600{n:06d}"
+    turns = [
+        ("Hola, buenas tardes", {"intent": "smalltalk", "message": "¡Hola! Soy Martín. ¿En qué puedo ayudarte?"}),
+        (f"Quería saber si tenéis hueco el {day.day} de {MONTH_NAMES[day.month]} para una sesión ({n})",
+         {"intent": "check_availability", "date": iso, "message": "Déjame mirar la agenda"}),
+        (f"Me viene bien a las {hour}, resérvamelo ({n})",
+         {"intent": "book", "date": iso, "time": f"{hour:02d}:00", "message": "¡Genial! ¿Me cuentas algo del evento?"}),
+        (f"Es una boda en una finca con 120 invitados, nos casamos el 20 de junio ({n})",
+         {"intent": "book", "event_details": "Boda en una finca, 120 invitados", "event_date": "20 de junio",
+          "message": "¡Enhorabuena! ¿A nombre de quién hago la reserva?"}),
+        (f"Me llamo {name}, mi email es {email} y mi teléfono {phone}",
+         {"intent": "book", "customer_name": name, "customer_email": email, "customer_phone": phone,
+          "message": "¡Perfecto!"}),
+    ]
+    # La mitad de las conversaciones usan el endpoint en streaming
+    endpoint = "/agent/chat/stream" if n % 2 else "/agent/chat"
+    steps = []
+    for i, (message, reply) in enumerate(turns):
+        SCRIPTED_REPLIES[message] = {**DEFAULT_REPLY, **reply}
+        steps.append((endpoint, message))
+        if i == 1:
+            # El calendario de la web consulta la disponibilidad a la vez
+            steps.append(("/availability", {"business_id": "demo", "date": iso}))
+    return steps
+
+
+async def send(client, endpoint, session_id, payload):
+    """Devuelve True si la petición ha ido bien."""
+    if endpoint == "/availability":
+        resp = await client.get(endpoint, params=payload)
+        return resp.status_code == 200
+    body = {"business_id": "demo", "session_id": session_id, "message": payload}
+    if endpoint == "/agent/chat":
+        resp = await client.post(endpoint, json=body)
+        return resp.status_code == 200 and resp.json()["status"] != "error"
+    async with client.stream("POST", endpoint, json=body) as resp:
+        done = None
+        async for line in resp.aiter_lines():
+            if line.startswith("event: done"):
+                done = True
+            elif done and line.startswith("data: "):
+                return json.loads(line[6:])["status"] != "error"
+    return False
+
+
+async def run_conversation(client, level, n, steps, latencies, errors):
+    session_id = f"load-{level}-{n}"
+    for endpoint, payload in steps:
+        started = time.perf_counter()
+        try:
+            ok = await send(client, endpoint, session_id, payload)
+        except Exception:
+            ok = False
+        latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+        if not ok:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+
+
+def summarize(values):
+    from app.services.timing import percentile
+
+    return {
+        "count": len(values),
+        "mean_ms": 1000 * sum(values) / len(values) if values else 0.0,
+        "p50_ms": 1000 * percentile(values, 0.50),
+        "p95_ms": 1000 * percentile(values, 0.95),
+        "p99_ms": 1000 * percentile(values, 0.99),
+    }
+
+
+async def wait_for_emails(smtp, expected, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while smtp.messages < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+
+async def run_level(client, level, first_n, first_day, mocks):
+    from app.services.timing import stage_stats, reset_stage_stats
+
+    ollama, bookings, smtp = mocks
+    reset_stage_stats()
+    posts_before, emails_before = bookings.count("POST"), smtp.messages
+    conversations = []
+    for n in range(first_n, first_n + level):
+        day, hour = slot_for(n, first_day)
+        conversations.append((n, conversation(n, day, hour)))
+
+    latencies, errors = {}, {}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_conversation(client, level, n, steps, latencies, errors) for n, steps in conversations))
+    elapsed = time.perf_counter() - started
+
+    bookings_created = bookings.count("POST") - posts_before
+    # Cada reserva envía la confirmación al cliente y el aviso al administrador
+    await wait_for_emails(smtp, emails_before + 2 * bookings_created)
+
+    requests_sent = sum(len(v) for v in latencies.values())
+    turns = sum(1 for _, steps in conversations for endpoint, _ in steps if endpoint != "/availability")
+    stages = {}
+    for name, s in stage_stats().items():
+        stages[name] = {
+            "count": s["count"],
+            "avg_ms": 1000 * s["avg_seconds"],
+            "p95_ms": 1000 * s["p95_seconds"],
+            "per_turn_ms": 1000 * s["total_seconds"] / turns if turns else 0.0,
+        }
+    return {
+        "concurrency": level,
+        "seconds": elapsed,
+        "requests": requests_sent,
+        "throughput_rps": requests_sent / elapsed,
+        "conversations_per_second": level / elapsed,
+        "bookings_created": bookings_created,
+        "emails_sent": smtp.messages - emails_before,
+        "errors": errors,
+        "endpoints": {endpoint: summarize(values) for endpoint, values in sorted(latencies.items())},
+        "stages": stages,
+    }
+
+
+async def run_all(args, mocks, base_url=None, app=None):
+    levels = [int(n) for n in args.levels.split(",")]
+    first_day = date.today() + timedelta(days=7)
+    limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels) * 2)
+    timeout = httpx.Timeout(120.0)
+    if app is not None:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+    else:
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout)
+
+    results, first_n = [], 0
+    async with client:
+        for level in levels:
+            result = await run_level(client, level, first_n, first_day, mocks)
+            first_n += level
+            results.append(result)
+            print_level(result)
+    return results
+
+
+def print_level(result):
+    print(f"\n>>> {result['concurrency']} conversaciones a la vez: {result['requests']} peticiones en "
+          f"{result['seconds']:.2f} s ({result['throughput_rps']:.1f} pet/s, "
+          f"{result['conversations_per_second']:.2f} conv/s), {result['bookings_created']} reservas, "
+          f"{result['emails_sent']} correos, errores {result['errors'] or 0}")
+    print(f"{'endpoint':<22} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, s in result["endpoints"].items():
+        print(f"{endpoint:<22} {s['count']:>5} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+    print(f"{'etapa':<22} {'n':>5} {'media ms':>9} {'p95 ms':>9} {'ms/turno':>9}")
+    for name, s in result["stages"].items():
+        if s["count"]:
+            print(f"{name:<22} {s['count']:>5} {s['avg_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['per_turn_ms']:>9.1f}")
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous, current):
+    """Diferencias de p95 por endpoint y nivel frente a un resultado anterior."""
+    print(f"\n>>> Comparación con {previous['commit']} ({previous['created_at']})")
+    print(f"{'nivel':>5} {'endpoint':<22} {'p95 antes':>10} {'p95 ahora':>10} {'cambio':>8}")
+    before = {r["concurrency"]: r for r in previous["levels"]}
+    for result in current["levels"]:
+        old = before.get(result["concurrency"])
+        if old is None:
+            continue
+        for endpoint, s in result["endpoints"].items():
+            if endpoint not in old["endpoints"]:
+                continue
+            p95_old, p95_new = old["endpoints"][endpoint]["p95_ms"], s["p95_ms"]
+            change = (p95_new - p95_old) / p95_old if p95_old else 0.0
+            print(f"{result['concurrency']:>5} {endpoint:<22} {p95_old:>10.1f} {p95_new:>10.1f} {change:>+8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", default="1,5,20", help="conversaciones simultáneas por nivel")
+    parser.add_argument("--latency", type=float, default=0.3, help="segundos hasta el primer token del LLM")
+    parser.add_argument("--token-rate", type=float, default=300, help="tokens/s del LLM (0 = instantáneo)")
+    parser.add_argument("--backend-latency", type=float, default=0.02, help="segundos por petición al backend Node")
+    parser.add_argument("--smtp-latency", type=float, default=0.05, help="segundos por correo")
+    parser.add_argument("--mode", choices=("uvicorn", "inprocess"), default="uvicorn")
+    parser.add_argument("--out", help="fichero JSON de resultados (por defecto benchmarks/results/load-<commit>-<fecha>.json)")
+    parser.add_argument("--compare", help="resultado JSON anterior con el que comparar")
+    args = parser.parse_args()
+
+    with MockOllama(latency=args.latency, token_rate=args.token_rate or None, responder=scripted_responder) as ollama, \
+            MockBookings(latency=args.backend_latency) as bookings, MockSmtp(latency=args.smtp_latency) as smtp:
+        # La app lee esta configuración al importarse
+        os.environ.update({
+            "OLLAMA_API_BASE": ollama.url,
+            "PROJECT_BACKEND_URL": bookings.url,
+            "SMTP_SERVER": "127.0.0.1",
+            "SMTP_PORT": str(smtp.port),
+            "SMTP_STARTTLS": "false",
+            "SMTP_USER": "estudio@example.com",
+            "SMTP_PASSWORD": "bench",
+            "ADMIN_EMAILS": "admin@example.com",
+            "OUTBOX_POLL_SECONDS": "0.2",
+        })
+        mocks = (ollama, bookings, smtp)
+
+        if args.mode == "uvicorn":
+            from benchmarks.app_server import AppServer
+
+            with AppServer() as server:
+                levels = asyncio.run(run_all(args, mocks, base_url=server.url))
+        else:
+            from app.main import app
+
+            async def in_process():
+                async with app.router.lifespan_context(app):
+                    return await run_all(args, mocks, app=app)
+
+            levels = asyncio.run(in_process())
+
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "levels": levels,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"load-{results['commit']}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados guardados en {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
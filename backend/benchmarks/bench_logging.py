@@ -0,0 +1,113 @@
+# backend/benchmarks/bench_logging.py
+"""
+Coste por turno del registro en el hilo de la petición: los print() de antes
+(mensajes completos y respuesta en bruto a stdout) frente al logging
+estructurado con cola, con distintas tasas de muestreo de los payloads.
+
+stdout es una tubería que vacía otro hilo, como el recolector de logs de un
+contenedor. Solo se mide el tiempo que pasa la petición registrando.
+
+    cd backend
+    python -m benchmarks.bench_logging --turns 2000
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from app.services import structured_log
+from app.services.llm_agent import build_messages
+from app.services.history_manager import record_turn
+from app.services.structured_log import setup_logging, sample_payloads, log_payload
+
+RAW_REPLY = '{"intent": "check_availability", "date": "2026-03-13", "message": "Déjame mirar la agenda del viernes"}'
+
+
+def sample_turn():
+    """Mensajes de un turno con algo de historial, como en una conversación real."""
+    session = {"intent": "book", "date": "2026-03-13", "customer_name": "Ana"}
+    for i in range(4):
+        record_turn(session, f"Mensaje {i} sobre la boda en la finca, 120 invitados", "¡Genial! Te cuento las opciones...")
+    return build_messages(session, "¿Tenéis libre el viernes por la tarde?", "check_availability")
+
+
+def drained_pipe():
+    read_fd, write_fd = os.pipe()
+
+    def drain():
+        with os.fdopen(read_fd, "rb") as r:
+            while r.read(65536):
+                pass
+
+    threading.Thread(target=drain, daemon=True).start()
+    # Sin búfer de bloque, como stdout con PYTHONUNBUFFERED en un contenedor
+    return os.fdopen(write_fd, "w", buffering=1)
+
+
+def old_prints(messages):
+    print(">>> Router: Decision(tier='large', model='gpt-oss:120b', reason='booking')")
+    print(">>> Enviando mensaje al modelo LLM...")
+    print(messages)
+    print(">>> Texto bruto del LLM:")
+    print(RAW_REPLY)
+
+
+def new_logging(logger, messages, rate):
+    logger.debug("Router: %s", "Decision(tier='large', model='gpt-oss:120b', reason='booking')")
+    sampled = sample_payloads(rate)
+    if sampled:
+        log_payload("llm_request", messages, session_id="bench", model="gpt-oss:120b")
+    logger.info("Turno del LLM", extra={"session_id": "bench", "raw_chars": len(RAW_REPLY)})
+    if sampled:
+        log_payload("llm_response", RAW_REPLY, session_id="bench")
+
+
+def measure(fn, turns):
+    started = time.perf_counter()
+    for _ in range(turns):
+        fn()
+    return (time.perf_counter() - started) / turns
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--rates", default="0,0.01,1")
+    args = parser.parse_args()
+
+    messages = sample_turn()
+    random.seed(1)
+    pipe = drained_pipe()
+    real_stdout = sys.stdout
+
+    sys.stdout = pipe
+    try:
+        before = measure(lambda: old_prints(messages), args.turns)
+    finally:
+        sys.stdout = real_stdout
+
+    setup_logging(stream=pipe, level="INFO")
+    logger = logging.getLogger("app.services.llm_agent")
+    rows = []
+    for rate in (float(r) for r in args.rates.split(",")):
+        rows.append((rate, measure(lambda: new_logging(logger, messages, rate), args.turns)))
+    structured_log.stop_logging()
+
+    print(f"Tamaño de los mensajes de un turno: {len(str(messages))} caracteres")
+    print(f"{'registro':<28} | {'por turno':>10}")
+    print(f"{'print() (antes)':<28} | {before * 1e6:>8.1f}µs")
+    for rate, per_turn in rows:
+        print(f"{f'logging, muestreo {rate:g}':<28} | {per_turn * 1e6:>8.1f}µs")
+    print(f"Registros descartados por cola llena: {structured_log.logging_stats()['dropped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_model_router.py
+"""
+Reparto de turnos entre el modelo pequeño y el grande que haría el router
+de intenciones sobre el corpus de conversaciones (benchmarks/corpus/chat_turns.jsonl),
+con la latencia y el coste estimados frente a mandarlo todo al modelo grande.
+
+    cd backend
+    python -m benchmarks.bench_model_router --small-latency 0.4 --large-latency 1.8 --verbose
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from benchmarks.bench_fast_path import load_corpus, CORPUS
+from app.services.intent_router import route, get_router
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--small-latency", type=float, default=0.4, help="segundos por llamada al modelo pequeño")
+    parser.add_argument("--large-latency", type=float, default=1.8, help="segundos por llamada al modelo grande")
+    parser.add_argument("--cost-ratio", type=float, default=6.0, help="coste del grande / coste del pequeño")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    turns = load_corpus(args.corpus)
+    decisions = [route(t["session"], t["message"]) for t in turns]
+    tiers = Counter(d.tier for d in decisions)
+    reasons = Counter(d.reason for d in decisions)
+
+    if args.verbose:
+        for turn, d in zip(turns, decisions):
+            print(f"{d.tier:5} {d.reason:15} {d.intent or '-':12} {turn['message']!r}")
+
+    router = get_router()
+    start = time.perf_counter()
+    for turn in turns:
+        router.classify(turn["message"])
+    classify_us = (time.perf_counter() - start) / len(turns) * 1e6
+
+    n = len(turns)
+    baseline_latency = n * args.large_latency
+    routed_latency = tiers["small"] * args.small_latency + tiers["large"] * args.large_latency
+    routed_cost = tiers["small"] / args.cost_ratio + tiers["large"]
+
+    print(f"Turnos en el corpus:          {n}")
+    print(f"Modelo pequeño / grande:      {tiers['small']} / {tiers['large']} ({tiers['small'] / n:.1%} al pequeño)")
+    print(f"Motivos:                      {dict(reasons)}")
+    print(f"Latencia media estimada:      {routed_latency / n:.2f}s (todo al grande: {baseline_latency / n:.2f}s)")
+    print(f"Coste relativo estimado:      {routed_cost / n:.1%} del coste de mandarlo todo al grande")
+    print(f"Coste del clasificador:       {classify_us:.0f} µs/turno")
+
+
+if __name__ == "__main__":
+    main()
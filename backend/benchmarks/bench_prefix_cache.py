@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_prefix_cache.py
+"""
+prompt_eval_count y prompt_eval_duration con la disposición anterior del
+prompt (filtrado por turno y con el estado de la sesión al final del prompt
+de sistema) y con el prefijo fijo (estado en el último mensaje), para varias
+sesiones intercaladas.
+
+Contra un Ollama local si responde en --url; si no, contra el Ollama falso
+con caché de prefijo simulada (--prefix-slots contextos).
+
+    cd backend
+    python -m benchmarks.bench_prefix_cache --url http://localhost:11434/api --model gpt-oss:20b
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import argparse
+from statistics import mean
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from benchmarks.bench_fast_path import load_corpus
+from benchmarks.mock_ollama import MockOllama
+from app.services.http_client import close_http_client
+
+
+def ollama_available(url):
+    try:
+        return requests.get(url.rstrip("/") + "/tags", timeout=2).ok
+    except requests.RequestException:
+        return False
+
+
+async def replay(llm_agent, turns, model, n_sessions, stable):
+    llm_agent.PROMPT_STABLE_PREFIX = stable
+    sessions = [{} for _ in range(n_sessions)]
+    counts, durations = [], []
+    # Turnos intercalados entre sesiones, como llegan en producción
+    for i, turn in enumerate(turns):
+        session = sessions[i % n_sessions]
+        session.update({k: v for k, v in turn["session"].items() if k != "history"})
+        decision = llm_agent.route(session, turn["message"])
+        messages = llm_agent.build_messages(session, turn["message"], decision.intent)
+        response = await llm_agent.cloud_chat_async(model=model, messages=messages)
+        counts.append(response.get("prompt_eval_count", 0))
+        durations.append(response.get("prompt_eval_duration", 0) / 1e6)
+        reply = llm_agent.parse_llm_reply(response["message"]["content"]) or {}
+        llm_agent.record_turn(session, turn["message"], reply.get("message", ""))
+    await close_http_client()
+    return counts, durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:11434/api")
+    parser.add_argument("--model", default="gpt-oss:20b")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--prefix-slots", type=int, default=4, help="contextos del Ollama falso")
+    parser.add_argument("--prompt-eval-rate", type=float, default=2000.0, help="tokens/s del Ollama falso")
+    args = parser.parse_args()
+
+    from app.services import llm_agent
+
+    turns = load_corpus()
+    mock = None
+    if ollama_available(args.url):
+        llm_agent.OLLAMA_API_BASE = args.url
+        print(f"Ollama en {args.url}, modelo {args.model}")
+    else:
+        mock = MockOllama(prompt_eval_rate=args.prompt_eval_rate, prefix_cache_slots=args.prefix_slots).start()
+        llm_agent.OLLAMA_API_BASE = mock.url
+        print(f"Sin Ollama en {args.url}: Ollama falso con {args.prefix_slots} contextos en caché")
+
+    try:
+        results = {}
+        for label, stable in (("prompt por turno con el estado", False), ("prefijo fijo", True)):
+            results[label] = asyncio.run(replay(llm_agent, turns, args.model, args.sessions, stable))
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    print(f"Turnos: {len(turns)} en {args.sessions} sesiones intercaladas")
+    for label, (counts, durations) in results.items():
+        print(f"{label:32} prompt_eval_count medio {mean(counts):6.0f}   prompt_eval_duration medio {mean(durations):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_prompt_size.py
+"""
+Tokens del prompt y prompt_eval_duration por turno con el prompt completo
+(PERSONALITY + BUSINESS_CONTEXT + REGLAS en cada turno) y con el prompt
+filtrado por relevancia (prompt_builder), reproduciendo el corpus de
+conversaciones (benchmarks/corpus/chat_turns.jsonl).
+
+Por defecto usa un Ollama falso que cobra el prompt a --prompt-eval-rate
+tokens/s; con --url se mide contra un Ollama real.
+
+    cd backend
+    python -m benchmarks.bench_prompt_size [--url http://localhost:11434/api --model gpt-oss:20b]
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+import argparse
+from statistics import mean
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from benchmarks.bench_fast_path import load_corpus, CORPUS
+from benchmarks.mock_ollama import MockOllama
+from app.services.http_client import close_http_client
+
+
+async def replay(llm_agent, turns, model, filtered):
+    llm_agent.PROMPT_FILTER_ENABLED = filtered
+    counts, durations = [], []
+    for turn in turns:
+        session = dict(turn["session"])
+        decision = llm_agent.route(session, turn["message"])
+        messages = llm_agent.build_messages(session, turn["message"], decision.intent)
+        response = await llm_agent.cloud_chat_async(model=model, messages=messages)
+        counts.append(response.get("prompt_eval_count", 0))
+        durations.append(response.get("prompt_eval_duration", 0) / 1e6)
+    await close_http_client()
+    return counts, durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--url", help="Ollama real (por defecto, uno falso local)")
+    parser.add_argument("--model", default="gpt-oss:120b")
+    parser.add_argument("--prompt-eval-rate", type=float, default=2000.0, help="tokens/s del Ollama falso")
+    args = parser.parse_args()
+
+    from app.services import llm_agent
+
+    turns = load_corpus(args.corpus)
+    mock = None
+    if args.url:
+        llm_agent.OLLAMA_API_BASE = args.url
+    else:
+        mock = MockOllama(prompt_eval_rate=args.prompt_eval_rate).start()
+        llm_agent.OLLAMA_API_BASE = mock.url
+
+    try:
+        results = {label: asyncio.run(replay(llm_agent, turns, args.model, filtered))
+                   for label, filtered in (("completo", False), ("filtrado", True))}
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    print(f"Turnos: {len(turns)}")
+    for label, (counts, durations) in results.items():
+        print(f"Prompt {label:9} tokens medios {mean(counts):7.0f}   prompt_eval_duration medio {mean(durations):7.1f} ms")
+    full, filtered = (mean(results[k][0]) for k in ("completo", "filtrado"))
+    print(f"Reducción de tokens del prompt: {1 - filtered / full:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_response_cache.py
+"""
+Benchmark de la caché de respuestas: primeros mensajes de conversaciones
+nuevas (saludos y preguntas frecuentes) con una distribución tipo Zipf,
+contra un Ollama falso con latencia fija. Compara caché activada y desactivada.
+
+    cd backend
+    python -m benchmarks.bench_response_cache --turns 300 --latency 0.3
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("SESSION_BACKEND", "memory")
+
+from benchmarks.mock_ollama import MockOllama
+
+OPENERS = [
+    "Hola", "hola!", "Buenas", "Buenas tardes", "¿Qué servicios ofreces?",
+    "¿Hacéis bodas?", "¿Cuánto cuesta un reportaje de boda?", "¿Dónde estáis?",
+    "¿Hacéis sesiones de retrato?", "Gracias", "¿Trabajáis fuera de la ciudad?",
+    "¿Cuánto tardáis en entregar las fotos?",
+]
+
+
+def zipf_turns(n, seed=7):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(OPENERS))]
+    return rng.choices(OPENERS, weights=weights, k=n)
+
+
+async def replay(llm_agent, messages):
+    latencies = []
+    for i, message in enumerate(messages):
+        start = time.perf_counter()
+        await llm_agent.handle_chat("demo", f"bench-cache-{i}", message)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    from app.services import llm_agent
+
+    messages = zipf_turns(args.turns)
+    with MockOllama(latency=args.latency) as mock:
+        llm_agent.OLLAMA_API_BASE = mock.url
+        for enabled in (False, True):
+            llm_agent.response_cache.enabled = enabled
+            llm_agent.response_cache.clear()
+            before = len(mock.requests)
+            latencies = asyncio.run(replay(llm_agent, messages))
+            calls = len(mock.requests) - before
+            label = "con caché" if enabled else "sin caché"
+            print(f"{label}: {calls} llamadas al LLM de {len(messages)} turnos, "
+                  f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p95 {percentile(latencies, 0.95) * 1000:.1f} ms")
+        print(f"Estadísticas de la caché: {llm_agent.response_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
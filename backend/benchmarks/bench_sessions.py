@@ -0,0 +1,102 @@
+# backend/benchmarks/bench_sessions.py
+"""
+Benchmark de memoria del almacén de sesiones.
+
+Simula cientos de miles de visitantes anónimos, cada uno con una conversación
+de 10 mensajes, y muestra la memoria usada por el almacén acotado (LRU + TTL)
+frente al dict sin expulsión que había antes.
+
+    cd backend
+    python -m benchmarks.bench_sessions --sessions 300000 --max-entries 10000
+"""
+
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ttl_cache import TTLCache, approx_sizeof
+
+
+def fill(session, i):
+    session["intent"] = "check_availability"
+    session["date"] = "2025-05-10"
+    session["history"] = [
+        {"role": "user" if j % 2 == 0 else "assistant", "content": f"mensaje {j} de la sesión {i} " * 4}
+        for j in range(10)
+    ]
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(store_get, n, checkpoints, clock, after_turn=None):
+    tracemalloc.start()
+    rows = []
+    for i in range(n):
+        # Un visitante nuevo cada 10 ms de tiempo simulado
+        clock.now = i * 0.01
+        fill(store_get(f"web-{i}"), i)
+        if after_turn:
+            after_turn(f"web-{i}")
+        if i + 1 in checkpoints:
+            current, _ = tracemalloc.get_traced_memory()
+            rows.append((i + 1, current))
+    tracemalloc.stop()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=300000)
+    parser.add_argument("--max-entries", type=int, default=10000)
+    parser.add_argument("--idle-ttl", type=float, default=600)
+    parser.add_argument("--legacy-limit", type=int, default=50000,
+                        help="sesiones a simular con el dict antiguo (crece sin límite)")
+    args = parser.parse_args()
+
+    step = max(1, args.sessions // 6)
+    checkpoints = set(range(step, args.sessions + 1, step))
+
+    clock = Clock()
+    store = TTLCache(maxsize=args.max_entries, ttl=args.idle_ttl, sliding=True, sizeof=approx_sizeof, clock=clock)
+
+    def bounded_get(sid):
+        session = store.get(sid)
+        if session is None:
+            session = {"intent": None, "date": None, "time": None, "confirmed": False}
+            store.set(sid, session)
+        return session
+
+    legacy = {}
+
+    def legacy_get(sid):
+        return legacy.setdefault(sid, {"intent": None, "date": None, "time": None, "confirmed": False})
+
+    bounded = run(bounded_get, args.sessions, checkpoints, clock, after_turn=store.resize)
+    legacy_rows = run(legacy_get, args.legacy_limit, {c for c in checkpoints if c <= args.legacy_limit} | {args.legacy_limit}, Clock())
+
+    print(f"\n>>> Almacén acotado (max {args.max_entries} entradas, TTL inactividad {args.idle_ttl}s)")
+    print(f"{'sesiones':>10} | {'memoria (MB)':>12}")
+    print("-" * 27)
+    for n, mem in bounded:
+        print(f"{n:>10} | {mem / 1e6:>12.1f}")
+    print(f"Estadísticas: {store.stats()}")
+
+    print("\n>>> Dict antiguo sin expulsión")
+    print(f"{'sesiones':>10} | {'memoria (MB)':>12}")
+    print("-" * 27)
+    for n, mem in legacy_rows:
+        print(f"{n:>10} | {mem / 1e6:>12.1f}")
+    per_session = legacy_rows[-1][1] / legacy_rows[-1][0]
+    print(f"Extrapolado a {args.sessions} sesiones: {per_session * args.sessions / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_single_flight.py
+"""
+Pico de consultas simultáneas al mismo día (p. ej. una promoción que sale a
+la vez para muchas sesiones): consultas a la BD y tiempo total según la
+concurrencia, con y sin single-flight delante de get_available_slots.
+
+    cd backend
+    python -m benchmarks.bench_single_flight --query-latency 0.005
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import threading
+from datetime import date, time as time_type, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.booking import Booking
+from app.models.schedule import WeeklySchedule
+from app.services import availability
+from app.services.availability_cache import get_availability_cache
+
+
+def seed(query_latency):
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/single-flight.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[Booking.__table__, WeeklySchedule.__table__])
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for weekday in range(6):
+            db.add(WeeklySchedule(business_id="promo", weekday=weekday, open_time=time_type(9, 0), close_time=time_type(20, 0)))
+        db.commit()
+
+    queries = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*args):
+        # Latencia de red de una BD remota
+        queries.append(1)
+        time.sleep(query_latency)
+
+    return Session, queries
+
+
+def burst(Session, day, concurrency):
+    barrier = threading.Barrier(concurrency)
+
+    def worker():
+        barrier.wait()
+        with Session() as db:
+            availability.get_available_slots("promo", day, db)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--query-latency", type=float, default=0.005)
+    parser.add_argument("--levels", default="1,10,50,100")
+    args = parser.parse_args()
+
+    Session, queries = seed(args.query_latency)
+    day = date.today() + timedelta(days=14 + (5 - date.today().weekday()) % 7)
+
+    print(f"{'concurrencia':>12} | {'consultas sin':>13} {'tiempo sin':>11} | {'consultas con':>13} {'tiempo con':>11}")
+    for level in (int(n) for n in args.levels.split(",")):
+        row = []
+        for enabled in (False, True):
+            availability._slots_flight.enabled = enabled
+            get_availability_cache().clear()
+            queries.clear()
+            elapsed = burst(Session, day, level)
+            row.append((len(queries), elapsed))
+        (q_off, t_off), (q_on, t_on) = row
+        print(f"{level:>12} | {q_off:>13} {t_off * 1000:>9.0f}ms | {q_on:>13} {t_on * 1000:>9.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
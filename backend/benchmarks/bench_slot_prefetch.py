@@ -0,0 +1,78 @@
+# backend/benchmarks/bench_slot_prefetch.py
+"""
+Latencia de los turnos de disponibilidad con y sin la consulta especulativa
+de huecos en paralelo con el LLM (slot_prefetch). El LLM (MockOllama) y el
+backend de reservas se simulan con latencias fijas.
+
+    cd backend
+    python -m benchmarks.bench_slot_prefetch --turns 20 --llm-latency 0.8 --slots-latency 0.15
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import argparse
+import statistics
+from datetime import date, time as time_type, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from benchmarks.mock_ollama import MockOllama, DEFAULT_REPLY
+from app.services import llm_agent, slot_prefetch
+from app.services.date_parser import MONTHS
+
+MONTH_NAMES = {number: name for name, number in MONTHS.items() if name != "setiembre"}
+
+
+async def run(turns, enabled, slots_latency):
+    llm_agent.SLOT_PREFETCH_ENABLED = enabled
+
+    async def fake_slots(business_id, day):
+        await asyncio.sleep(slots_latency)
+        return [time_type(10, 0), time_type(17, 0)]
+
+    llm_agent.get_supabase_slots_async = fake_slots
+    latencies = []
+    for i in range(turns):
+        day = date.today() + timedelta(days=7 + i)
+        message = f"Me caso el {day.day} de {MONTH_NAMES[day.month]}, ¿tenéis hueco ese día para las fotos?"
+        started = time.perf_counter()
+        await llm_agent.handle_chat("demo", f"bench-prefetch-{enabled}-{i}", message)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--slots-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    def responder(payload):
+        # El LLM devuelve la fecha que aparece en el mensaje
+        text = payload["messages"][-1]["content"]
+        for offset in range(7, 7 + args.turns):
+            day = date.today() + timedelta(days=offset)
+            if f"el {day.day} de {MONTH_NAMES[day.month]}" in text:
+                return {**DEFAULT_REPLY, "intent": "check_availability", "date": day.isoformat(), "message": "Miro la agenda"}
+        return DEFAULT_REPLY
+
+    with MockOllama(latency=args.llm_latency, responder=responder) as mock:
+        llm_agent.OLLAMA_API_BASE = mock.url
+        print(f"{'modo':<12} {'media (s)':>10} {'p95 (s)':>10}")
+        for label, enabled in (("secuencial", False), ("prefetch", True)):
+            latencies = asyncio.run(run(args.turns, enabled, args.slots_latency))
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            print(f"{label:<12} {statistics.mean(latencies):>10.3f} {p95:>10.3f}")
+
+    stats = slot_prefetch.prefetch_stats()
+    print(f"\nprefetch: lanzadas={stats['started']} usadas={stats['used']} descartadas={stats['discarded']} "
+          f"ahorro medio={stats['avg_saved_seconds'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# backend/benchmarks/bench_streaming.py
+"""
+Benchmark: tiempo hasta el primer token (TTFT) de /agent/chat frente a
+/agent/chat/stream, contra un Ollama falso con latencia de evaluación del
+prompt y velocidad de generación configurables.
+
+    cd backend
+    python -m benchmarks.bench_streaming --latency 0.8 --token-rate 40
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.mock_ollama import MockOllama
+from benchmarks.app_server import AppServer
+
+
+async def measure(client, path, i):
+    body = {"business_id": "demo", "session_id": f"ttft-{path}-{i}", "message": "Hola"}
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", path, json=body) as resp:
+        async for line in resp.aiter_lines():
+            # En /chat el primer texto visible llega con la respuesta completa
+            if first is None and (path == "/agent/chat" or line.startswith("event: token")):
+                first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return first if first is not None else total, total
+
+
+async def run(base_url, path, n):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        return [await measure(client, path, i) for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.8)
+    parser.add_argument("--token-rate", type=float, default=40)
+    args = parser.parse_args()
+
+    with MockOllama(latency=args.latency, token_rate=args.token_rate) as mock:
+        os.environ["OLLAMA_API_BASE"] = mock.url
+        with AppServer() as server:
+            results = {
+                path: asyncio.run(run(server.url, path, args.requests))
+                for path in ("/agent/chat", "/agent/chat/stream")
+            }
+
+    print(f"\n>>> latencia prompt {args.latency}s, {args.token_rate} tokens/s, {args.requests} peticiones")
+    print(f"{'endpoint':<20} | {'TTFT p50 (ms)':>13} | {'total p50 (ms)':>14}")
+    print("-" * 53)
+    for path, samples in results.items():
+        ttft = statistics.median(s[0] for s in samples) * 1000
+        total = statistics.median(s[1] for s in samples) * 1000
+        print(f"{path:<20} | {ttft:>13.0f} | {total:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# backend/benchmarks/mock_bookings.py
+"""
+Backend Node de reservas falso (/api/bookings) para benchmarks y tests.
+
+GET  /api/bookings?business_id=...&date=...  -> reservas de ese día
+POST /api/bookings                           -> 201, o 409 si el hueco ya está cogido
+
+Uso:
+    with MockBookings(latency=0.05) as backend:
+        client = BookingsClient(base_url=backend.url)
+"""
+
+import json
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        mock = self.server.mock
+        url = urlparse(self.path)
+        if url.path != "/api/bookings":
+            self._send(404, {"error": "not found"})
+            return
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        mock._record("GET", query, self.client_address)
+        time.sleep(mock.latency)
+        with mock._lock:
+            rows = [b for b in mock.bookings if b["business_id"] == query.get("business_id") and b["date"] == query.get("date")]
+        self._send(200, rows)
+
+    def do_POST(self):
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        mock._record("POST", payload, self.client_address)
+        time.sleep(mock.latency)
+        if mock.add_booking(payload["business_id"], payload["date"], payload["start_time"]):
+            self._send(201, payload)
+        else:
+            self._send(409, {"error": "slot taken"})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class MockBookings:
+    """
+    Backend de reservas falso en un hilo de fondo.
+
+    latency: segundos que tarda cada petición.
+    requests: (método, parámetros o cuerpo) de cada petición recibida.
+    connections: direcciones de cliente distintas vistas (para comprobar el keep-alive).
+    """
+
+    def __init__(self, latency=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.bookings = []
+        self.requests = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def add_booking(self, business_id, date, start_time) -> bool:
+        start_time = start_time if len(start_time) > 5 else f"{start_time}:00"
+        with self._lock:
+            if any(b["business_id"] == business_id and b["date"] == date and b["start_time"] == start_time
+                   for b in self.bookings):
+                return False
+            self.bookings.append({"business_id": business_id, "date": date, "start_time": start_time})
+            return True
+
+    def count(self, method):
+        with self._lock:
+            return sum(1 for m, _ in self.requests if m == method)
+
+    def _record(self, method, data, client_address):
+        with self._lock:
+            self.requests.append((method, data))
+            self.connections.add(client_address)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
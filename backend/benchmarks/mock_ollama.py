@@ -0,0 +1,211 @@
+# backend/benchmarks/mock_ollama.py
+"""
+Servidor Ollama falso para benchmarks y tests.
+
+Responde a POST .../chat con el mismo formato que Ollama (/api/chat), con una
+latencia configurable, sin necesidad de API key ni red.
+
+Uso:
+    with MockOllama(latency=0.5) as mock:
+        os.environ["OLLAMA_API_BASE"] = mock.url
+"""
+
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = {
+    "message": "¡Hola! Soy Martín. ¿En qué puedo ayudarte?",
+    "intent": "smalltalk",
+    "date": None,
+    "time": None,
+    "event_details": None,
+    "customer_name": None,
+    "customer_email": None,
+    "customer_phone": None,
+    "event_date": None,
+}
+
+
+def default_responder(payload):
+    return DEFAULT_REPLY
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.endswith("/chat"):
+            self.send_error(404)
+            return
+
+        mock._record(payload)
+        reply = mock.responder(payload)
+        content = reply if isinstance(reply, str) else json.dumps(reply, ensure_ascii=False)
+        tokens = mock.tokenize(content)
+        final = {
+            "model": payload.get("model"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": mock.uncached_prompt_tokens(payload),
+            "eval_count": len(tokens),
+        }
+
+        start = time.perf_counter()
+        # Evaluación del prompt: latencia fija más el tiempo proporcional a sus tokens
+        prompt_eval = mock.latency + (final["prompt_eval_count"] / mock.prompt_eval_rate if mock.prompt_eval_rate else 0.0)
+        time.sleep(prompt_eval)
+        final["prompt_eval_duration"] = int(prompt_eval * 1e9)
+
+        if payload.get("stream"):
+            self._stream(mock, tokens, final, start)
+            return
+
+        time.sleep(len(tokens) * mock.token_delay)
+        final["message"] = {"role": "assistant", "content": content}
+        final["total_duration"] = int((time.perf_counter() - start) * 1e9)
+        body = json.dumps(final).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, mock, tokens, final, start):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for token in tokens:
+            self._chunk({
+                "model": final["model"],
+                "message": {"role": "assistant", "content": token},
+                "done": False,
+            })
+            time.sleep(mock.token_delay)
+
+        final["message"] = {"role": "assistant", "content": ""}
+        final["total_duration"] = int((time.perf_counter() - start) * 1e9)
+        self._chunk(final)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, obj):
+        data = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # El backlog por defecto (5) rechaza conexiones cuando hay muchas sesiones a la vez
+    request_queue_size = 1024
+
+
+class MockOllama:
+    """
+    Ollama falso en un hilo de fondo.
+
+    latency: segundos hasta el primer token (evaluación del prompt).
+    token_rate: tokens generados por segundo (None = instantáneo).
+    prompt_eval_rate: tokens del prompt evaluados por segundo (None = sin coste por token).
+    prefix_cache_slots: simula la caché de prefijo (KV) de Ollama con ese número de
+        contextos; solo se evalúa (y se cobra) la parte del prompt que no coincide
+        con el prefijo de alguno de ellos. 0 = sin caché.
+    responder: función(payload) -> dict|str con el contenido del mensaje del asistente.
+    """
+
+    def __init__(self, latency=0.0, token_rate=None, responder=None, host="127.0.0.1", port=0, prompt_eval_rate=None,
+                 prefix_cache_slots=0):
+        self.latency = latency
+        self.token_delay = 1.0 / token_rate if token_rate else 0.0
+        self.prompt_eval_rate = prompt_eval_rate
+        self.prefix_cache_slots = prefix_cache_slots
+        self._slots = []  # prompts evaluados recientemente, el más reciente al final
+        self.responder = responder or default_responder
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    @staticmethod
+    def prompt_tokens(payload):
+        # Aproximación habitual: ~4 caracteres por token
+        chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+        return max(1, chars // 4)
+
+    def uncached_prompt_tokens(self, payload):
+        if not self.prefix_cache_slots:
+            return self.prompt_tokens(payload)
+        prompt = "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in payload.get("messages", []))
+        with self._lock:
+            # Como llama.cpp: se usa el contexto con el prefijo común más largo
+            best, cached = None, 0
+            for i, previous in enumerate(self._slots):
+                common = len(os.path.commonprefix([previous, prompt]))
+                if common > cached:
+                    best, cached = i, common
+            if best is not None:
+                self._slots.pop(best)
+            elif len(self._slots) >= self.prefix_cache_slots:
+                self._slots.pop(0)
+            self._slots.append(prompt)
+        return max(1, (len(prompt) - cached) // 4)
+
+    @staticmethod
+    def tokenize(content):
+        # Trozos de ~4 caracteres, parecido a lo que emite el modelo real
+        return [content[i:i + 4] for i in range(0, len(content), 4)] or [""]
+
+    def _record(self, payload):
+        with self._lock:
+            self.requests.append(payload)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ollama falso para pruebas locales")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--token-rate", type=float, default=None)
+    args = parser.parse_args()
+
+    mock = MockOllama(latency=args.latency, token_rate=args.token_rate, port=args.port)
+    print(f">>> Mock Ollama escuchando en {mock.url} (latencia {args.latency}s)")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
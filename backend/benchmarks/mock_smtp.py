@@ -0,0 +1,84 @@
+# backend/benchmarks/mock_smtp.py
+"""
+Servidor SMTP falso (sin TLS) para benchmarks y tests. Acepta cualquier
+usuario y contraseña (AUTH PLAIN) y todos los correos, tarda `latency`
+segundos en cada uno y los cuenta.
+
+Uso:
+    with MockSmtp(latency=0.05) as smtp:
+        os.environ.update(SMTP_SERVER="127.0.0.1", SMTP_PORT=str(smtp.port), SMTP_STARTTLS="false",
+                          SMTP_USER="estudio@example.com", SMTP_PASSWORD="x")
+"""
+
+import time
+import threading
+import socketserver
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        mock = self.server.mock
+        self.reply("220 mock ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-mock")
+                self.reply("250 AUTH PLAIN")
+            elif command.startswith("HELO"):
+                self.reply("250 mock")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authentication successful")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(mock.latency)
+                with mock._lock:
+                    mock.messages += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                # MAIL FROM, RCPT TO, RSET, NOOP...
+                self.reply("250 OK")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockSmtp:
+    def __init__(self, latency=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.messages = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Base de datos temporal para los tests: nunca tocar backend/bookings.db
+_TMP_DIR = tempfile.mkdtemp(prefix="crm-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP_DIR}/test.db")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _empty_response_cache():
+    # Cada test empieza sin respuestas, disponibilidad ni calendarios cacheados de otros tests
+    from app.services.response_cache import get_response_cache
+    from app.services.availability_cache import get_availability_cache
+    from app.services.business_calendar import _CALENDARS
+    get_response_cache().clear()
+    get_availability_cache().clear()
+    _CALENDARS.clear()
+    yield
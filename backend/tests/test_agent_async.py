@@ -0,0 +1,24 @@
+import time
+import asyncio
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent
+
+
+def test_handle_chat_sessions_run_concurrently(monkeypatch):
+    with MockOllama(latency=0.3) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+
+        async def run():
+            return await asyncio.gather(*(
+                llm_agent.handle_chat("demo", f"async-{i}", "Hola") for i in range(10)
+            ))
+
+        start = time.perf_counter()
+        results = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+
+    assert len(mock.requests) == 10
+    assert all(r["status"] == "success" for r in results)
+    # En serie serían ~3s; en paralelo apenas algo más que una sola llamada
+    assert elapsed < 1.5
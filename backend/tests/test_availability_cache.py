@@ -0,0 +1,161 @@
+import json
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.booking import Booking
+from app.models.holiday import Holiday
+from app.models.schedule import WeeklySchedule, ScheduleOverride
+from app.models.email_outbox import EmailOutbox
+from app.schemas.booking import BookingCreate
+from app.services import availability
+from app.services.availability_cache import AvailabilityCache, RedisInvalidationBus, get_availability_cache
+from app.services.booking_service import create_booking, SlotTakenError
+from app.services.business_calendar import on_weekly_schedule_changed
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/availability-cache.db")
+    Base.metadata.create_all(bind=engine, tables=[
+        Booking.__table__, WeeklySchedule.__table__, ScheduleOverride.__table__, Holiday.__table__, EmailOutbox.__table__,
+    ])
+    session = sessionmaker(bind=engine)()
+    for weekday in range(6):
+        session.add(WeeklySchedule(business_id="demo", weekday=weekday, open_time=time(9, 0), close_time=time(20, 0)))
+    session.commit()
+
+    session.queries = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*args):
+        session.queries += 1
+
+    yield session
+    session.close()
+
+
+def next_weekday(weekday):
+    day = date.today() + timedelta(days=7)
+    return day + timedelta(days=(weekday - day.weekday()) % 7)
+
+
+def test_repeated_reads_skip_the_database(db):
+    monday = next_weekday(0)
+    first = availability.get_available_slots("demo", monday, db)
+    queries = db.queries
+    assert availability.get_available_slots("demo", monday, db) == first
+    assert db.queries == queries
+
+    stats = get_availability_cache().stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_booking_creation_invalidates_the_day(db):
+    tuesday = next_weekday(1)
+    assert time(10, 0) in availability.get_available_slots("demo", tuesday, db)
+
+    create_booking(db, BookingCreate(
+        business_id="demo", date=tuesday, start_time=time(10, 0), customer_name="Ana", customer_email="ana@example.com"
+    ))
+    assert time(10, 0) not in availability.get_available_slots("demo", tuesday, db)
+    assert get_availability_cache().stats()["invalidations"]["day"] == 1
+
+
+def test_deletion_published_by_the_bookings_app_frees_the_slot(db):
+    # agente_de_reservas borra la reserva (delete_booking) y publica en el canal de Redis
+    tuesday = next_weekday(1)
+    booking = create_booking(db, BookingCreate(
+        business_id="demo", date=tuesday, start_time=time(11, 0), customer_name="Ana", customer_email="ana@example.com"
+    ))
+    assert time(11, 0) not in availability.get_available_slots("demo", tuesday, db)
+    db.query(Booking).filter_by(id=booking.id).delete()
+    db.commit()
+
+    bus = RedisInvalidationBus.__new__(RedisInvalidationBus)
+    bus.origin, bus.cache = "este-worker", get_availability_cache()
+    message = {"origin": "agente_de_reservas", "business_id": "demo", "date": str(tuesday)}
+    bus._on_message({"data": json.dumps(message)})
+
+    assert time(11, 0) in availability.get_available_slots("demo", tuesday, db)
+    assert get_availability_cache().stats()["invalidations"]["remote"] == 1
+
+
+def test_schedule_change_invalidates_the_whole_business(db):
+    wednesday = next_weekday(2)
+    assert len(availability.get_available_slots("demo", wednesday, db)) == 11
+
+    db.query(WeeklySchedule).filter_by(business_id="demo", weekday=2).update({"close_time": time(14, 0)})
+    db.commit()
+    on_weekly_schedule_changed("demo", 2, db)
+
+    assert len(availability.get_available_slots("demo", wednesday, db)) == 5
+
+
+def test_invalidations_are_published_to_other_workers():
+    published = []
+
+    class Bus:
+        def publish(self, business_id, day, calendar=False):
+            published.append((business_id, day))
+
+    worker = AvailabilityCache(bus=Bus())
+    other = AvailabilityCache()
+    day = next_weekday(3)
+    for cache in (worker, other):
+        cache.get_or_load("demo", day, lambda: [time(9, 0)])
+
+    worker.invalidate("demo", day)
+    # Lo que haría el bus en el otro worker al recibir el aviso
+    for business_id, published_day in published:
+        other.invalidate(business_id, published_day, publish=False)
+
+    assert published == [("demo", day)]
+    assert other.get_or_load("demo", day, lambda: []) == []
+
+
+def test_remote_schedule_change_drops_the_calendar_index():
+    from app.services import business_calendar
+
+    business_calendar._CALENDARS["demo"] = business_calendar.BusinessCalendar("demo", business_calendar.DEFAULT_WEEKLY_HOURS)
+    bus = RedisInvalidationBus.__new__(RedisInvalidationBus)
+    bus.origin, bus.cache = "este-worker", get_availability_cache()
+    bus._on_message({"data": json.dumps({"origin": "otro", "business_id": "demo", "date": None, "calendar": True})})
+
+    assert "demo" not in business_calendar._CALENDARS
+
+
+def test_booking_conflict_invalidates_the_day(db):
+    thursday = next_weekday(3)
+    booking = BookingCreate(
+        business_id="demo", date=thursday, start_time=time(12, 0), customer_name="Ana", customer_email="ana@example.com"
+    )
+    create_booking(db, booking)
+    # Otro worker ya tiene el hueco libre en caché: el conflicto también la invalida
+    with pytest.raises(SlotTakenError):
+        create_booking(db, booking.model_copy(update={"customer_email": "otra@example.com"}))
+    assert get_availability_cache().stats()["invalidations"]["day"] == 2
+
+
+@pytest.mark.parametrize("status, day_invalidations", [(201, 1), (409, 1), (500, 0)])
+def test_chat_booking_invalidates_only_once_the_outcome_is_known(monkeypatch, status, day_invalidations):
+    import asyncio
+    import httpx
+    from app.services import llm_agent
+
+    class Backend:
+        async def create_booking(self, payload):
+            return httpx.Response(status, json={})
+
+    monkeypatch.setattr(llm_agent, "get_bookings_client", lambda: Backend())
+    monkeypatch.setattr(llm_agent, "queue_booking_emails", lambda session: 0)
+    session = {"date": str(next_weekday(4)), "time": "10:00", "customer_name": "Ana"}
+    try:
+        asyncio.run(llm_agent.create_event_async("demo", session))
+    except SlotTakenError:
+        assert status == 409
+    assert get_availability_cache().stats()["invalidations"]["day"] == day_invalidations
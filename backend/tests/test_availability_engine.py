@@ -0,0 +1,83 @@
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.booking import Booking
+from app.models.holiday import Holiday
+from app.models.schedule import WeeklySchedule, ScheduleOverride
+from app.services import availability
+from app.services.availability_engine import AvailabilityEngine, compile_template
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/availability.db")
+    Base.metadata.create_all(bind=engine, tables=[
+        Booking.__table__, WeeklySchedule.__table__, ScheduleOverride.__table__, Holiday.__table__,
+    ])
+    session = sessionmaker(bind=engine)()
+    for weekday in range(6):
+        session.add(WeeklySchedule(business_id="demo", weekday=weekday, open_time=time(9, 0), close_time=time(20, 0)))
+    session.commit()
+    yield session
+    session.close()
+
+
+def next_weekday(weekday):
+    day = date.today() + timedelta(days=7)
+    return day + timedelta(days=(weekday - day.weekday()) % 7)
+
+
+def book(db, day, hour):
+    db.add(Booking(business_id="demo", date=day, start_time=time(hour, 0)))
+    db.commit()
+
+
+def test_template_matches_hour_slots():
+    template = compile_template(time(9, 30), time(13, 0))
+    assert template.slots(template.mask) == [time(9, 30), time(10, 30), time(11, 30)]
+    assert template.index(time(10, 30)) == 1
+    assert template.index(time(10, 0)) is None
+
+
+def test_get_available_slots_subtracts_bookings(db):
+    monday = next_weekday(0)
+    book(db, monday, 10)
+    book(db, monday, 17)
+
+    slots = availability.get_available_slots("demo", monday, db)
+    assert time(10, 0) not in slots and time(17, 0) not in slots
+    assert len(slots) == 9
+    assert availability.get_available_slots("demo", next_weekday(6), db) == []
+
+
+def test_conflict_check_and_next_free_slot(db):
+    saturday = next_weekday(5)
+    for hour in range(9, 20):
+        book(db, saturday, hour)
+
+    engine = AvailabilityEngine.from_db(db, "demo")
+    booked = engine.booked_masks(db, saturday, saturday + timedelta(days=7))
+
+    assert not engine.is_free(saturday, time(15, 0), booked.get(saturday, 0))
+    # Sábado completo y domingo cerrado: el siguiente hueco es el lunes a las 9:00
+    assert engine.next_free_slot(saturday, booked) == (saturday + timedelta(days=2), time(9, 0))
+
+    monday = saturday + timedelta(days=2)
+    assert engine.next_free_slot(monday, booked, not_before=time(15, 30)) == (monday, time(16, 0))
+
+
+def test_free_masks_over_a_range(db):
+    start = next_weekday(0)
+    book(db, start + timedelta(days=1), 9)
+
+    engine = AvailabilityEngine.from_db(db, "demo")
+    masks = engine.free_masks(start, start + timedelta(days=6), engine.booked_masks(db, start, start + timedelta(days=6)))
+
+    full = (1 << 11) - 1
+    assert masks[start] == full
+    assert masks[start + timedelta(days=1)] == full & ~1
+    assert masks[start + timedelta(days=6)] == 0
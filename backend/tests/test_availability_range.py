@@ -0,0 +1,61 @@
+from datetime import date, time, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import Base, engine, SessionLocal
+from app.main import app
+from app.models.booking import Booking
+from app.models.schedule import WeeklySchedule
+
+
+def seed(business_id):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for weekday in range(6):
+        db.add(WeeklySchedule(business_id=business_id, weekday=weekday, open_time=time(9, 0), close_time=time(13, 0)))
+    start = date.today() + timedelta(days=7 - date.today().weekday() + 7)  # lunes dentro de dos semanas
+    db.add(Booking(business_id=business_id, date=start, start_time=time(10, 0)))
+    db.add(Booking(business_id=business_id, date=start + timedelta(days=1), start_time=time(9, 0)))
+    db.add(Booking(business_id="otro", date=start, start_time=time(9, 0)))
+    db.commit()
+    db.close()
+    return start
+
+
+def test_range_returns_compact_free_slots_with_two_queries():
+    start = seed("range-demo")
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        with TestClient(app) as client:
+            params = {
+                "business_id": "range-demo",
+                "from": start.isoformat(),
+                "to": (start + timedelta(days=6)).isoformat(),
+            }
+            # La primera petición carga el calendario del negocio (se queda en memoria)
+            client.get("/availability/range", params=params)
+            statements.clear()
+            resp = client.get("/availability/range", params=params)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["slot_minutes"] == 60
+    days = body["days"]
+    assert days[start.isoformat()] == {"open": "09:00", "free": "1011"}
+    assert days[(start + timedelta(days=1)).isoformat()]["free"] == "0111"
+    assert days[(start + timedelta(days=2)).isoformat()]["free"] == "1111"
+    # Domingo cerrado: no aparece
+    assert (start + timedelta(days=6)).isoformat() not in days
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 2
+
+
+def test_range_validates_dates():
+    with TestClient(app) as client:
+        assert client.get("/availability/range", params={"business_id": "x", "from": "2025-05-10", "to": "2025-05-01"}).status_code == 400
+        assert client.get("/availability/range", params={"business_id": "x", "from": "2025-01-01", "to": "2026-12-31"}).status_code == 400
+        assert client.get("/availability/range", params={"business_id": "x", "from": "10/05/2025", "to": "2025-05-01"}).status_code == 400
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from datetime import date, time, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base, engine, SessionLocal
+from app.main import app
+from app.migrations import run_migrations
+from app.models.booking import Booking
+from app.schemas.booking import BookingCreate
+from app.services import llm_agent
+from app.services.booking_service import create_booking, SlotTakenError
+
+
+def booking(business_id, day, hour=15, name="Ana"):
+    return BookingCreate(
+        business_id=business_id, date=day, start_time=time(hour, 0),
+        customer_name=name, customer_email=f"{name.lower()}@example.com",
+    )
+
+
+def test_concurrent_bookings_same_slot_exactly_one_wins():
+    Base.metadata.create_all(bind=engine)
+    day = date.today() + timedelta(days=30)
+    n = 300
+    barrier = threading.Barrier(n)
+    results = []
+    lock = threading.Lock()
+
+    def worker(i):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            create_booking(db, booking("stress", day, name=f"Cliente{i}"))
+            outcome = "won"
+        except SlotTakenError:
+            outcome = "taken"
+        except Exception as e:
+            outcome = f"error: {e}"
+        finally:
+            db.close()
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count("won") == 1
+    assert results.count("taken") == n - 1
+
+    db = SessionLocal()
+    try:
+        assert db.query(Booking).filter(Booking.business_id == "stress", Booking.date == day).count() == 1
+    finally:
+        db.close()
+
+
+def test_book_endpoint_returns_409_when_slot_taken():
+    day = date.today() + timedelta(days=31)
+    payload = {
+        "business_id": "api-409", "date": day.isoformat(), "start_time": "10:00",
+        "customer_name": "Ana", "customer_email": "ana@example.com",
+    }
+    with TestClient(app) as client:
+        assert client.post("/book", json=payload).status_code == 200
+        resp = client.post("/book", json={**payload, "customer_name": "Luis"})
+    assert resp.status_code == 409
+
+
+def test_migration_adds_unique_index_to_existing_table(tmp_path):
+    legacy = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with legacy.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE bookings (id INTEGER PRIMARY KEY, business_id VARCHAR, date DATE, start_time TIME)"
+        ))
+
+    assert run_migrations(legacy) == ["001_bookings_unique_slot"]
+    assert run_migrations(legacy) == []
+    indexes = {ix["name"]: ix for ix in inspect(legacy).get_indexes("bookings")}
+    assert indexes["ux_bookings_slot"]["unique"]
+    assert indexes["ux_bookings_slot"]["column_names"] == ["business_id", "date", "start_time"]
+
+
+def test_chat_offers_other_slots_when_booking_loses_the_race(monkeypatch):
+    day = (date.today() + timedelta(days=40)).isoformat()
+    session = {
+        "intent": "book", "date": day, "time": "15:00", "slot_confirmed": True,
+        "event_details": "Boda", "customer_name": "Ana", "customer_email": "ana@example.com",
+        "customer_phone": "600000000", "event_date": day,
+    }
+
+    async def taken(business_id, session):
+        raise SlotTakenError("15:00")
+
+    async def slots(business_id, date_obj):
+        return [time(16, 0), time(17, 0)]
+
+    monkeypatch.setattr(llm_agent, "create_event_async", taken)
+    monkeypatch.setattr(llm_agent, "get_supabase_slots_async", slots)
+
+    result = asyncio.run(llm_agent.process_llm_reply("demo", session, "Sí", '{"message": "Confirmo"}'))
+
+    assert result["status"] == "need_info"
+    assert "16:00, 17:00" in result["reply"]
+    assert session["time"] is None and session["slot_confirmed"] is False
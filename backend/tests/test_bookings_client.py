@@ -0,0 +1,72 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.mock_bookings import MockBookings
+from app.services import llm_agent, bookings_client
+from app.services.bookings_client import BookingsClient, bookings_turn
+from app.services.http_client import close_http_client
+
+# Un martes dentro de un mes (abierto con el horario por defecto)
+DAY = date.today() + timedelta(days=30 + (1 - date.today().weekday()) % 7)
+
+
+@pytest.fixture
+def backend():
+    with MockBookings(latency=0.02) as mock:
+        yield mock
+
+
+def test_day_is_cached_until_a_booking_invalidates_it(backend):
+    client = BookingsClient(base_url=backend.url, ttl=60)
+    backend.add_booking("demo", str(DAY), "10:00:00")
+
+    async def scenario():
+        first = await client.booked_times("demo", DAY)
+        second = await client.booked_times("demo", DAY)
+        created = await client.create_booking({"business_id": "demo", "date": str(DAY), "start_time": "17:00"})
+        taken = await client.create_booking({"business_id": "demo", "date": str(DAY), "start_time": "17:00"})
+        third = await client.booked_times("demo", DAY)
+        await close_http_client()
+        return first, second, created.status_code, taken.status_code, third
+
+    first, second, created, taken, third = asyncio.run(scenario())
+    assert first == second == {"10:00"}
+    assert (created, taken) == (201, 409)
+    assert third == {"10:00", "17:00"}
+    assert backend.count("GET") == 2
+    assert client.stats()["cache_hits"] == 1
+
+
+def test_concurrent_lookups_in_one_turn_hit_the_backend_once(backend):
+    client = BookingsClient(base_url=backend.url, ttl=0)
+
+    async def scenario():
+        with bookings_turn():
+            in_turn = await asyncio.gather(*(client.booked_times("demo", DAY) for _ in range(3)))
+        await client.booked_times("demo", DAY)
+        await close_http_client()
+        return in_turn
+
+    assert asyncio.run(scenario()) == [frozenset()] * 3
+    assert backend.count("GET") == 2
+    assert client.stats()["turn_hits"] == 2
+
+
+def test_book_path_queries_the_day_once_per_turn(backend, monkeypatch):
+    # Hueco pedido ocupado: antes se consultaba el día dos veces (comprobación y alternativas)
+    monkeypatch.setattr(bookings_client, "_client", BookingsClient(base_url=backend.url, ttl=0))
+    monkeypatch.setattr(llm_agent, "SLOT_PREFETCH_ENABLED", False)
+    backend.add_booking("demo", str(DAY), "17:00:00")
+    session = {"intent": "book", "date": str(DAY), "time": "17:00", "customer_name": "Ana"}
+
+    async def scenario():
+        with bookings_turn():
+            result = await llm_agent.run_flow("demo", session, {"intent": "book"})
+        await close_http_client()
+        return result
+
+    result = asyncio.run(scenario())
+    assert "17:00" not in result["reply"] and result["status"] == "need_info"
+    assert backend.count("GET") == 1
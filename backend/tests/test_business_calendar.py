@@ -0,0 +1,125 @@
+import random
+import asyncio
+import threading
+from datetime import date, time, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.holiday import Holiday
+from app.models.schedule import WeeklySchedule, ScheduleOverride
+from app.services.availability import is_holiday
+from app.services import business_calendar
+from app.services.business_calendar import BusinessCalendar, DEFAULT_WEEKLY_HOURS, load_calendar
+
+MONDAY = date(2026, 3, 2)
+HOURS = (time(9, 0), time(20, 0))
+
+
+def test_recurring_holidays_cover_every_year():
+    assert is_holiday(date(2025, 12, 25))
+    assert is_holiday(date(2031, 1, 6))
+    assert not is_holiday(date(2031, 1, 7))
+
+
+def test_next_open_day_skips_sundays_holidays_and_closures():
+    calendar = BusinessCalendar("demo", DEFAULT_WEEKLY_HOURS, holidays={MONDAY + timedelta(days=7)}, start=MONDAY, horizon=60)
+
+    saturday = MONDAY + timedelta(days=5)
+    assert calendar.is_open(saturday)
+    assert not calendar.is_open(saturday + timedelta(days=1))
+    # Domingo cerrado y lunes festivo: el siguiente día abierto es el martes
+    assert calendar.next_open_day(saturday) == MONDAY + timedelta(days=8)
+    assert calendar.is_holiday(MONDAY + timedelta(days=7))
+
+
+def test_incremental_updates_match_full_rebuild():
+    rng = random.Random(3)
+    calendar = BusinessCalendar("demo", DEFAULT_WEEKLY_HOURS, start=MONDAY, horizon=120)
+    holidays, overrides, weekly = set(), {}, dict(DEFAULT_WEEKLY_HOURS)
+
+    for _ in range(200):
+        day = MONDAY + timedelta(days=rng.randrange(120))
+        action = rng.choice(["holiday", "unholiday", "close", "open", "clear", "weekday"])
+        if action == "holiday":
+            holidays.add(day)
+            calendar.set_date(day, holiday=True)
+        elif action == "unholiday":
+            holidays.discard(day)
+            calendar.set_date(day, holiday=False)
+        elif action == "close":
+            overrides[day] = None
+            calendar.set_date(day, override=True, hours=None)
+        elif action == "open":
+            overrides[day] = HOURS
+            calendar.set_date(day, override=True, hours=HOURS)
+        elif action == "clear":
+            overrides.pop(day, None)
+            calendar.set_date(day, override=None)
+        else:
+            weekday = rng.randrange(7)
+            hours = rng.choice([None, HOURS])
+            if hours is None:
+                weekly.pop(weekday, None)
+            else:
+                weekly[weekday] = hours
+            calendar.set_weekday_hours(weekday, hours)
+
+    fresh = BusinessCalendar("demo", weekly, holidays, overrides, start=MONDAY, horizon=120)
+    for offset in range(119):
+        day = MONDAY + timedelta(days=offset)
+        assert calendar.is_open(day) == fresh.is_open(day)
+        assert calendar.next_open_day(day) == fresh.next_open_day(day)
+
+
+def test_load_calendar_compiles_database_rules(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/calendar.db")
+    Base.metadata.create_all(bind=engine, tables=[WeeklySchedule.__table__, ScheduleOverride.__table__, Holiday.__table__])
+    db = sessionmaker(bind=engine)()
+    for weekday in range(5):
+        db.add(WeeklySchedule(business_id="demo", weekday=weekday, open_time=time(9, 0), close_time=time(18, 0)))
+    db.add(Holiday(business_id=None, date=MONDAY + timedelta(days=1), name="Fiesta local"))
+    db.add(ScheduleOverride(business_id="demo", date=MONDAY + timedelta(days=2), closed=True))
+    db.add(ScheduleOverride(business_id="demo", date=MONDAY + timedelta(days=5), closed=False, open_time=time(10, 0), close_time=time(14, 0)))
+    db.commit()
+
+    calendar = load_calendar(db, "demo", start=MONDAY)
+    assert calendar.is_open(MONDAY)
+    assert not calendar.is_open(MONDAY + timedelta(days=1))
+    assert not calendar.is_open(MONDAY + timedelta(days=2))
+    assert calendar.next_open_day(MONDAY) == MONDAY + timedelta(days=3)
+    # Sábado sin horario semanal pero con excepción de apertura
+    assert calendar.hours(MONDAY + timedelta(days=5)) == (time(10, 0), time(14, 0))
+    assert calendar.next_open_day(MONDAY + timedelta(days=5)) == MONDAY + timedelta(days=7)
+
+
+def test_get_calendar_uses_the_callers_session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/calendar.db")
+    Base.metadata.create_all(bind=engine, tables=[WeeklySchedule.__table__, ScheduleOverride.__table__, Holiday.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add(WeeklySchedule(business_id="caller-db", weekday=6, open_time=time(10, 0), close_time=time(14, 0)))
+    db.commit()
+    monkeypatch.setattr(business_calendar, "SessionLocal", lambda: (_ for _ in ()).throw(AssertionError("otra sesión")))
+
+    sunday = date.today() + timedelta(days=(6 - date.today().weekday()) % 7 + 7)
+    assert business_calendar.get_calendar("caller-db", db).is_open(sunday)
+
+
+def test_async_calendar_loads_off_the_event_loop(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/calendar.db")
+    Base.metadata.create_all(bind=engine, tables=[WeeklySchedule.__table__, ScheduleOverride.__table__, Holiday.__table__])
+    monkeypatch.setattr(business_calendar, "SessionLocal", sessionmaker(bind=engine))
+    threads = []
+    event.listen(engine, "before_cursor_execute", lambda *args: threads.append(threading.current_thread()))
+
+    async def load():
+        first = await business_calendar.get_calendar_async("async-demo")
+        queries = len(threads)
+        # Ya cargado: se sirve sin consultas ni hilos
+        assert await business_calendar.get_calendar_async("async-demo") is first
+        assert len(threads) == queries
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(load())
+    assert threads and all(t is not loop_thread for t in threads)
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import date, time
+
+import pytest
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent, session_service
+from app.services.date_parser import parse_datetime
+
+TODAY = date(2026, 10, 18)  # domingo
+
+
+@pytest.mark.parametrize("text, expected_date, expected_time", [
+    ("¿Tienes hueco mañana a las 17?", date(2026, 10, 19), time(17, 0)),
+    ("el 10 de mayo", date(2027, 5, 10), None),
+    ("el 10 de mayo de 2026", date(2026, 5, 10), None),
+    ("el próximo sábado", date(2026, 10, 24), None),
+    ("¿y el domingo?", date(2026, 10, 25), None),
+    ("este domingo", date(2026, 10, 18), None),
+    ("pasado mañana a la una", date(2026, 10, 20), time(13, 0)),
+    ("hoy a las 5 de la tarde", date(2026, 10, 18), time(17, 0)),
+    ("mañana por la mañana a las 10", date(2026, 10, 19), time(10, 0)),
+    ("¿Tenéis algo el 12/11 a las 12 y media?", date(2026, 11, 12), time(12, 30)),
+    ("2026-12-03 17:30", date(2026, 12, 3), time(17, 30)),
+    ("el día 3", date(2026, 11, 3), None),
+    ("a las 16h", None, time(16, 0)),
+    ("a mediodía", None, time(12, 0)),
+])
+def test_parses_spanish_dates_and_times(text, expected_date, expected_time):
+    parsed = parse_datetime(text, TODAY)
+    assert parsed.confident
+    assert (parsed.date, parsed.time) == (expected_date, expected_time)
+
+
+@pytest.mark.parametrize("text", [
+    "Hola",
+    "Me caso el 10 de mayo en Toledo",     # dice algo más que la fecha
+    "somos 2 personas",                    # número suelto no es una hora
+    "para una cita",                       # "una" no es la una
+    "el 31 de febrero",                    # fecha imposible
+    "mañana no puedo, ¿y el jueves?",      # dos fechas
+    "no puedo el sábado",                  # fecha negada
+    "el sábado no",
+    "mejor otro día que no sea el sábado",
+    "si el sábado",                        # condicional o respuesta: lo decide el LLM
+])
+def test_not_confident_when_message_says_more(text):
+    assert not parse_datetime(text, TODAY).confident
+
+
+def test_availability_turn_is_answered_without_llm(monkeypatch):
+    async def slots(business_id, date_obj):
+        return [time(10, 0), time(17, 0)]
+
+    monkeypatch.setattr(llm_agent, "get_supabase_slots_async", slots)
+    with MockOllama() as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        result = asyncio.run(llm_agent.handle_chat("demo", "fast-1", "¿tienes hueco el 10 de mayo?"))
+        session = session_service.get_session("fast-1")
+
+        assert mock.requests == []
+        assert "17:00" in result["reply"]
+        assert session["intent"] == "check_availability"
+        assert session["history"][-1]["role"] == "assistant"
+
+        # En plena recogida de datos una fecha suelta (la de la boda) va al LLM
+        session.update({"intent": "book", "time": "17:00", "slot_confirmed": True})
+        asyncio.run(llm_agent.handle_chat("demo", "fast-1", "el 14 de junio"))
+        assert len(mock.requests) == 1
+
+
+def test_negated_date_goes_to_the_llm(monkeypatch):
+    async def slots(business_id, date_obj):
+        return [time(10, 0), time(17, 0)]
+
+    monkeypatch.setattr(llm_agent, "get_supabase_slots_async", slots)
+    with MockOllama() as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        for i, text in enumerate(("no puedo el sábado", "el sábado no")):
+            asyncio.run(llm_agent.handle_chat("demo", f"negated-{i}", text))
+            # Sin atajo: ni se responde la disponibilidad ni se guarda el sábado como fecha
+            assert len(mock.requests) == i + 1
+            assert session_service.get_session(f"negated-{i}").get("date") is None
@@ -0,0 +1,176 @@
+import time
+import socket
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.database import Base, engine, SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.schemas.booking import BookingCreate
+from app.services.booking_service import create_booking, SlotTakenError
+from app.services.email_outbox import (
+    OutboxWorker, SmtpConnection, enqueue_email, enqueue_booking_emails, start_outbox_worker,
+)
+
+
+class Inbox:
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode("utf-8", "replace")))
+        return "250 OK"
+
+
+def smtp_server(inbox, port):
+    # Servidor SMTP real de pruebas (requirements-dev.txt); sin él se saltan estos tests
+    controller = pytest.importorskip("aiosmtpd.controller")
+    return controller.Controller(inbox, hostname="127.0.0.1", port=port)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def settings(port):
+    return {"server": "127.0.0.1", "port": port, "user": None, "password": None,
+            "starttls": False, "sender": "reservas@example.com"}
+
+
+def clear_outbox():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.query(EmailOutbox).delete()
+    db.commit()
+    db.close()
+
+
+def statuses():
+    db = SessionLocal()
+    try:
+        return [(r.to_email, r.status, r.attempts) for r in db.query(EmailOutbox).order_by(EmailOutbox.id)]
+    finally:
+        db.close()
+
+
+def test_worker_drains_outbox_over_one_smtp_connection():
+    clear_outbox()
+    db = SessionLocal()
+    for i in range(5):
+        enqueue_email(db, f"cliente{i}@example.com", "Confirmación", f"Cita {i}")
+    db.commit()
+    db.close()
+
+    inbox = Inbox()
+    port = free_port()
+    controller = smtp_server(inbox, port)
+    controller.start()
+    try:
+        worker = OutboxWorker(connection=SmtpConnection(settings(port)))
+        assert worker.drain_once() == 5
+        worker.stop()
+    finally:
+        controller.stop()
+
+    assert [rcpt for rcpt, _ in inbox.messages] == [[f"cliente{i}@example.com"] for i in range(5)]
+    assert inbox.connections == 1
+    assert worker.stats()["smtp_connects"] == 1
+    assert all(status == "sent" for _, status, _ in statuses())
+
+
+def test_worker_retries_with_backoff_until_server_is_back():
+    clear_outbox()
+    db = SessionLocal()
+    enqueue_email(db, "ana@example.com", "Confirmación", "Hola Ana")
+    enqueue_email(db, "luis@example.com", "Confirmación", "Hola Luis")
+    db.commit()
+    db.close()
+
+    inbox = Inbox()
+    port = free_port()  # servidor caído
+
+    worker = OutboxWorker(connection=SmtpConnection(settings(port), timeout=2), backoff_base=30)
+    now = datetime.now()
+    assert worker.drain_once(now=now) == 0
+    # Solo se intenta el primero: con el servidor caído el resto espera a la próxima vuelta
+    assert statuses() == [("ana@example.com", "pending", 1), ("luis@example.com", "pending", 0)]
+    # En la siguiente vuelta toca el segundo; el primero no se reintenta antes de que pase la espera
+    assert worker.drain_once(now=now + timedelta(seconds=1)) == 0
+    assert statuses() == [("ana@example.com", "pending", 1), ("luis@example.com", "pending", 1)]
+
+    controller = smtp_server(inbox, port)
+    controller.start()
+    try:
+        assert worker.drain_once(now=now + timedelta(seconds=31)) == 2
+    finally:
+        worker.stop()
+        controller.stop()
+
+    assert statuses() == [("ana@example.com", "sent", 2), ("luis@example.com", "sent", 2)]
+    assert worker.stats()["retried"] == 2
+
+
+def test_worker_gives_up_after_max_attempts():
+    clear_outbox()
+    db = SessionLocal()
+    enqueue_email(db, "ana@example.com", "Confirmación", "Hola Ana")
+    db.commit()
+    db.close()
+
+    worker = OutboxWorker(connection=SmtpConnection(settings(free_port()), timeout=1), max_attempts=2, backoff_base=1)
+    now = datetime.now()
+    worker.drain_once(now=now)
+    worker.drain_once(now=now + timedelta(seconds=10))
+    assert statuses() == [("ana@example.com", "failed", 2)]
+    assert worker.drain_once(now=now + timedelta(days=1)) == 0
+
+
+def test_booking_and_its_emails_are_written_in_one_transaction(monkeypatch):
+    clear_outbox()
+    monkeypatch.setenv("SMTP_USER", "reservas@example.com")
+    monkeypatch.setenv("SMTP_PASSWORD", "clave")
+    monkeypatch.setenv("ADMIN_EMAILS", "socio@example.com")
+
+    day = date.today() + timedelta(days=50)
+    booking = BookingCreate(business_id="outbox", date=day, start_time="12:00",
+                            customer_name="Ana", customer_email="ana@example.com")
+    db = SessionLocal()
+    start = time.perf_counter()
+    create_booking(db, booking)
+    elapsed = time.perf_counter() - start
+    try:
+        create_booking(db, booking.model_copy(update={"customer_email": "otra@example.com"}))
+    except SlotTakenError:
+        pass
+    db.close()
+
+    # Reserva rechazada: no deja correos huérfanos
+    assert sorted(to for to, _, _ in statuses()) == ["ana@example.com", "socio@example.com"]
+    # Sin SMTP en medio la confirmación no depende del servidor de correo
+    assert elapsed < 0.5
+
+
+def test_booking_emails_need_smtp_user_and_password(monkeypatch):
+    monkeypatch.setenv("SMTP_USER", "reservas@example.com")
+    monkeypatch.delenv("SMTP_PASSWORD", raising=False)
+    monkeypatch.setenv("ADMIN_EMAILS", "socio@example.com")
+    booking = {"date": "2026-03-09", "time": "12:00", "customer_name": "Ana", "customer_email": "ana@example.com"}
+
+    clear_outbox()
+    db = SessionLocal()
+    try:
+        assert enqueue_booking_emails(db, booking) == 0
+        assert start_outbox_worker() is None
+        monkeypatch.setenv("SMTP_PASSWORD", "clave")
+        assert enqueue_booking_emails(db, booking) == 2
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,67 @@
+import sys
+import json
+import types
+
+from app.services import llm_agent, token_counter
+from app.services.history_manager import record_turn, compact, history_context, history_messages
+from app.services.token_counter import count_tokens, count_message_tokens
+
+
+def long_conversation(session, turns):
+    for i in range(turns):
+        record_turn(session, f"Mensaje {i}: la boda será en una finca con unos {100 + i} invitados",
+                    f"¡Qué bonito! Cuéntame más sobre la finca número {i}, ¿tenéis ya la fecha?")
+
+
+def test_history_stays_within_budget_and_old_turns_are_summarized():
+    session = {}
+    long_conversation(session, 40)
+
+    assert count_message_tokens(session["history"]) <= 300
+    assert session["history"][-1]["content"].startswith("¡Qué bonito! Cuéntame más sobre la finca número 39")
+    assert count_tokens("\n".join(session["history_summary"])) <= 120
+    assert session["history_summary"][-1].startswith("Asistente:")
+
+
+def test_prompt_size_is_flat_for_long_conversations():
+    session = {"intent": "smalltalk"}
+    sizes = []
+    for _ in range(3):
+        long_conversation(session, 40)
+        sizes.append(count_message_tokens(llm_agent.build_messages(session, "¿Y el precio?", "faq")))
+    assert max(sizes) - min(sizes) < 30
+
+
+def test_legacy_json_history_is_reduced_to_message_text():
+    legacy = json.dumps({"message": "¿Para qué fecha?", "intent": "check_availability", "date": None})
+    session = {"history": [{"role": "user", "content": "Hola"}, {"role": "assistant", "content": legacy}]}
+    assert history_messages(session)[1]["content"] == "¿Para qué fecha?"
+    compact(session)
+    assert session["history"][1]["content"] == "¿Para qué fecha?"
+
+
+def test_context_includes_collected_fields():
+    session = {"customer_email": "ana@example.com", "event_details": "Boda en Toledo"}
+    context = history_context(session)
+    assert "Email=ana@example.com" in context and "Detalles del evento=Boda en Toledo" in context
+    assert history_context({}) == ""
+
+
+def test_tiktoken_is_only_loaded_when_enabled_and_on_first_count(monkeypatch):
+    loads = []
+    fake = types.SimpleNamespace(get_encoding=lambda name: loads.append(name) or types.SimpleNamespace(
+        encode=lambda text, disallowed_special=(): text.split()
+    ))
+    monkeypatch.setitem(sys.modules, "tiktoken", fake)
+
+    token_counter._encoding.cache_clear()
+    monkeypatch.setattr(token_counter, "TOKENIZER_TIKTOKEN", False)
+    assert count_tokens("hola qué tal") > 0
+    assert loads == []
+
+    token_counter._encoding.cache_clear()
+    monkeypatch.setattr(token_counter, "TOKENIZER_TIKTOKEN", True)
+    assert count_tokens("hola qué tal") == 3
+    count_tokens("otra vez")
+    assert loads == ["o200k_base"]
+    token_counter._encoding.cache_clear()
@@ -0,0 +1,44 @@
+import asyncio
+
+from benchmarks.mock_ollama import MockOllama, DEFAULT_REPLY
+from app.services import llm_agent
+from app.services.intent_router import get_router, route, router_stats, reset_router_stats, LLM_MODEL_LARGE, LLM_MODEL_SMALL
+
+
+def test_classifier_separates_simple_turns_from_booking_turns():
+    router = get_router()
+    assert router.classify("¡Hola, buenas tardes!")[0] == "smalltalk"
+    assert router.classify("¿Cuánto cuesta un reportaje?")[0] == "faq"
+    assert router.classify("¿Tienes hueco el jueves a las 18?")[0] == "availability"
+    assert router.classify("Me caso en septiembre en una finca")[0] == "event"
+
+
+def test_route_escalates_booking_state_and_long_messages():
+    assert route({}, "Hola").tier == "small"
+    assert route({}, "¿Tenéis hueco mañana?").reason == "intent"
+    assert route({"intent": "book"}, "Hola").reason == "booking_state"
+    assert route({"customer_name": "Ana"}, "gracias").reason == "booking_state"
+    long_message = "Hola, " + "te cuento un poco cómo será la boda " * 5
+    assert route({}, long_message).reason == "complex"
+
+
+def test_small_model_reply_is_used_and_bad_reply_escalates(monkeypatch):
+    reset_router_stats()
+
+    def responder(payload):
+        if payload["model"] == LLM_MODEL_SMALL and "precio" in payload["messages"][-1]["content"]:
+            return "Claro, te cuento los precios"  # sin JSON: hay que repetir con el grande
+        return DEFAULT_REPLY
+
+    with MockOllama(responder=responder) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        asyncio.run(llm_agent.handle_chat("demo", "router-1", "Hola"))
+        asyncio.run(llm_agent.handle_chat("demo", "router-2", "¿Qué precio tiene una sesión?"))
+        asyncio.run(llm_agent.handle_chat("demo", "router-3", "Me caso en mayo y busco fotógrafo"))
+
+    assert [r["model"] for r in mock.requests] == [LLM_MODEL_SMALL, LLM_MODEL_SMALL, LLM_MODEL_LARGE, LLM_MODEL_LARGE]
+    stats = router_stats()
+    assert stats["tiers"]["small"]["turns"] == 2 and stats["tiers"]["small"]["errors"] == 1
+    assert stats["tiers"]["large"]["turns"] == 2
+    assert stats["escalations"] == 1
+    assert stats["tiers"]["small"]["avg_seconds"] > 0
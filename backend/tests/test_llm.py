@@ -1,11 +1,45 @@
-from app.services.llm_agent import handle_chat
+import asyncio
+from datetime import datetime, time, timedelta
+
+from benchmarks.mock_ollama import MockOllama, DEFAULT_REPLY
+from app.services import llm_agent
 from app.schemas.chat import ChatRequest
 
-payload = ChatRequest(
-    business_id="demo",
-    session_id="test1",
-    message="¿Tienes disponibilidad mañana?"
-)
+# Lunes fijo: "mañana" es siempre un martes con horario
+TODAY = datetime(2030, 3, 4, 10, 0)
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return TODAY
+
+
+def test_handle_chat_answers_availability_through_the_mock_llm(monkeypatch):
+    # Sin llamar al modelo real: Ollama falso, reloj fijo y huecos fijos
+    tomorrow = TODAY.date() + timedelta(days=1)
+    asked = []
+
+    async def slots(business_id, day):
+        asked.append(day)
+        return [time(10, 0), time(17, 0)]
+
+    def responder(payload):
+        return {**DEFAULT_REPLY, "intent": "check_availability", "date": tomorrow.isoformat(), "message": "Miro la agenda"}
+
+    monkeypatch.setattr(llm_agent, "datetime", FixedDatetime)
+    monkeypatch.setattr(llm_agent, "get_supabase_slots_async", slots)
+    payload = ChatRequest(
+        business_id="demo",
+        session_id="test1",
+        message="¿Tienes disponibilidad mañana para una sesión de fotos de pareja?"
+    )
+
+    with MockOllama(responder=responder) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        response = asyncio.run(llm_agent.handle_chat(payload.business_id, payload.session_id, payload.message))
 
-response = handle_chat(payload)
-print(response)
+    assert len(mock.requests) == 1
+    assert set(asked) == {tomorrow}
+    assert response["status"] == "success"
+    assert "17:00" in response["reply"]
@@ -0,0 +1,109 @@
+import time
+import asyncio
+
+import pytest
+
+from benchmarks.mock_ollama import MockOllama, DEFAULT_REPLY
+from app.services import llm_agent, llm_cassette
+from app.services.llm_cassette import LLMCassette, CassetteMiss, fingerprint
+from app.services.response_cache import get_response_cache
+
+
+def _use(monkeypatch, cassette):
+    monkeypatch.setattr(llm_cassette, "_cassette", cassette)
+    return cassette
+
+
+def _messages(context, message="¿Tenéis hueco el viernes?"):
+    return [
+        {"role": "system", "content": "Eres el asistente."},
+        {"role": "user", "content": f"[Contexto actual: {context}]\n\n{message}"},
+    ]
+
+
+async def _stream(messages):
+    return [chunk async for chunk in llm_agent.cloud_chat_stream("m", messages)]
+
+
+def test_fingerprint_ignores_session_context_but_not_the_message():
+    a = fingerprint("m", _messages("intent=none, fecha=2026-01-01"))
+    b = fingerprint("m", _messages("intent=book, fecha=2026-03-09, nombre=Ana"))
+    legacy = [{"role": "system", "content": "Eres el asistente.\nContexto actual: otro"},
+              {"role": "user", "content": "¿Tenéis hueco el viernes?"}]
+
+    assert a == b == fingerprint("m", legacy)
+    assert a != fingerprint("m", _messages("intent=none", "¿Y el sábado?"))
+    assert a != fingerprint("otro-modelo", _messages("intent=none"))
+
+
+def test_record_then_replay_offline(monkeypatch, tmp_path):
+    path = tmp_path / "llm.jsonl"
+    _use(monkeypatch, LLMCassette(path=str(path), mode="record"))
+    with MockOllama() as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        recorded = asyncio.run(llm_agent.cloud_chat_async("m", _messages("día 1")))
+        streamed = asyncio.run(_stream(_messages("día 1", "Quiero reservar")))
+
+    # Sin servidor: responde el cassette aunque el contexto de la sesión sea otro
+    cassette = _use(monkeypatch, LLMCassette(path=str(path), mode="replay"))
+    monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", "http://127.0.0.1:9")
+    replayed = asyncio.run(llm_agent.cloud_chat_async("m", _messages("día 2")))
+    restreamed = asyncio.run(_stream(_messages("día 2", "Quiero reservar")))
+
+    assert replayed["message"] == recorded["message"]
+    assert replayed["eval_count"] == recorded["eval_count"]
+    assert replayed["total_duration"] == recorded["total_duration"]
+    assert restreamed[:-1] == streamed[:-1]
+    assert restreamed[-1]["done"] and restreamed[-1]["eval_count"] == streamed[-1]["eval_count"]
+    assert cassette.stats == {"recorded": 0, "replayed": 2, "misses": 0}
+
+
+def test_replay_miss_raises(monkeypatch, tmp_path):
+    _use(monkeypatch, LLMCassette(path=str(tmp_path / "vacio.jsonl"), mode="replay"))
+    with pytest.raises(CassetteMiss):
+        asyncio.run(llm_agent.cloud_chat_async("m", _messages("x")))
+
+
+def test_replay_serves_repeated_requests_in_order(tmp_path):
+    cassette = LLMCassette(path=str(tmp_path / "llm.jsonl"), mode="record")
+    for text in ("primera", "segunda"):
+        cassette.record("m", _messages("x"), {"message": {"content": text}})
+
+    replay = LLMCassette(path=cassette.path, mode="replay")
+    served = [asyncio.run(replay.replay("m", _messages("y")))["message"]["content"] for _ in range(3)]
+    assert served == ["primera", "segunda", "segunda"]
+
+
+def test_recorded_timing_reproduces_the_llm_latency(tmp_path):
+    cassette = LLMCassette(path=str(tmp_path / "llm.jsonl"), mode="record")
+    cassette.record("m", _messages("x"), {"message": {"content": "hola"}, "total_duration": 200_000_000})
+
+    instant = LLMCassette(path=cassette.path, mode="replay", timing="instant")
+    recorded = LLMCassette(path=cassette.path, mode="replay", timing="recorded", speed=0.5)
+
+    started = time.perf_counter()
+    asyncio.run(instant.replay("m", _messages("x")))
+    assert time.perf_counter() - started < 0.05
+
+    started = time.perf_counter()
+    asyncio.run(recorded.replay("m", _messages("x")))
+    assert 0.09 <= time.perf_counter() - started < 0.5
+
+
+def test_handle_chat_replays_without_llm(monkeypatch, tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+
+    def responder(payload):
+        return {**DEFAULT_REPLY, "message": "Hola, ¿en qué te ayudo?"}
+
+    _use(monkeypatch, LLMCassette(path=path, mode="record"))
+    with MockOllama(responder=responder) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        first = asyncio.run(llm_agent.handle_chat("demo", "cassette-1", "Hola"))
+
+    get_response_cache().clear()
+    _use(monkeypatch, LLMCassette(path=path, mode="replay"))
+    monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", "http://127.0.0.1:9")
+    second = asyncio.run(llm_agent.handle_chat("demo", "cassette-2", "Hola"))
+
+    assert second["reply"] == first["reply"]
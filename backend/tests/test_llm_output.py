@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent
+from app.services.llm_output import parse_llm_reply, PARSE_STATS
+from app.services.stream_parser import JsonRepairer, extract_json_object
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('```json\n{"message": "Hola", "intent": "smalltalk"}\n```', {"message": "Hola", "intent": "smalltalk"}),
+    ('Claro: {"message": "Hola"} ¿algo más? {no}', {"message": "Hola"}),
+    ('Te propongo {A} o {B}: {"message": "¿Cuál?"}', {"message": "¿Cuál?"}),
+    ('{"message": "Vale", "date": "2026-11-14",}', {"message": "Vale", "date": "2026-11-14"}),
+    ('{"message": "¿Dónde será la bo', {"message": "¿Dónde será la bo"}),
+    ('{"message": "¿Qué día?", "date"', {"message": "¿Qué día?", "date": None}),
+    ('{"message": "¿Qué día?", "date": nu', {"message": "¿Qué día?", "date": None}),
+    ('{"message": "Hasta \\u00a1pron\\u00', {"message": "Hasta ¡pron"}),
+    ('{"message": "a {b} \\"c\\"", "x": [1, {"y": 2}]}', {"message": 'a {b} "c"', "x": [1, {"y": 2}]}),
+])
+def test_repairs_chatty_and_truncated_outputs(raw, expected):
+    assert extract_json_object(raw) == expected
+
+
+def test_repairer_gives_same_result_fed_in_chunks():
+    raw = 'Aquí va: {"message": "¡Hola! \\ud83d\\ude00", "intent": "smalltalk", "extra": [1, 2,],} fin'
+    whole = JsonRepairer()
+    whole.feed(raw)
+    chunked = JsonRepairer()
+    for i in range(0, len(raw), 3):
+        chunked.feed(raw[i:i + 3])
+    assert chunked.result() == whole.result() == {"message": "¡Hola! 😀", "intent": "smalltalk", "extra": [1, 2]}
+    assert chunked.repaired
+
+
+def test_parse_llm_reply_validates_and_drops_only_bad_fields():
+    data = parse_llm_reply(
+        '{"message": "Anotado", "intent": "book", "date": "10/05/2027", "time": "17:00", '
+        '"customer_phone": 600123456, "customer_email": "null", "otro": 1}'
+    )
+    assert data == {"message": "Anotado", "intent": "book", "time": "17:00", "customer_phone": "600123456"}
+    # Texto plano: se usa como mensaje en vez de devolver un error
+    assert parse_llm_reply("¡Hola! ¿Qué celebras?") == {"message": "¡Hola! ¿Qué celebras?"}
+    failed = PARSE_STATS["failed"]
+    assert parse_llm_reply("   ") is None
+    assert PARSE_STATS["failed"] == failed + 1
+
+
+def test_impossible_date_and_time_are_dropped():
+    data = parse_llm_reply('{"message": "Anotado", "intent": "book", "date": "2025-13-45", "time": "29:99"}')
+    assert data == {"message": "Anotado", "intent": "book"}
+    assert parse_llm_reply('{"date": "2027-05-10", "time": "9:30"}') == {"date": "2027-05-10", "time": "9:30"}
+
+
+def test_impossible_date_from_the_llm_does_not_break_the_turn(monkeypatch):
+    reply = '{"message": "Miro la agenda", "intent": "check_availability", "date": "2025-02-30"}'
+    with MockOllama(responder=lambda payload: reply) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        result = asyncio.run(llm_agent.handle_chat("demo", "bad-date-1", "Quiero reservar una visita"))
+    # La fecha se descarta y se vuelve a preguntar, en vez de un 500 al hacer strptime
+    assert len(mock.requests) == 1
+    assert result["status"] == "need_info"
+
+
+def test_chat_requests_schema_constrained_output(monkeypatch):
+    chatty = 'Claro, aquí tienes:\n{"message": "¡Hola! ¿Qué celebras?", "intent": "smalltalk",}'
+    with MockOllama(responder=lambda payload: chatty) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        result = asyncio.run(llm_agent.handle_chat("demo", "schema-1", "Hola"))
+
+    fmt = mock.requests[0]["format"]
+    assert list(fmt["properties"])[0] == "message"
+    assert set(fmt["required"]) == set(fmt["properties"])
+    assert result == {"reply": "¡Hola! ¿Qué celebras?", "status": "success"}
@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent
+from app.services.metrics import Counter, Histogram, render, reset_metrics, server_timing, STAGE_SECONDS
+
+
+def _get(app, method, path, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(run())
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        h.observe(value, stage="llm")
+
+    samples = {(name, labels): value for name, labels, value in h.samples()}
+    assert samples[("t_seconds_bucket", '{stage="llm",le="0.1"}')] == 1
+    assert samples[("t_seconds_bucket", '{stage="llm",le="1"}')] == 3
+    assert samples[("t_seconds_bucket", '{stage="llm",le="+Inf"}')] == 4
+    assert samples[("t_seconds_count", '{stage="llm"}')] == 4
+    assert h.value(stage="llm") == 4
+
+
+def test_counter_rejects_wrong_labels():
+    c = Counter("t_total", "test", ("model",))
+    c.inc(3, model="m")
+    assert c.value(model="m") == 3
+    try:
+        c.inc(model="m", mode="x")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("etiquetas inválidas aceptadas")
+
+
+def test_server_timing_header():
+    assert server_timing({"llm": 0.25, "db": 0.0012}, 0.3) == "llm;dur=250.0, db;dur=1.2, total;dur=300.0"
+
+
+def test_chat_turn_exposes_metrics_and_server_timing(monkeypatch):
+    from app.main import app
+
+    reset_metrics()
+    with MockOllama() as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        resp = _get(app, "POST", "/agent/chat", json={
+            "business_id": "demo", "session_id": "metrics-1", "message": "Cuéntame algo de vuestro trabajo"
+        })
+
+    assert resp.status_code == 200
+    stages = dict(part.split(";dur=") for part in resp.headers["Server-Timing"].split(", "))
+    assert {"llm", "parse", "db", "total"} <= set(stages)
+    assert STAGE_SECONDS.value(stage="llm") == 1
+
+    text = _get(app, "GET", "/metrics").text
+    assert "# TYPE chatbot_chat_turn_duration_seconds histogram" in text
+    assert 'chatbot_chat_turn_duration_seconds_count{endpoint="chat",status="success"} 1' in text
+    assert 'chatbot_llm_eval_tokens_total{model="' in text
+    assert "# TYPE chatbot_llm_parse_failures_total counter" in text
+    assert 'chatbot_active_sessions{backend="' in text
+    assert render().endswith("\n")
@@ -0,0 +1,81 @@
+import time
+import pstats
+import asyncio
+
+import httpx
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent, profiler
+from app.services.profiler import StackSampler, profile_request, list_profiles, profile_file
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_collapses_stacks():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    _busy(0.05)
+    sampler.stop()
+    lines = sampler.collapsed().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("_busy (test_profiler.py" in line for line in lines)
+
+
+def test_profile_request_writes_pstats_and_collapsed(tmp_path):
+    with profile_request("ses/../1", True, directory=str(tmp_path), interval=0.001) as capture:
+        _busy(0.03)
+
+    [meta] = list_profiles(str(tmp_path))
+    assert meta["id"] == capture.id and meta["samples"] > 0
+    session_dir, pstats_name = meta["files"][0].split("/")
+    assert session_dir == "ses_.._1"
+    stats = pstats.Stats(profile_file(session_dir, pstats_name, str(tmp_path)))
+    assert any(func[2] == "_busy" for func in stats.stats)
+
+    assert profile_file("..", pstats_name, str(tmp_path)) is None
+    assert profile_file(session_dir, "../secret.txt", str(tmp_path)) is None
+
+
+def test_only_one_profile_at_a_time(tmp_path):
+    with profile_request("a", True, directory=str(tmp_path)) as first:
+        with profile_request("b", True, directory=str(tmp_path)) as second:
+            pass
+    assert first is not None and second is None
+
+
+def test_chat_endpoint_profiles_on_admin_request(monkeypatch, tmp_path):
+    from app.main import app
+
+    monkeypatch.setattr(profiler, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiler, "PROFILE_ADMIN_TOKEN", "t0ken-admin")
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"business_id": "demo", "session_id": "perfil-1", "message": "Hola"}
+            plain = await client.post("/agent/chat", json=body)
+            denied = await client.post("/agent/chat?profile=true", json=body, headers={"X-Admin-Token": "otro"})
+            profiled = await client.post("/agent/chat", json=body,
+                                         headers={"X-Profile": "true", "X-Admin-Token": "t0ken-admin"})
+            listing = await client.get("/admin/profiles", headers={"X-Admin-Token": "t0ken-admin"})
+            forbidden = await client.get("/admin/profiles")
+            path = listing.json()["profiles"][0]["files"][0]
+            download = await client.get(f"/admin/profiles/{path}", headers={"X-Admin-Token": "t0ken-admin"})
+            return plain, denied, profiled, listing, forbidden, download
+
+    with MockOllama() as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        plain, denied, profiled, listing, forbidden, download = asyncio.run(run())
+
+    assert "X-Profile-Id" not in plain.headers and "X-Profile-Id" not in denied.headers
+    profile_id = profiled.headers["X-Profile-Id"]
+    [meta] = listing.json()["profiles"]
+    assert meta["id"] == profile_id and meta["session_id"] == "perfil-1"
+    assert "timings" in meta
+    assert forbidden.status_code == 403
+    assert download.status_code == 200 and download.content
@@ -0,0 +1,37 @@
+from app.services import llm_agent
+from app.services.prompt_builder import PromptBuilder, split_chunks
+from app.services.token_counter import count_tokens
+
+
+def builder(budget=900):
+    return PromptBuilder(llm_agent.PERSONALITY, llm_agent.BUSINESS_CONTEXT, llm_agent.REGLAS,
+                         llm_agent.RESPONSE_FORMAT, token_budget=budget)
+
+
+def test_split_chunks_keeps_headers_and_numbered_examples_together():
+    chunks = split_chunks("Servicios:\nBodas\n- Retratos\nEjemplos\n1. uno\n2. dos")
+    assert chunks == ["Servicios:\nBodas", "- Retratos", "Ejemplos\n1. uno\n2. dos"]
+
+
+def test_prompt_contains_only_relevant_chunks_within_budget():
+    b = builder()
+    greeting = b.build("Hola", "smalltalk", {})
+    services = b.build("¿Hacéis reportajes de boda?", "faq", {})
+    booking = b.build("Laura Gómez", "smalltalk", {"intent": "book", "date": "2026-11-10", "slot_confirmed": True})
+
+    # Personalidad, reglas generales y formato van siempre
+    for prompt in (greeting, services, booking):
+        assert "Soy Martín" in prompt and '"message": "respuesta al cliente"' in prompt
+        assert "Nunca digas cuantos años de experiencia" in prompt
+        assert count_tokens(prompt) <= 900
+
+    assert "Sesiones de retrato" not in greeting and "Sesiones de retrato" in services
+    assert "nombre completo, email" in booking and "Sesiones de retrato" not in booking
+    assert count_tokens(greeting) < count_tokens(llm_agent.SYSTEM_PROMPT) * 0.5
+    assert b.stats()["turns"] == 3
+
+
+def test_build_messages_uses_full_prompt_when_filter_disabled(monkeypatch):
+    monkeypatch.setattr(llm_agent, "PROMPT_FILTER_ENABLED", False)
+    messages = llm_agent.build_messages({}, "Hola", "smalltalk")
+    assert messages[0]["content"].startswith(llm_agent.SYSTEM_PROMPT)
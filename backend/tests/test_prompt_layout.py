@@ -0,0 +1,32 @@
+import asyncio
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent
+
+
+def test_system_prompt_is_identical_across_sessions_and_states(monkeypatch):
+    monkeypatch.setattr(llm_agent, "PROMPT_STABLE_PREFIX", True)
+    first = llm_agent.build_messages({}, "Hola", "smalltalk")
+    booking = {"intent": "book", "date": "2026-11-14", "time": "17:00", "customer_name": "Ana",
+               "history": [{"role": "user", "content": "Hola"}, {"role": "assistant", "content": "¡Hola!"}]}
+    second = llm_agent.build_messages(booking, "ana@example.com", "booking")
+
+    assert first[0] == second[0] == {"role": "system", "content": llm_agent.SYSTEM_PROMPT}
+    assert "Date=2026-11-14" in second[-1]["content"] and second[-1]["content"].endswith("ana@example.com")
+    # El historial sigue al prefijo sin cambios: también se reutiliza entre turnos de la misma sesión
+    assert second[1:3] == booking["history"]
+
+
+def test_default_layout_filters_the_prompt_and_keeps_state_in_it():
+    messages = llm_agent.build_messages({"date": "2026-11-14"}, "Hola", "smalltalk")
+    assert "Date=2026-11-14" in messages[0]["content"]
+    assert messages[-1] == {"role": "user", "content": "Hola"}
+    # Un saludo no lleva la lista de servicios (filtrado de prompt_builder)
+    assert "Sesiones de retrato" not in messages[0]["content"]
+
+
+def test_requests_ask_ollama_to_keep_the_model_loaded(monkeypatch):
+    with MockOllama() as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        asyncio.run(llm_agent.handle_chat("demo", "layout-1", "Hola"))
+    assert mock.requests[0]["keep_alive"] == llm_agent.OLLAMA_KEEP_ALIVE
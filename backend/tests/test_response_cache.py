@@ -0,0 +1,64 @@
+import asyncio
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent, session_service
+from app.services.response_cache import ResponseCache
+
+
+def test_cache_key_bypasses_sessions_with_booking_state():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    assert cache.key_for("demo", "v1", {}, "¡¡Hola!!") == cache.key_for("demo", "v1", {"intent": "smalltalk"}, "hola")
+    assert cache.key_for("demo", "v1", {}, "hola") != cache.key_for("otro", "v1", {}, "hola")
+    assert cache.key_for("demo", "v1", {}, "hola") != cache.key_for("demo", "v2", {}, "hola")
+    assert cache.key_for("demo", "v1", {"intent": "check_availability"}, "hola") is None
+    assert cache.key_for("demo", "v1", {"date": "2026-11-14"}, "hola") is None
+    assert cache.key_for("demo", "v1", {"history": [{"role": "user", "content": "hola"}]}, "vale") is None
+    assert cache.key_for("demo", "v1", {"history_summary": ["Cliente: boda en junio"]}, "vale") is None
+    assert cache.stats()["bypasses"] == 4
+
+
+def test_only_stateless_replies_are_stored():
+    cache = ResponseCache(maxsize=10, ttl=60)
+    key = cache.key_for("demo", "v1", {}, "hola")
+    cache.store(key, {"message": "¿Qué día?", "intent": "check_availability"})
+    cache.store(key, {"message": "Hola", "intent": "smalltalk", "date": "2026-11-14"})
+    assert cache.get(key) is None
+    cache.store(key, {"message": "¡Hola!", "intent": "smalltalk"})
+    assert cache.get(key) == {"message": "¡Hola!", "intent": "smalltalk"}
+
+
+def test_repeated_openers_skip_the_llm(monkeypatch):
+    with MockOllama(latency=0.05) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+
+        first = asyncio.run(llm_agent.handle_chat("demo", "cache-1", "Hola"))
+        second = asyncio.run(llm_agent.handle_chat("demo", "cache-2", "hola!"))
+        assert len(mock.requests) == 1
+        assert second == first
+        assert session_service.get_session("cache-2")["history"][-2:] == [
+            {"role": "user", "content": "hola!"},
+            {"role": "assistant", "content": "¡Hola! Soy Martín. ¿En qué puedo ayudarte?"},
+        ]
+
+        # Con una reserva en curso la respuesta depende del contexto: siempre al LLM
+        session_service.get_session("cache-3").update({"intent": "book", "date": "2026-11-14"})
+        asyncio.run(llm_agent.handle_chat("demo", "cache-3", "Hola"))
+        assert len(mock.requests) == 2
+
+    stats = llm_agent.response_cache.stats()
+    assert stats["hits"] == 1 and stats["bypasses"] == 1
+
+
+def test_same_text_after_different_histories_is_not_shared(monkeypatch):
+    with MockOllama(latency=0.0) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+
+        for sid, opener in (("history-1", "Quiero celebrar una boda"), ("history-2", "Busco sitio para un cumpleaños")):
+            asyncio.run(llm_agent.handle_chat("demo", sid, opener))
+        requests_before = len(mock.requests)
+        asyncio.run(llm_agent.handle_chat("demo", "history-1", "vale"))
+        asyncio.run(llm_agent.handle_chat("demo", "history-2", "vale"))
+
+        # "vale" significa algo distinto en cada conversación: las dos van al LLM
+        assert len(mock.requests) == requests_before + 2
+    assert llm_agent.response_cache.stats()["hits"] == 0
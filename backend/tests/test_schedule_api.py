@@ -0,0 +1,78 @@
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+
+from app.database import Base, engine
+from app.services import business_calendar
+
+
+def _request(method, path, **kwargs):
+    from app.main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(run())
+
+
+def _slots(business_id, day):
+    response = _request("GET", "/availability", params={"business_id": business_id, "date": day.isoformat()})
+    return response.json()["available_slots"]
+
+
+def _open(business_id, weekday):
+    response = _request("PUT", "/schedule/weekly", json={
+        "business_id": business_id, "weekday": weekday, "open_time": "09:00", "close_time": "20:00"
+    })
+    assert response.status_code == 200
+
+
+def next_weekday(weekday):
+    day = date.today() + timedelta(days=7)
+    return day + timedelta(days=(weekday - day.weekday()) % 7)
+
+
+def setup_module():
+    Base.metadata.create_all(bind=engine)
+
+
+def test_weekly_hours_change_is_visible_immediately():
+    wednesday = next_weekday(2)
+    _open("schedule-weekly", 2)
+    assert len(_slots("schedule-weekly", wednesday)) == 11
+
+    response = _request("PUT", "/schedule/weekly", json={
+        "business_id": "schedule-weekly", "weekday": 2, "open_time": "09:00", "close_time": "14:00"
+    })
+    assert response.status_code == 200
+    # Ni la caché de disponibilidad ni el calendario cargado sirven el horario anterior
+    assert _slots("schedule-weekly", wednesday) == ["09:00", "10:00", "11:00", "12:00", "13:00"]
+
+    _request("PUT", "/schedule/weekly", json={"business_id": "schedule-weekly", "weekday": 2})
+    assert _slots("schedule-weekly", wednesday) == []
+
+
+def test_override_and_holiday_close_and_reopen_the_day():
+    thursday = next_weekday(3)
+    _open("schedule-dates", 3)
+    assert len(_slots("schedule-dates", thursday)) == 11
+
+    _request("PUT", "/schedule/overrides", json={"business_id": "schedule-dates", "date": str(thursday), "closed": True})
+    assert _slots("schedule-dates", thursday) == []
+    response = _request("DELETE", "/schedule/overrides", params={"business_id": "schedule-dates", "date": str(thursday)})
+    assert response.status_code == 200
+    assert len(_slots("schedule-dates", thursday)) == 11
+
+    # Festivo global: afecta también a los calendarios ya cargados de otros negocios
+    _request("POST", "/schedule/holidays", json={"date": str(thursday), "name": "Fiesta local"})
+    assert _slots("schedule-dates", thursday) == []
+    assert business_calendar.get_calendar("schedule-dates").is_holiday(thursday)
+    _request("DELETE", "/schedule/holidays", params={"date": str(thursday)})
+    assert len(_slots("schedule-dates", thursday)) == 11
+
+
+def test_unknown_override_is_404():
+    response = _request("DELETE", "/schedule/overrides", params={"business_id": "nadie", "date": "2030-01-02"})
+    assert response.status_code == 404
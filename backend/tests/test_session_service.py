@@ -0,0 +1,185 @@
+from sqlalchemy import create_engine, event
+
+from app.services.ttl_cache import TTLCache, approx_sizeof
+from app.services import session_service
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cap_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_idle_ttl_is_refreshed_on_access():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=10, sliding=True, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 8
+    assert cache.get("a") == 1
+    clock.now = 16
+    assert cache.get("a") == 1
+    clock.now = 30
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_byte_accounting_follows_in_place_changes():
+    cache = TTLCache(maxsize=10, sizeof=approx_sizeof)
+    value = {"history": []}
+    cache.set("a", value)
+    before = cache.stats()["approx_bytes"]
+
+    value["history"].append({"role": "user", "content": "x" * 1000})
+    cache.resize("a")
+    assert cache.stats()["approx_bytes"] >= before + 1000
+
+    cache.pop("a")
+    assert cache.stats()["approx_bytes"] == 0
+
+
+def test_get_session_keeps_interface(monkeypatch):
+    monkeypatch.setattr(session_service, "_BACKEND", session_service.MemorySessionBackend(maxsize=2, ttl=60))
+
+    session = session_service.get_session("s1")
+    session["date"] = "2025-05-10"
+    assert session_service.get_session("s1")["date"] == "2025-05-10"
+
+    session_service.get_session("s2")
+    session_service.get_session("s3")
+    assert session_service.get_session("s1")["date"] is None
+
+    session_service.clear_session("s3")
+    assert session_service.session_stats()["entries"] == 1
+
+
+def _db_backend(engine, **kwargs):
+    return session_service.DatabaseSessionBackend(engine=engine, flush_interval=60, **kwargs)
+
+
+def test_sessions_survive_restart(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/sessions.db")
+
+    worker = _db_backend(engine)
+    session = worker.get("web-1")
+    session.update({"intent": "book", "date": "2025-05-10", "history": [{"role": "user", "content": "hola"}]})
+    worker.save("web-1", session)
+    worker.close()
+
+    restarted = _db_backend(engine)
+    assert restarted.get("web-1")["date"] == "2025-05-10"
+    assert restarted.get("web-1")["history"][0]["content"] == "hola"
+
+
+def test_writes_are_coalesced_and_batched(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/sessions.db")
+    store = _db_backend(engine)
+    store.get("warmup")  # crea la tabla
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    for sid in ("a", "b", "c"):
+        session = store.get(sid)
+        for turn in range(20):
+            session["turn"] = turn
+            store.save(sid, session)
+
+    writes_before_flush = [s for s in statements if s.lstrip().upper().startswith("INSERT")]
+    assert writes_before_flush == []
+
+    assert store.flush() == 3
+    inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT")]
+    assert len(inserts) == 1
+    assert store.stats()["coalesced_writes"] == 57
+
+
+def test_other_worker_sees_update_after_revalidation(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/sessions.db")
+    clock = FakeClock()
+    worker_a = _db_backend(engine, revalidate_after=2, clock=clock)
+    worker_b = _db_backend(engine, revalidate_after=2, clock=clock)
+
+    session = worker_a.get("web-1")
+    session["date"] = "2025-05-10"
+    worker_a.save("web-1", session)
+    worker_a.flush()
+
+    # El siguiente mensaje del visitante llega a otro worker
+    session_b = worker_b.get("web-1")
+    assert session_b["date"] == "2025-05-10"
+    session_b["time"] = "17:00"
+    worker_b.save("web-1", session_b)
+    worker_b.flush()
+
+    clock.now = 5
+    assert worker_a.get("web-1")["time"] == "17:00"
+
+
+def test_failed_read_does_not_overwrite_stored_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/sessions.db")
+    worker = _db_backend(engine)
+    session = worker.get("web-1")
+    session["date"] = "2025-05-10"
+    worker.save("web-1", session)
+    worker.close()
+
+    restarted = _db_backend(engine)
+    broken = {"on": True}
+
+    def fail(conn, cursor, statement, *args):
+        if broken["on"] and statement.lstrip().upper().startswith("SELECT"):
+            raise RuntimeError("BD caída")
+
+    event.listen(engine, "before_cursor_execute", fail)
+
+    # La lectura falla: el turno sigue con una sesión provisional que no se guarda
+    temporary = restarted.get("web-1")
+    assert temporary["date"] is None
+    temporary["time"] = "17:00"
+    restarted.save("web-1", temporary)
+    assert restarted.flush() == 0
+    assert restarted.stats()["skipped_writes"] == 1
+
+    broken["on"] = False
+    assert restarted.get("web-1")["date"] == "2025-05-10"
+
+
+def test_async_get_revalidates_off_the_event_loop(tmp_path):
+    import asyncio
+    import threading
+
+    engine = create_engine(f"sqlite:///{tmp_path}/sessions.db")
+    clock = FakeClock()
+    store = _db_backend(engine, revalidate_after=2, clock=clock)
+    session = store.get("web-1")
+    store.save("web-1", session)
+    store.flush()
+
+    threads = []
+    event.listen(engine, "before_cursor_execute", lambda *args: threads.append(threading.current_thread()))
+
+    async def turn():
+        return await store.get_async("web-1"), threading.current_thread()
+
+    # Acierto reciente: ni consulta ni hilo
+    _, loop_thread = asyncio.run(turn())
+    assert threads == []
+
+    clock.now = 5
+    assert asyncio.run(turn())[0] is session
+    assert threads and all(t is not loop_thread for t in threads)
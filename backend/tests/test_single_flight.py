@@ -0,0 +1,136 @@
+import time
+import asyncio
+import threading
+from datetime import date, time as time_type, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.mock_bookings import MockBookings
+from app.database import Base
+from app.models.booking import Booking
+from app.models.holiday import Holiday
+from app.models.schedule import WeeklySchedule, ScheduleOverride
+from app.services import availability, business_calendar
+from app.services.availability_cache import get_availability_cache
+from app.services.bookings_client import BookingsClient
+from app.services.http_client import close_http_client
+from app.services.single_flight import SingleFlight, AsyncSingleFlight
+
+SATURDAY = date.today() + timedelta(days=14 + (5 - date.today().weekday()) % 7)
+
+
+def run_threads(n, target):
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_threads_share_one_call_and_its_error():
+    flight = SingleFlight(enabled=True)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return ["10:00"]
+
+    assert run_threads(20, lambda: flight.do("k", slow)) == [["10:00"]] * 20
+    assert len(calls) == 1 and flight.stats()["shared"] == 19
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("backend caído")
+
+    errors = run_threads(5, lambda: flight.do("k", failing))
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = AsyncSingleFlight(enabled=True)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("k", slow))
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == 42
+
+
+@pytest.fixture
+def slow_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/single-flight.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[
+        Booking.__table__, WeeklySchedule.__table__, ScheduleOverride.__table__, Holiday.__table__,
+    ])
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for weekday in range(6):
+            db.add(WeeklySchedule(business_id="promo", weekday=weekday, open_time=time_type(9, 0), close_time=time_type(20, 0)))
+        db.add(Booking(business_id="promo", date=SATURDAY, start_time=time_type(12, 0)))
+        db.commit()
+        # El calendario se carga una vez por negocio (al arrancar): no entra en la cuenta
+        business_calendar.get_calendar("promo", db)
+
+    queries = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def slow_query(*args):
+        # Consultas lentas para que las peticiones simultáneas se solapen de verdad
+        queries.append(1)
+        time.sleep(0.02)
+
+    return Session, queries
+
+
+def test_database_queries_stay_flat_as_concurrency_grows(slow_db):
+    Session, queries = slow_db
+    counts = {}
+    for concurrency in (1, 8, 32):
+        get_availability_cache().clear()
+        queries.clear()
+
+        def lookup():
+            with Session() as db:
+                return availability.get_available_slots("promo", SATURDAY, db)
+
+        results = run_threads(concurrency, lookup)
+        assert all(r == results[0] for r in results) and time_type(12, 0) not in results[0]
+        counts[concurrency] = len(queries)
+
+    assert counts[1] == counts[8] == counts[32] == 2
+
+
+def test_concurrent_sessions_share_one_backend_request():
+    with MockBookings(latency=0.1) as backend:
+        client = BookingsClient(base_url=backend.url, ttl=0)
+
+        async def scenario():
+            results = await asyncio.gather(*(client.booked_times("promo", SATURDAY) for _ in range(25)))
+            await close_http_client()
+            return results
+
+        assert asyncio.run(scenario()) == [frozenset()] * 25
+        assert backend.count("GET") == 1
+        assert client.stats()["flight_shared"] == 24
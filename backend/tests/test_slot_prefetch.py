@@ -0,0 +1,76 @@
+import time
+import asyncio
+from datetime import date, time as time_type, timedelta
+
+from benchmarks.mock_ollama import MockOllama, DEFAULT_REPLY
+from app.services import llm_agent, slot_prefetch
+from app.services.date_parser import MONTHS
+
+MONTH_NAMES = {number: name for name, number in MONTHS.items() if name != "setiembre"}
+FETCH_SECONDS = 0.2
+
+
+def _slow_slots(monkeypatch):
+    calls = []
+
+    async def fake_slots(business_id, day):
+        calls.append(day)
+        await asyncio.sleep(FETCH_SECONDS)
+        return [time_type(10, 0), time_type(17, 0)]
+
+    monkeypatch.setattr(llm_agent, "get_supabase_slots_async", fake_slots)
+    return calls
+
+
+def _reset_stats(monkeypatch):
+    monkeypatch.setattr(slot_prefetch, "PREFETCH_STATS",
+                        {"started": 0, "used": 0, "discarded": 0, "misses": 0, "saved_seconds": 0.0})
+
+
+def _availability_reply(day):
+    def responder(payload):
+        return {**DEFAULT_REPLY, "intent": "check_availability", "date": day.isoformat(), "message": "Miro la agenda"}
+    return responder
+
+
+def test_prefetched_slots_are_used_when_the_llm_asks_for_that_date(monkeypatch):
+    _reset_stats(monkeypatch)
+    calls = _slow_slots(monkeypatch)
+    day = date.today() + timedelta(days=30)
+    # No es un mensaje del camino rápido: lo interpreta el LLM
+    message = f"Me caso el {day.day} de {MONTH_NAMES[day.month]}, ¿tenéis hueco ese día para hacer fotos?"
+
+    with MockOllama(latency=FETCH_SECONDS, responder=_availability_reply(day)) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        started = time.perf_counter()
+        result = asyncio.run(llm_agent.handle_chat("demo", "prefetch-1", message))
+        elapsed = time.perf_counter() - started
+
+    assert "10:00" in result["reply"] and "17:00" in result["reply"]
+    assert calls == [day]
+    # La consulta de huecos se ha solapado con la del LLM
+    assert elapsed < 2 * FETCH_SECONDS
+    stats = slot_prefetch.prefetch_stats()
+    assert stats["used"] == 1 and stats["discarded"] == 0
+    assert stats["saved_seconds"] > FETCH_SECONDS / 2
+
+
+def test_prefetch_for_another_date_is_discarded(monkeypatch):
+    _reset_stats(monkeypatch)
+    calls = _slow_slots(monkeypatch)
+    mentioned = date.today() + timedelta(days=30)
+    chosen = mentioned + timedelta(days=1)
+    message = f"Me caso el {mentioned.day} de {MONTH_NAMES[mentioned.month]}, pero mejor el día siguiente, ¿hay hueco?"
+
+    with MockOllama(latency=0.05, responder=_availability_reply(chosen)) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        asyncio.run(llm_agent.handle_chat("demo", "prefetch-2", message))
+
+    assert calls[-1] == chosen
+    stats = slot_prefetch.prefetch_stats()
+    assert stats["used"] == 0 and stats["discarded"] == 1 and stats["misses"] == 1
+
+
+def test_disabled_prefetch_queries_after_the_llm(monkeypatch):
+    monkeypatch.setattr(llm_agent, "SLOT_PREFETCH_ENABLED", False)
+    assert llm_agent.start_slot_prefetch("demo", {}, "¿Tenéis hueco mañana?") is None
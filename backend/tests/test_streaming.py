@@ -0,0 +1,61 @@
+import json
+import asyncio
+
+import httpx
+
+from benchmarks.mock_ollama import MockOllama
+from app.services import llm_agent
+from app.services.stream_parser import MessageFieldStreamer
+
+
+RAW = json.dumps({
+    "intent": "smalltalk",
+    "date": None,
+    "event_details": {"lugar": "Toledo", "message": "no es este"},
+    "message": "¡Hola! \"Martín\" aquí \\ contigo 📸\n¿Qué tal?",
+    "time": None,
+})
+
+
+def test_streamer_handles_every_chunk_boundary():
+    expected = json.loads(RAW)["message"]
+    for size in range(1, 12):
+        streamer = MessageFieldStreamer()
+        out = "".join(streamer.feed(RAW[i:i + size]) for i in range(0, len(RAW), size))
+        assert out == expected
+
+
+def test_streamer_decodes_escaped_unicode():
+    raw = json.dumps({"message": "Perfecto 📸 día"}, ensure_ascii=True)
+    streamer = MessageFieldStreamer()
+    assert "".join(streamer.feed(c) for c in raw) == "Perfecto 📸 día"
+
+
+def test_stream_endpoint_emits_tokens_then_done(monkeypatch):
+    from app.main import app
+
+    with MockOllama(latency=0.05, token_rate=500) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                resp = await client.post("/agent/chat/stream", json={
+                    "business_id": "demo", "session_id": "stream-1", "message": "Hola"
+                })
+                return resp.text
+
+        body = asyncio.run(run())
+
+    events = []
+    for block in body.strip().split("\n\n"):
+        kind, data = block.split("\n")
+        events.append((kind[len("event: "):], json.loads(data[len("data: "):])))
+
+    tokens = [d["text"] for k, d in events if k == "token"]
+    assert len(tokens) > 1
+    kind, done = events[-1]
+    assert kind == "done"
+    assert done["reply"] == "".join(tokens)
+    assert done["replace"] is False
+    assert mock.requests[0]["stream"] is True
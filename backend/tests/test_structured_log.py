@@ -0,0 +1,126 @@
+import io
+import json
+import queue
+import asyncio
+import logging
+
+from benchmarks.mock_ollama import MockOllama, DEFAULT_REPLY
+from app.services import structured_log, llm_agent, session_service
+from app.services.structured_log import JsonFormatter, NonBlockingQueueHandler, redact, log_payload
+
+
+def _record(msg, *args, **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_redacts_credentials_and_customer_contact():
+    text = "Bearer abc.def-123 para ana.garcia@example.com, tel +34 612 345 678, clave s3cr3t-v4lue el 2026-03-09"
+    clean = redact(text, secrets=["s3cr3t-v4lue"])
+    assert clean == "Bearer [secret] para [email], tel [phone], clave [secret] el 2026-03-09"
+
+
+def test_json_record_with_fields_and_redaction():
+    formatter = JsonFormatter(secrets=[])
+    line = formatter.format(_record("Cita guardada para %s", "pepe@example.com",
+                                    date="2026-03-09", customer_name="Pepe", payload={"to_email": "x@y.es"}))
+    entry = json.loads(line)
+    assert entry["msg"] == "Cita guardada para [email]"
+    assert entry["level"] == "INFO" and entry["logger"] == "app.test"
+    assert entry["date"] == "2026-03-09"
+    assert entry["customer_name"] == "[redacted]"
+    assert entry["payload"] == {"to_email": "[redacted]"}
+
+
+def test_queue_handler_never_blocks_and_counts_drops():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = structured_log.logging_stats()["dropped"]
+    handler.emit(_record("uno"))
+    handler.emit(_record("dos"))
+    assert structured_log.logging_stats()["dropped"] == before + 1
+    # El mensaje se fija al encolar: los argumentos pueden cambiar después
+    assert handler.queue.get_nowait().msg == "uno"
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _payload_records(fn):
+    handler = _ListHandler()
+    payload_logger = logging.getLogger(structured_log.PAYLOAD_LOGGER)
+    level = payload_logger.level
+    payload_logger.setLevel(logging.INFO)
+    payload_logger.addHandler(handler)
+    try:
+        fn()
+    finally:
+        payload_logger.removeHandler(handler)
+        payload_logger.setLevel(level)
+    return handler.records
+
+
+def test_payload_is_truncated():
+    [record] = _payload_records(
+        lambda: log_payload("llm_request", [{"role": "user", "content": "x" * 500}], max_chars=100, session_id="s1")
+    )
+    assert len(record.payload) == 100 and record.truncated and record.payload_chars > 500
+    assert structured_log.sample_payloads(rate=0) is False
+
+
+def test_listener_writes_json_lines_in_background(monkeypatch):
+    out = io.StringIO()
+    monkeypatch.setattr(structured_log, "_listener", None)
+    app_logger = logging.getLogger("app")
+    monkeypatch.setattr(app_logger, "handlers", [])
+    monkeypatch.setattr(app_logger, "level", app_logger.level)
+    monkeypatch.setattr(app_logger, "propagate", app_logger.propagate)
+    noisy = logging.getLogger("app.noisy")
+    monkeypatch.setattr(noisy, "level", noisy.level)
+    structured_log.setup_logging(stream=out, level="INFO", levels="app.noisy=ERROR", fmt="json")
+    try:
+        logging.getLogger("app.services.demo").info("Hola", extra={"turn": 1})
+        logging.getLogger("app.noisy").warning("no sale")
+    finally:
+        structured_log.stop_logging()
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(l["logger"], l["msg"], l["turn"]) for l in lines] == [("app.services.demo", "Hola", 1)]
+
+
+def test_payload_is_redacted_before_truncating():
+    # El corte cae en mitad del email: recortado ya no se reconocería
+    content = "x" * 60 + " ana.garcia@example.com"
+    [record] = _payload_records(lambda: log_payload("llm_request", content, max_chars=75))
+    assert record.payload == "x" * 60 + " [email]"
+    assert not record.truncated
+
+
+def test_payload_masks_the_customer_values():
+    content = "Reserva para ana garcía (Ana García), tel 612345678 o 612 345 678. Banana."
+    [record] = _payload_records(lambda: log_payload("llm_response", content, mask=["Ana García", "612345678", None, "a"]))
+    assert record.payload == "Reserva para [redacted] ([redacted]), tel [redacted] o [phone]. Banana."
+
+
+def test_chat_payloads_do_not_include_the_session_customer(monkeypatch):
+    session_service.save_session("log-customer", {"customer_name": "Rocío Vidal", "customer_phone": "600111222"})
+    monkeypatch.setattr(llm_agent, "sample_payloads", lambda: True)
+
+    def responder(payload):
+        return {**DEFAULT_REPLY, "message": "Perfecto, Rocío Vidal. ¿Para qué día?"}
+
+    with MockOllama(responder=responder) as mock:
+        monkeypatch.setattr(llm_agent, "OLLAMA_API_BASE", mock.url)
+        records = _payload_records(
+            lambda: asyncio.run(llm_agent.handle_chat("demo", "log-customer", "Quiero reservar una visita"))
+        )
+
+    assert "Rocío Vidal" in json.dumps(mock.requests[0], ensure_ascii=False)
+    assert [r.msg for r in records] == ["llm_request", "llm_response"]
+    assert all("Rocío" not in r.payload and "600111222" not in r.payload for r in records)
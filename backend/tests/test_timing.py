@@ -0,0 +1,27 @@
+import asyncio
+
+from app.services.timing import stage, record_stage, request_timings, stage_stats, reset_stage_stats
+
+
+def test_stages_add_up_per_request_and_globally():
+    reset_stage_stats()
+
+    async def turn():
+        with request_timings() as timings:
+            with stage("llm"):
+                await asyncio.sleep(0.02)
+            record_stage("db", 0.005)
+            record_stage("db", 0.005)
+            return timings
+
+    timings = asyncio.run(turn())
+    assert timings["llm"] >= 0.02 and abs(timings["db"] - 0.01) < 1e-9
+
+    stats = stage_stats()
+    assert stats["db"]["count"] == 2 and abs(stats["db"]["avg_seconds"] - 0.005) < 1e-9
+    assert stats["llm"]["p95_seconds"] >= 0.02
+    assert stats["smtp"]["count"] == 0
+
+    # Fuera de una petición solo se acumulan las estadísticas globales
+    record_stage("parse", 0.001)
+    assert stage_stats()["parse"]["count"] == 1
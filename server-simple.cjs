@@ -966,6 +966,27 @@ app.post('/api/bookings', async (req, res) => {
       event_details, event_date 
     } = req.body;
 
+    // Inserción atómica: el índice único (business_id, date, start_time) rechaza
+    // el hueco ya reservado sin consultar antes (código 23505 de PostgreSQL)
+    const { data, error } = await supabase
+      .from('bookings')
+      .insert([{
+        business_id: business_id || 'demo',
+        date,
+        start_time,
+        customer_name,
+        customer_email,
+        customer_phone,
+        event_details,
+        event_date
+      }])
+      .select();
+
+    if (error?.code === '23505') {
+      return res.status(409).json({ error: 'Ese horario ya está reservado' });
+    }
+    if (error) throw error;
+
     // --- CRM: Registrar o actualizar cliente (Cita Concertada) ---
     if (customer_email) {
       try {
@@ -998,21 +1019,6 @@ app.post('/api/bookings', async (req, res) => {
       }
     }
 
-    const { data, error } = await supabase
-      .from('bookings')
-      .insert([{
-        business_id: business_id || 'demo',
-        date,
-        start_time,
-        customer_name,
-        customer_email,
-        customer_phone,
-        event_details,
-        event_date
-      }])
-      .select();
-
-    if (error) throw error;
     res.json({ success: true, booking: data[0] });
   } catch (error) {
     console.error('Error creando reserva:', error);
@@ -711,6 +711,13 @@ app.post('/api/bookings', async (req, res) => {
   try {
     const { business_id, date, start_time, customer_name, customer_email, customer_phone, event_details } = req.body;
 
+    // Inserción atómica: el índice único (business_id, date, start_time) rechaza el hueco ya reservado
+    const { data, error } = await supabase.from('bookings').insert([{ business_id: business_id || 'demo', date, start_time, customer_name, customer_email, customer_phone, event_details }]).select();
+    if (error?.code === '23505') {
+      return res.status(409).json({ error: 'Ese horario ya está reservado' });
+    }
+    if (error) throw error;
+
     // --- Integración con CRM ---
     if (customer_email) {
       const { data: existingClient } = await supabase.from('clients').select('*').eq('email', customer_email).single();
@@ -721,8 +728,6 @@ app.post('/api/bookings', async (req, res) => {
       }
     }
 
-    const { data, error } = await supabase.from('bookings').insert([{ business_id: business_id || 'demo', date, start_time, customer_name, customer_email, customer_phone, event_details }]).select();
-    if (error) throw error;
     res.json({ success: true, booking: data[0] });
   } catch (error: any) {
     res.status(500).json({ error: error.message });